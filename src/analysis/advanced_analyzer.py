@@ -1,16 +1,53 @@
 """Advanced analysis including topic modeling and correlation analysis"""
+import os
+import pickle
+from datetime import datetime
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.decomposition import LatentDirichletAllocation
+from pymongo import UpdateOne
 import pandas as pd
 import warnings
 warnings.filterwarnings('ignore')
 
+TOPIC_MODEL_PATH = os.getenv(
+    'TOPIC_MODEL_PATH',
+    os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'topic_model.pkl')
+)
+
+SENTIMENT_LABELS = ['positive', 'negative', 'neutral']
+ENGAGEMENT_LABELS = ['Low', 'Medium', 'High', 'Viral']
+
+# Ngưỡng likes bắt đầu mỗi mức engagement (likes nguyên), post có likes < b0 không được tính.
+# [1, 11, 51, 101] tương đương pd.cut(bins=[0, 10, 50, 100, inf]) cũ: (0,10] (10,50] (50,100] (100,inf)
+ENGAGEMENT_BINS = {
+    'default': [1, 11, 51, 101]
+}
+
+# Ngưỡng riêng theo platform, chỉ dùng khi truyền vào: sentiment_by_engagement(bins=PLATFORM_ENGAGEMENT_BINS)
+PLATFORM_ENGAGEMENT_BINS = {
+    'hackernews': [1, 21, 101, 501],
+    'stackoverflow': [1, 3, 11, 51]
+}
+
+
+def build_topic_vectorizer():
+    """Vectorizer dùng chung cho topic modeling và model selection"""
+    return TfidfVectorizer(
+        max_features=100,
+        min_df=2,
+        max_df=0.8,
+        stop_words='english'
+    )
+
+
 class AdvancedAnalyzer:
-    def __init__(self, db):
+    def __init__(self, db, count_clusters=False):
         self.db = db
         self.posts_collection = db['posts']
+        # count_clusters=True: mỗi cụm bài gần trùng lặp chỉ tính một lần
+        self.posts_filter = {'is_canonical': {'$ne': False}} if count_clusters else {}
         try:
-            posts_data = list(self.posts_collection.find())
+            posts_data = list(self.posts_collection.find(self.posts_filter))
             self.df = pd.DataFrame(posts_data)
             
             # Ensure required columns exist with default values
@@ -29,17 +66,11 @@ class AdvancedAnalyzer:
             print(f"Error loading data in AdvancedAnalyzer: {e}")
             self.df = pd.DataFrame()
     
-    def topic_modeling(self, n_topics=5):
-        """Topic Modeling với LDA"""
+    def _fit_topic_model(self, n_topics=5):
+        """Huấn luyện TF-IDF + LDA trên toàn bộ text"""
         texts = self.df['text'].fillna('').tolist()
         
-        vectorizer = TfidfVectorizer(
-            max_features=100,
-            min_df=2,
-            max_df=0.8,
-            stop_words='english'
-        )
-        
+        vectorizer = build_topic_vectorizer()
         tfidf_matrix = vectorizer.fit_transform(texts)
         
         lda = LatentDirichletAllocation(
@@ -49,6 +80,11 @@ class AdvancedAnalyzer:
         )
         
         lda.fit(tfidf_matrix)
+        return vectorizer, lda
+    
+    def topic_modeling(self, n_topics=5):
+        """Topic Modeling với LDA"""
+        vectorizer, lda = self._fit_topic_model(n_topics)
         
         feature_names = vectorizer.get_feature_names_out()
         topics = []
@@ -63,6 +99,96 @@ class AdvancedAnalyzer:
         
         return topics
     
+    def _load_topic_model(self, n_topics, refit=False, model_path=TOPIC_MODEL_PATH):
+        """Đọc model LDA đã lưu, hoặc huấn luyện lại và lưu xuống đĩa"""
+        if not refit and os.path.exists(model_path):
+            with open(model_path, 'rb') as f:
+                model = pickle.load(f)
+            if model['n_topics'] == n_topics:
+                return model
+        
+        vectorizer, lda = self._fit_topic_model(n_topics)
+        model = {
+            'vectorizer': vectorizer,
+            'lda': lda,
+            'n_topics': n_topics,
+            'version': datetime.now().strftime('%Y%m%d_%H%M%S')
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(model_path)), exist_ok=True)
+        with open(model_path, 'wb') as f:
+            pickle.dump(model, f)
+        return model
+    
+    def assign_topics(self, n_topics=5, batch_size=1000, refit=False):
+        """Gán topic chính và phân bố topic cho từng post, ghi theo lô bằng bulk_write"""
+        model = self._load_topic_model(n_topics, refit=refit)
+        
+        # Chỉ xử lý posts chưa có nhãn hoặc được gán bởi model cũ
+        posts = self.posts_collection.find(
+            {'lda_model_version': {'$ne': model['version']}},
+            {'text': 1}
+        )
+        
+        count = 0
+        batch = []
+        
+        def flush(batch):
+            texts = [post.get('text') or '' for post in batch]
+            distributions = model['lda'].transform(model['vectorizer'].transform(texts))
+            operations = [
+                UpdateOne(
+                    {'_id': post['_id']},
+                    {'$set': {
+                        'lda_topic': int(dist.argmax()),
+                        'lda_topic_dist': [round(float(p), 4) for p in dist],
+                        'lda_model_version': model['version']
+                    }}
+                )
+                for post, dist in zip(batch, distributions)
+            ]
+            self.posts_collection.bulk_write(operations, ordered=False)
+        
+        for post in posts:
+            batch.append(post)
+            if len(batch) >= batch_size:
+                flush(batch)
+                count += len(batch)
+                batch = []
+                print(f"Labeled {count} posts with topics...")
+        
+        if batch:
+            flush(batch)
+            count += len(batch)
+        
+        print(f"✅ Assigned LDA topics to {count} posts")
+        return count
+    
+    def topic_stats(self):
+        """Thống kê theo topic đã học, tính trực tiếp trên field lda_topic được index"""
+        pipeline = [
+            {'$match': dict(self.posts_filter, lda_topic={'$exists': True})},
+            {
+                '$group': {
+                    '_id': '$lda_topic',
+                    'total_posts': {'$sum': 1},
+                    'positive': {
+                        '$sum': {'$cond': [{'$eq': ['$sentiment', 'positive']}, 1, 0]}
+                    },
+                    'negative': {
+                        '$sum': {'$cond': [{'$eq': ['$sentiment', 'negative']}, 1, 0]}
+                    },
+                    'neutral': {
+                        '$sum': {'$cond': [{'$eq': ['$sentiment', 'neutral']}, 1, 0]}
+                    },
+                    'avg_sentiment_score': {'$avg': '$sentiment_score'},
+                    'avg_likes': {'$avg': '$likes'}
+                }
+            },
+            {'$sort': {'_id': 1}}
+        ]
+        
+        return pd.DataFrame(list(self.posts_collection.aggregate(pipeline)))
+    
     def sentiment_correlation(self):
         """Phân tích correlation giữa sentiment và engagement"""
         if self.df.empty:
@@ -85,23 +211,84 @@ class AdvancedAnalyzer:
             print(f"Error in correlation analysis: {e}")
             return pd.DataFrame()
     
-    def sentiment_by_engagement(self):
-        """Phân tích cảm xúc theo mức độ engagement"""
-        if self.df.empty or 'likes' not in self.df.columns or 'sentiment' not in self.df.columns:
-            return pd.DataFrame()
+    def _engagement_bucket_stage(self, boundaries):
+        """$bucket theo likes, đếm số post mỗi loại cảm xúc trong từng bucket ('overflow' = likes >= b_cuối)"""
+        return {
+            '$bucket': {
+                'groupBy': '$likes',
+                'boundaries': list(boundaries),
+                'default': 'overflow',
+                'output': {
+                    sentiment: {'$sum': {'$cond': [{'$eq': ['$sentiment', sentiment]}, 1, 0]}}
+                    for sentiment in SENTIMENT_LABELS
+                }
+            }
+        }
+    
+    def sentiment_by_engagement(self, bins=None, by_platform=False):
+        """
+        Phân tích cảm xúc theo mức độ engagement, tính hoàn toàn phía MongoDB.
+        bins: {'platform': [b0, b1, b2, b3]} ghi đè ENGAGEMENT_BINS; likes < b0 bị bỏ qua, likes >= b3 là 'Viral'
+        """
+        bins = dict(ENGAGEMENT_BINS, **(bins or {}))
+        for platform, boundaries in bins.items():
+            if len(boundaries) != len(ENGAGEMENT_LABELS) or list(boundaries) != sorted(set(boundaries)):
+                raise ValueError(f"Engagement bins for '{platform}' must be {len(ENGAGEMENT_LABELS)} "
+                                 f"increasing boundaries (one per {'/'.join(ENGAGEMENT_LABELS)}), got {boundaries}")
+        specific_platforms = [p for p in bins if p != 'default']
+        
+        facets = {
+            platform: [
+                {'$match': {'platform': platform, 'likes': {'$gte': bins[platform][0]}}},
+                self._engagement_bucket_stage(bins[platform])
+            ]
+            for platform in specific_platforms
+        }
+        facets['default'] = [
+            {'$match': {'platform': {'$nin': specific_platforms}, 'likes': {'$gte': bins['default'][0]}}},
+            self._engagement_bucket_stage(bins['default'])
+        ]
+        
+        pipeline = [
+            {'$match': dict(self.posts_filter, sentiment={'$exists': True})},
+            {'$project': {
+                '_id': 0,
+                'platform': 1,
+                'sentiment': 1,
+                'likes': {'$max': [0, {'$convert': {
+                    'input': '$likes', 'to': 'double', 'onError': 0, 'onNull': 0
+                }}]}
+            }},
+            {'$facet': facets}
+        ]
         
         try:
-            # Ensure likes column is numeric
-            self.df['likes'] = pd.to_numeric(self.df['likes'], errors='coerce').fillna(0)
+            result = list(self.posts_collection.aggregate(pipeline))
+            rows = []
+            for platform, buckets in (result[0].items() if result else []):
+                boundaries = bins[platform]
+                for bucket in buckets:
+                    level_index = len(ENGAGEMENT_LABELS) - 1 if bucket['_id'] == 'overflow' \
+                        else boundaries.index(bucket['_id'])
+                    for sentiment in SENTIMENT_LABELS:
+                        rows.append({
+                            'platform': platform,
+                            'engagement_level': ENGAGEMENT_LABELS[level_index],
+                            'sentiment': sentiment,
+                            'count': bucket[sentiment]
+                        })
             
-            self.df['engagement_level'] = pd.cut(
-                self.df['likes'],
-                bins=[0, 10, 50, 100, float('inf')],
-                labels=['Low', 'Medium', 'High', 'Viral']
-            )
+            if not rows:
+                return pd.DataFrame()
             
-            engagement_sentiment = self.df.groupby(['engagement_level', 'sentiment']).size().unstack(fill_value=0)
-            return engagement_sentiment
+            df = pd.DataFrame(rows)
+            df['engagement_level'] = pd.Categorical(df['engagement_level'], categories=ENGAGEMENT_LABELS, ordered=True)
+            index = ['platform', 'engagement_level'] if by_platform else ['engagement_level']
+            engagement_sentiment = df.pivot_table(
+                index=index, columns='sentiment', values='count',
+                aggfunc='sum', fill_value=0, observed=True
+            )
+            return engagement_sentiment.loc[:, (engagement_sentiment != 0).any(axis=0)]
         except Exception as e:
             print(f"Error in engagement analysis: {e}")
             return pd.DataFrame()
@@ -0,0 +1,132 @@
+"""Near-duplicate clustering across sources using MinHash-LSH"""
+from datetime import datetime
+from pymongo import UpdateOne
+from utils.minhash import minhash_fields, estimate_similarity
+
+
+class DuplicateDetector:
+    def __init__(self, db, threshold=0.5, batch_size=500):
+        self.db = db
+        self.posts_collection = db['posts']
+        self.threshold = threshold
+        self.batch_size = batch_size
+
+    def backfill_signatures(self):
+        """Tính MinHash cho các posts cũ chưa có signature"""
+        posts = self.posts_collection.find(
+            {'minhash': {'$exists': False}},
+            {'title': 1, 'text': 1, 'source': 1}
+        )
+        operations = []
+        count = 0
+
+        for post in posts:
+            fields = minhash_fields(post)
+            if not fields:
+                continue
+            operations.append(UpdateOne({'_id': post['_id']}, {'$set': fields}))
+            count += 1
+
+            if len(operations) >= self.batch_size:
+                self.posts_collection.bulk_write(operations, ordered=False)
+                operations = []
+
+        if operations:
+            self.posts_collection.bulk_write(operations, ordered=False)
+
+        if count:
+            print(f"🔏 Computed MinHash signatures for {count} existing posts")
+        return count
+
+    def _find_cluster(self, post, batch_clusters):
+        """Tìm cluster gần nhất cho một post qua các band LSH"""
+        candidates = self.posts_collection.find(
+            {'lsh_bands': {'$in': post['lsh_bands']}, '_id': {'$ne': post['_id']}},
+            {'minhash': 1, 'dup_cluster': 1}
+        )
+
+        best_cluster, best_score = None, self.threshold
+        for candidate in candidates:
+            cluster = candidate.get('dup_cluster') or batch_clusters.get(candidate['_id'])
+            if cluster is None:
+                continue
+            score = estimate_similarity(post['minhash'], candidate.get('minhash'))
+            if score >= best_score:
+                best_cluster, best_score = cluster, score
+        return best_cluster
+
+    def _choose_canonical(self, cluster_id):
+        """Chọn post đại diện: đăng sớm nhất, ưu tiên text dài hơn"""
+        members = list(self.posts_collection.find(
+            {'dup_cluster': cluster_id},
+            {'created_at': 1, 'text': 1}
+        ))
+        if not members:
+            return []
+
+        canonical = min(
+            members,
+            key=lambda p: (p.get('created_at') or datetime.max, -len(p.get('text') or ''))
+        )
+        return [
+            UpdateOne(
+                {'_id': member['_id']},
+                {'$set': {
+                    'is_canonical': member['_id'] == canonical['_id'],
+                    'canonical_post': canonical['_id'],
+                    'cluster_size': len(members)
+                }}
+            )
+            for member in members
+        ]
+
+    def cluster_posts(self):
+        """Gom nhóm các posts gần trùng lặp chưa được phân cụm"""
+        self.backfill_signatures()
+
+        new_posts = self.posts_collection.find(
+            {'dup_cluster': {'$exists': False}, 'lsh_bands': {'$exists': True}},
+            {'minhash': 1, 'lsh_bands': 1}
+        ).sort('created_at', 1)
+
+        batch_clusters = {}
+        touched_clusters = set()
+        operations = []
+
+        for post in new_posts:
+            cluster_id = self._find_cluster(post, batch_clusters) or post['_id']
+            batch_clusters[post['_id']] = cluster_id
+            touched_clusters.add(cluster_id)
+            operations.append(UpdateOne({'_id': post['_id']}, {'$set': {'dup_cluster': cluster_id}}))
+
+            if len(operations) >= self.batch_size:
+                self.posts_collection.bulk_write(operations, ordered=False)
+                operations = []
+
+        if operations:
+            self.posts_collection.bulk_write(operations, ordered=False)
+
+        # Cập nhật post đại diện cho các cluster vừa thay đổi
+        operations = []
+        for cluster_id in touched_clusters:
+            operations.extend(self._choose_canonical(cluster_id))
+            if len(operations) >= self.batch_size:
+                self.posts_collection.bulk_write(operations, ordered=False)
+                operations = []
+
+        if operations:
+            self.posts_collection.bulk_write(operations, ordered=False)
+
+        duplicates = len(batch_clusters) - len([p for p, c in batch_clusters.items() if p == c])
+        print(f"🧬 Clustered {len(batch_clusters)} posts, {duplicates} near-duplicates found")
+        return {'clustered': len(batch_clusters), 'duplicates': duplicates}
+
+    def get_cluster_stats(self):
+        """Thống kê số cluster so với số posts thô"""
+        total_posts = self.posts_collection.count_documents({})
+        total_clusters = self.posts_collection.count_documents({'is_canonical': {'$ne': False}})
+        return {
+            'total_posts': total_posts,
+            'total_clusters': total_clusters,
+            'duplicate_posts': total_posts - total_clusters
+        }
@@ -0,0 +1,317 @@
+"""Approximate nearest-neighbour search over post vectors (TF-IDF + SVD + random-projection LSH)"""
+import os
+import json
+import pickle
+import numpy as np
+from bson import ObjectId
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.decomposition import TruncatedSVD
+
+DEFAULT_INDEX_DIR = os.getenv(
+    'SIMILARITY_INDEX_DIR',
+    os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'similarity_index')
+)
+
+
+class SimilarityIndex:
+    """
+    Layout trên đĩa (tất cả đều memory-mapped):
+      model.pkl    - vectorizer, SVD và các siêu phẳng chiếu ngẫu nhiên
+      meta.json    - count / capacity / số dòng đã sắp xếp
+      vectors.f32  - (capacity, dim) vector đã chuẩn hoá L2
+      codes.u32    - (capacity, n_tables) mã băm LSH của từng dòng
+      ids.s24      - (capacity,) ObjectId dạng hex
+      sorted.u32 / order.u32 - (n_tables, n_sorted) mã đã sắp xếp và thứ tự dòng
+    Các dòng thêm sau lần sắp xếp cuối là "delta" và được quét tuyến tính,
+    được gộp lại khi delta vượt quá merge_ratio.
+    """
+
+    def __init__(self, db, index_dir=DEFAULT_INDEX_DIR, n_components=128,
+                 n_tables=8, n_bits=16, merge_ratio=0.1, batch_size=5000):
+        self.db = db
+        self.posts_collection = db['posts']
+        self.index_dir = os.path.abspath(index_dir)
+        self.n_components = n_components
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.merge_ratio = merge_ratio
+        self.batch_size = batch_size
+
+        self.model = None
+        self.meta = None
+        self._id_to_row = None
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+    def _path(self, name):
+        return os.path.join(self.index_dir, name)
+
+    def _meta_mtime(self):
+        try:
+            return os.path.getmtime(self._path('meta.json'))
+        except OSError:
+            return None
+
+    def _load(self):
+        """Đọc model và metadata nếu index đã tồn tại"""
+        self._loaded_mtime = self._meta_mtime()
+        self._id_to_row = None
+        if self._loaded_mtime is None:
+            self.model = self.meta = None
+            return
+        with open(self._path('model.pkl'), 'rb') as f:
+            self.model = pickle.load(f)
+        with open(self._path('meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.n_tables = self.meta['n_tables']
+        self.n_bits = self.meta['n_bits']
+
+    def _save_meta(self):
+        tmp_path = self._path('meta.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self._path('meta.json'))
+        self._loaded_mtime = self._meta_mtime()
+
+    def reload_if_changed(self):
+        """Đọc lại model/metadata khi process khác đã build() hoặc update() index"""
+        if self._meta_mtime() != self._loaded_mtime:
+            self._load()
+        return self
+
+    def _memmap(self, name, dtype, shape, mode='r+'):
+        return np.memmap(self._path(name), dtype=dtype, mode=mode, shape=shape)
+
+    def _vectors(self, mode='r'):
+        return self._memmap('vectors.f32', np.float32, (self.meta['capacity'], self.meta['dim']), mode)
+
+    def _codes(self, mode='r'):
+        return self._memmap('codes.u32', np.uint32, (self.meta['capacity'], self.n_tables), mode)
+
+    def _ids(self, mode='r'):
+        return self._memmap('ids.s24', 'S24', (self.meta['capacity'],), mode)
+
+    def _grow(self, needed):
+        """Tăng gấp đôi dung lượng các file memmap khi cần"""
+        capacity = self.meta['capacity']
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        for name, row_bytes in [('vectors.f32', 4 * self.meta['dim']),
+                                ('codes.u32', 4 * self.n_tables),
+                                ('ids.s24', 24)]:
+            with open(self._path(name), 'r+b') as f:
+                f.truncate(new_capacity * row_bytes)
+        self.meta['capacity'] = new_capacity
+        self._save_meta()
+
+    # ------------------------------------------------------------------
+    # Vectorisation
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _post_text(post):
+        return f"{post.get('title') or ''} {post.get('text') or ''}".strip()
+
+    def _embed(self, texts):
+        """Chuyển text thành vector đã chuẩn hoá và mã LSH"""
+        vectors = self.model['svd'].transform(self.model['vectorizer'].transform(texts)).astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1, norms)
+        return vectors, self._hash(vectors)
+
+    def _hash(self, vectors):
+        """Mã LSH: mỗi bảng là n_bits dấu của phép chiếu lên siêu phẳng ngẫu nhiên"""
+        # planes: (n_tables, n_bits, dim) -> bits: (n, n_tables, n_bits)
+        bits = np.einsum('nd,tbd->ntb', vectors, self.model['planes']) > 0
+        weights = (1 << np.arange(self.n_bits, dtype=np.uint32))
+        return (bits * weights).sum(axis=2).astype(np.uint32)
+
+    # ------------------------------------------------------------------
+    # Building and incremental insertion
+    # ------------------------------------------------------------------
+    def build(self):
+        """Huấn luyện vectorizer/SVD trên toàn bộ posts và dựng lại index"""
+        posts = list(self.posts_collection.find({}, {'title': 1, 'text': 1}))
+        if len(posts) < 3:
+            print("⚠️  Not enough posts to build similarity index")
+            return 0
+
+        print(f"🧭 Building similarity index over {len(posts):,} posts...")
+        texts = [self._post_text(p) for p in posts]
+
+        vectorizer = TfidfVectorizer(max_features=50000, stop_words='english', sublinear_tf=True)
+        tfidf_matrix = vectorizer.fit_transform(texts)
+        n_components = max(1, min(self.n_components, tfidf_matrix.shape[1] - 1, len(posts) - 1))
+        svd = TruncatedSVD(n_components=n_components, random_state=42)
+        svd.fit(tfidf_matrix)
+
+        rng = np.random.RandomState(42)
+        self.model = {
+            'vectorizer': vectorizer,
+            'svd': svd,
+            'planes': rng.normal(size=(self.n_tables, self.n_bits, n_components)).astype(np.float32)
+        }
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(self._path('model.pkl'), 'wb') as f:
+            pickle.dump(self.model, f)
+
+        self.meta = {
+            'count': 0, 'capacity': 0, 'n_sorted': 0, 'dim': n_components,
+            'n_tables': self.n_tables, 'n_bits': self.n_bits
+        }
+        for name in ['vectors.f32', 'codes.u32', 'ids.s24', 'sorted.u32', 'order.u32']:
+            open(self._path(name), 'wb').close()
+        self._save_meta()
+        self._id_to_row = None
+
+        self.posts_collection.update_many({}, {'$unset': {'similarity_indexed': ''}})
+        return self.update()
+
+    def add_posts(self, posts, merge=True):
+        """Thêm posts mới vào index (đường ingest), trả về số posts đã thêm"""
+        posts = [p for p in posts if '_id' in p]
+        if not posts or self.model is None:
+            return 0
+
+        vectors, codes = self._embed([self._post_text(p) for p in posts])
+        start = self.meta['count']
+        end = start + len(posts)
+        self._grow(end)
+
+        self._vectors('r+')[start:end] = vectors
+        self._codes('r+')[start:end] = codes
+        self._ids('r+')[start:end] = [str(p['_id']).encode() for p in posts]
+
+        self.meta['count'] = end
+        if self._id_to_row is not None:
+            for row, post in enumerate(posts, start):
+                self._id_to_row[str(post['_id'])] = row
+
+        if merge:
+            self._maybe_merge()
+        else:
+            self._save_meta()
+
+        self.posts_collection.update_many(
+            {'_id': {'$in': [p['_id'] for p in posts]}},
+            {'$set': {'similarity_indexed': True}}
+        )
+        return len(posts)
+
+    def update(self):
+        """Index các posts chưa được index; dựng mới nếu chưa có model"""
+        if self.model is None:
+            return self.build()
+
+        cursor = self.posts_collection.find(
+            {'similarity_indexed': {'$exists': False}},
+            {'title': 1, 'text': 1}
+        )
+        total, batch = 0, []
+        for post in cursor:
+            batch.append(post)
+            if len(batch) >= self.batch_size:
+                total += self.add_posts(batch, merge=False)
+                batch = []
+        total += self.add_posts(batch, merge=False)
+        self._maybe_merge()
+
+        if total:
+            print(f"🧭 Indexed {total:,} posts for similarity search")
+        return total
+
+    def _maybe_merge(self):
+        """Gộp delta khi nó vượt quá merge_ratio so với vùng đã sắp xếp"""
+        delta = self.meta['count'] - self.meta['n_sorted']
+        if delta > self.merge_ratio * max(self.meta['n_sorted'], 1000):
+            self._merge()
+        else:
+            self._save_meta()
+
+    def _merge(self):
+        """Sắp xếp lại toàn bộ mã băm, đưa phần delta vào vùng đã sắp xếp"""
+        count = self.meta['count']
+        codes = self._codes()[:count]
+        order = np.argsort(codes, axis=0, kind='stable').T.astype(np.uint32)
+        sorted_codes = np.take_along_axis(codes.T, order.astype(np.int64), axis=1)
+
+        for name, data in [('sorted.u32', sorted_codes), ('order.u32', order)]:
+            mm = self._memmap(name, np.uint32, data.shape, mode='w+')
+            mm[:] = data
+            mm.flush()
+
+        self.meta['n_sorted'] = count
+        self._save_meta()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def _row_of(self, post_id):
+        if self._id_to_row is None:
+            ids = self._ids()[:self.meta['count']]
+            self._id_to_row = {raw.decode(): row for row, raw in enumerate(ids)}
+        return self._id_to_row.get(str(post_id))
+
+    def _candidates(self, query_codes, probe_bits=False):
+        n_sorted, count = self.meta['n_sorted'], self.meta['count']
+        sorted_codes = self._memmap('sorted.u32', np.uint32, (self.n_tables, n_sorted), 'r') if n_sorted else None
+        order = self._memmap('order.u32', np.uint32, (self.n_tables, n_sorted), 'r') if n_sorted else None
+        delta_codes = self._codes()[n_sorted:count]
+
+        found = []
+        for table, code in enumerate(query_codes):
+            probes = [code]
+            if probe_bits:
+                probes += [code ^ (1 << bit) for bit in range(self.n_bits)]
+            for probe in probes:
+                if sorted_codes is not None:
+                    lo = np.searchsorted(sorted_codes[table], probe, side='left')
+                    hi = np.searchsorted(sorted_codes[table], probe, side='right')
+                    found.append(np.asarray(order[table, lo:hi], dtype=np.int64))
+                if len(delta_codes):
+                    found.append(np.flatnonzero(delta_codes[:, table] == probe) + n_sorted)
+
+        return np.unique(np.concatenate(found)) if found else np.array([], dtype=np.int64)
+
+    def similar(self, post_id, k=10):
+        """Trả về k posts gần nhất: list of {'post_id', 'score'}"""
+        if self.meta is None or not self.meta['count']:
+            return []
+        row = self._row_of(post_id)
+        if row is None:
+            return []
+
+        vectors = self._vectors()
+        query = np.asarray(vectors[row])
+        query_codes = self._codes()[row]
+
+        candidates = self._candidates(query_codes)
+        if len(candidates) <= k:
+            candidates = self._candidates(query_codes, probe_bits=True)
+        candidates = candidates[candidates != row]
+        if not len(candidates):
+            return []
+
+        scores = np.asarray(vectors[candidates]) @ query
+        top = np.argsort(-scores)[:k]
+        ids = self._ids()
+        return [
+            {'post_id': ObjectId(ids[candidates[i]].decode()), 'score': round(float(scores[i]), 4)}
+            for i in top
+        ]
+
+    def similar_posts(self, post_id, k=10):
+        """Như similar() nhưng kèm nội dung post từ MongoDB"""
+        results = self.similar(post_id, k)
+        if not results:
+            return []
+        posts = {
+            p['_id']: p for p in self.posts_collection.find(
+                {'_id': {'$in': [r['post_id'] for r in results]}},
+                {'title': 1, 'text': 1, 'source': 1, 'platform': 1, 'link': 1, 'url': 1}
+            )
+        }
+        return [dict(posts[r['post_id']], score=r['score']) for r in results if r['post_id'] in posts]
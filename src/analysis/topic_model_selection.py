@@ -0,0 +1,151 @@
+"""Parallel LDA model selection over a cached document-term matrix"""
+import os
+import json
+import time
+import pickle
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.decomposition import LatentDirichletAllocation
+from analysis.advanced_analyzer import build_topic_vectorizer
+
+DEFAULT_CACHE_DIR = os.getenv(
+    'TOPIC_SELECTION_CACHE_DIR',
+    os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'topic_selection')
+)
+
+
+def umass_coherence(dtm, components, top_n=10):
+    """UMass coherence trung bình của các topic (càng gần 0 càng tốt)"""
+    binary = (dtm > 0).astype(np.float64).tocsc()
+    doc_freq = np.asarray(binary.sum(axis=0)).ravel()
+    scores = []
+
+    for topic in components:
+        top = topic.argsort()[-top_n:][::-1]
+        co_occurrence = (binary[:, top].T @ binary[:, top]).toarray()
+        score = 0.0
+        for m in range(1, len(top)):
+            for l in range(m):
+                if doc_freq[top[l]] > 0:
+                    score += np.log((co_occurrence[m, l] + 1) / doc_freq[top[l]])
+        scores.append(score)
+
+    return float(np.mean(scores)) if scores else 0.0
+
+
+def evaluate_config(dtm_path, n_topics, max_iter, fit_path):
+    """Huấn luyện một cấu hình LDA trong process con và lưu model đã fit"""
+    dtm = sparse.load_npz(dtm_path)
+
+    start = time.perf_counter()
+    lda = LatentDirichletAllocation(
+        n_components=n_topics,
+        random_state=42,
+        max_iter=max_iter
+    )
+    lda.fit(dtm)
+    fit_seconds = time.perf_counter() - start
+
+    with open(fit_path, 'wb') as f:
+        pickle.dump(lda, f)
+
+    return {
+        'n_topics': n_topics,
+        'max_iter': max_iter,
+        'perplexity': round(float(lda.perplexity(dtm)), 4),
+        'coherence': round(umass_coherence(dtm, lda.components_), 4),
+        'wall_time': round(fit_seconds, 3)
+    }
+
+
+class TopicModelSelector:
+    def __init__(self, db, cache_dir=DEFAULT_CACHE_DIR, max_workers=None):
+        self.db = db
+        self.posts_collection = db['posts']
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_workers = max_workers
+        self.results_path = os.path.join(self.cache_dir, 'results.json')
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _load_results(self):
+        if not os.path.exists(self.results_path):
+            return {}
+        with open(self.results_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_results(self, results):
+        tmp_path = self.results_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        os.replace(tmp_path, self.results_path)
+
+    def build_dtm(self):
+        """Dựng (hoặc đọc lại từ cache) document-term matrix dùng chung cho mọi cấu hình"""
+        texts = [post.get('text') or '' for post in self.posts_collection.find({}, {'text': 1}).sort('_id', 1)]
+        corpus_hash = hashlib.sha1('\x00'.join(texts).encode('utf-8')).hexdigest()[:16]
+        dtm_path = os.path.join(self.cache_dir, f'dtm_{corpus_hash}.npz')
+
+        if not os.path.exists(dtm_path):
+            print(f"🧮 Building document-term matrix for {len(texts):,} posts...")
+            vectorizer = build_topic_vectorizer()
+            dtm = vectorizer.fit_transform(texts)
+            sparse.save_npz(dtm_path, dtm.tocsr())
+            with open(os.path.join(self.cache_dir, f'vectorizer_{corpus_hash}.pkl'), 'wb') as f:
+                pickle.dump(vectorizer, f)
+        else:
+            print(f"🧮 Using cached document-term matrix ({corpus_hash})")
+
+        return corpus_hash, dtm_path
+
+    def evaluate(self, topic_grid=(3, 5, 8, 10, 15), iter_grid=(10, 20), refresh=False):
+        """Đánh giá lưới cấu hình song song; cấu hình đã fit được đọc từ cache"""
+        corpus_hash, dtm_path = self.build_dtm()
+        results = self._load_results()
+        rows = []
+        pending = []
+
+        for n_topics, max_iter in product(topic_grid, iter_grid):
+            key = f"{corpus_hash}:{n_topics}:{max_iter}"
+            fit_path = os.path.join(self.cache_dir, f'lda_{corpus_hash}_{n_topics}_{max_iter}.pkl')
+            if not refresh and key in results and os.path.exists(fit_path):
+                rows.append(dict(results[key], cached=True))
+            else:
+                pending.append((key, n_topics, max_iter, fit_path))
+
+        if pending:
+            print(f"🚀 Fitting {len(pending)} LDA configurations in parallel...")
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    executor.submit(evaluate_config, dtm_path, n_topics, max_iter, fit_path): key
+                    for key, n_topics, max_iter, fit_path in pending
+                }
+                for future in as_completed(futures):
+                    key = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"❌ Config {key} failed: {e}")
+                        continue
+                    results[key] = result
+                    self._save_results(results)
+                    rows.append(dict(result, cached=False))
+                    print(f"   ✓ n_topics={result['n_topics']}, max_iter={result['max_iter']} "
+                          f"({result['wall_time']:.2f}s)")
+
+        df = pd.DataFrame(rows)
+        if not df.empty:
+            df = df.sort_values(['coherence', 'perplexity'], ascending=[False, True]).reset_index(drop=True)
+        return df
+
+    def load_fit(self, n_topics, max_iter):
+        """Đọc model LDA đã fit cho một cấu hình trên corpus hiện tại"""
+        corpus_hash, _ = self.build_dtm()
+        fit_path = os.path.join(self.cache_dir, f'lda_{corpus_hash}_{n_topics}_{max_iter}.pkl')
+        if not os.path.exists(fit_path):
+            return None
+        with open(fit_path, 'rb') as f:
+            return pickle.load(f)
@@ -5,12 +5,14 @@ from datetime import datetime, timedelta
 import re
 
 class TrendAnalyzer:
-    def __init__(self, db):
+    def __init__(self, db, count_clusters=False):
         self.db = db
         self.posts_collection = db['posts']
         self.trends_collection = db['trends']
+        # count_clusters=True: mỗi cụm bài gần trùng lặp chỉ tính một lần
+        self.posts_filter = {'is_canonical': {'$ne': False}} if count_clusters else {}
         try:
-            posts_data = list(self.posts_collection.find())
+            posts_data = list(self.posts_collection.find(self.posts_filter))
             self.df = pd.DataFrame(posts_data)
             
             # Ensure date columns are properly formatted
@@ -94,6 +96,7 @@ class TrendAnalyzer:
     def analyze_by_topic(self):
         """Phân tích cảm xúc theo từng chủ đề"""
         pipeline = [
+            {'$match': self.posts_filter},
             {
                 '$group': {
                     '_id': '$topic',
@@ -7,6 +7,7 @@ from config.database import DatabaseConfig
 from analysis.sentiment_analyzer import SentimentAnalyzer
 from analysis.trend_analyzer import TrendAnalyzer
 from analysis.advanced_analyzer import AdvancedAnalyzer
+from analysis.duplicate_detector import DuplicateDetector
 from utils.report_exporter import ReportExporter
 
 def main():
@@ -26,6 +27,12 @@ def main():
     sentiment_analyzer = SentimentAnalyzer(db)
     sentiment_analyzer.analyze_all_posts()
     
+    # Near-duplicate clustering
+    duplicate_detector = DuplicateDetector(db)
+    duplicate_detector.cluster_posts()
+    cluster_stats = duplicate_detector.get_cluster_stats()
+    print(f"🧬 {cluster_stats['total_posts']:,} posts -> {cluster_stats['total_clusters']:,} unique stories")
+    
     # Trend Analysis
     trend_analyzer = TrendAnalyzer(db)
     topic_analysis = trend_analyzer.analyze_by_topic()
@@ -37,6 +44,13 @@ def main():
     advanced_analyzer = AdvancedAnalyzer(db)
     advanced_analyzer.generate_advanced_report()
     
+    # Per-post topic labels
+    advanced_analyzer.assign_topics(n_topics=5)
+    topic_stats = advanced_analyzer.topic_stats()
+    if not topic_stats.empty:
+        print("\n📚 Posts by Learned Topic:")
+        print(topic_stats.to_string())
+    
     # Export Results
     print("\n📤 Export Phase")
     exporter = ReportExporter(db)
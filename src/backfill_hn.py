@@ -0,0 +1,36 @@
+"""Command line tool for backfilling Hacker News history for a set of queries"""
+import sys
+import os
+import argparse
+from datetime import datetime
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from config.database import DatabaseConfig
+from data_collection.hackernews_crawler import HackerNewsCrawler
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill Hacker News stories via Algolia date slices')
+    parser.add_argument('queries', nargs='+', help='Search queries to backfill')
+    parser.add_argument('--since', required=True, type=lambda d: datetime.strptime(d, '%Y-%m-%d'),
+                        help='Start date (YYYY-MM-DD)')
+    parser.add_argument('--until', type=lambda d: datetime.strptime(d, '%Y-%m-%d'), default=None,
+                        help='End date (YYYY-MM-DD), defaults to now')
+    parser.add_argument('--slice-days', type=int, default=30, help='Initial slice width in days')
+    parser.add_argument('--workers', '-w', type=int, default=4, help='Slices fetched concurrently')
+
+    args = parser.parse_args()
+
+    # Connect to database
+    db_config = DatabaseConfig()
+    db = db_config.connect()
+
+    if db is None:
+        print("❌ Failed to connect to database")
+        return
+
+    crawler = HackerNewsCrawler(db)
+    for query in args.queries:
+        crawler.backfill(query, args.since, args.until, slice_days=args.slice_days, max_workers=args.workers)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""Command line benchmarks for crawler hot paths on a corpus of saved pages"""
+import sys
+import os
+import json
+import time
+import hashlib
+import argparse
+import re
+from collections import Counter
+from urllib.parse import urlparse
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+DEFAULT_CORPUS = os.path.join('data', 'page_corpus')
+DEFAULT_FEEDS = os.path.join('data', 'feed_samples')
+
+
+# Chuỗi selector cũ của parse_generic, giữ lại làm mốc so sánh cho content_extractor
+SELECTOR_CHAIN = ('main', 'article', '[role="main"]', '.content', '.post-content', '.entry-content',
+                  '.article-content', '.story-body', '.post-body', '#content', '#main-content')
+SELECTOR_NOISE_TAGS = ['script', 'style', 'nav', 'footer', 'header', 'aside', 'noscript']
+
+
+def load_corpus(corpus_dir, raw=False):
+    """Danh sách (url, html) từ corpus đã lưu bằng --fetch (raw=True: nội dung dạng bytes)"""
+    index_path = os.path.join(corpus_dir, 'index.json')
+    if not os.path.exists(index_path):
+        print(f"❌ No corpus found in {corpus_dir} (run with --fetch urls.txt first)")
+        return []
+    with open(index_path, encoding='utf-8') as f:
+        index = json.load(f)
+    pages = []
+    for filename, url in index.items():
+        path = os.path.join(corpus_dir, filename)
+        if raw:
+            with open(path, 'rb') as f:
+                pages.append((url, f.read()))
+        else:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                pages.append((url, f.read()))
+    return pages
+
+
+def load_gold(corpus_dir):
+    """Text chuẩn do người chọn ({url: text}) từ các file <tên trang>.gold.txt trong corpus"""
+    index_path = os.path.join(corpus_dir, 'index.json')
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path, encoding='utf-8') as f:
+        index = json.load(f)
+    gold = {}
+    for filename, url in index.items():
+        gold_path = os.path.join(corpus_dir, os.path.splitext(filename)[0] + '.gold.txt')
+        if os.path.exists(gold_path):
+            with open(gold_path, encoding='utf-8') as f:
+                gold[url] = f.read()
+    return gold
+
+
+def fetch_corpus(url_file, corpus_dir, raw=False):
+    """Tải các URL trong file về corpus_dir để benchmark lặp lại được (raw=True: lưu nguyên bytes, cho feed)"""
+    from data_collection.http_client import get_http_client
+
+    os.makedirs(corpus_dir, exist_ok=True)
+    index_path = os.path.join(corpus_dir, 'index.json')
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path, encoding='utf-8') as f:
+            index = json.load(f)
+
+    http = get_http_client()
+    with open(url_file, encoding='utf-8') as f:
+        urls = [line.strip() for line in f if line.strip()]
+    for url in urls:
+        filename = f"{hashlib.md5(url.encode()).hexdigest()}{'.xml' if raw else '.html'}"
+        try:
+            response = http.get(url)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"  ❌ {url}: {e}")
+            continue
+        if raw:
+            with open(os.path.join(corpus_dir, filename), 'wb') as f:
+                f.write(response.content)
+        else:
+            with open(os.path.join(corpus_dir, filename), 'w', encoding='utf-8') as f:
+                f.write(response.text)
+        index[filename] = url
+        print(f"  ✅ {url} ({len(response.content):,} bytes)")
+
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+
+
+def time_per_page(func, pages, repeat):
+    """Thời gian trung bình (ms) mỗi trang, lấy lần chạy nhanh nhất trong `repeat` lần"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for url, html in pages:
+            func(url, html)
+        best = min(best, time.perf_counter() - start)
+    return best / len(pages) * 1000
+
+
+def token_f1(predicted, expected):
+    """F1 trên multiset token (cách chấm thường dùng cho content extraction)"""
+    predicted = Counter(re.findall(r'\w+', predicted.lower()))
+    expected = Counter(re.findall(r'\w+', expected.lower()))
+    overlap = sum((predicted & expected).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(predicted.values())
+    recall = overlap / sum(expected.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def bench_parse(args):
+    from data_collection.page_parser import parse_page, identify_platform
+
+    pages = load_corpus(args.corpus)
+    if not pages:
+        return
+    repeat = args.repeat
+    print(f"\n⏱️  URLCrawler page parsing ({len(pages)} pages, best of {repeat})")
+    for parser in ('html.parser', 'lxml'):
+        try:
+            ms = time_per_page(
+                lambda url, html: parse_page(html, url, identify_platform(urlparse(url).netloc.lower()), parser=parser),
+                pages, repeat
+            )
+        except Exception as e:
+            print(f"  {parser:12s} unavailable: {e}")
+            continue
+        print(f"  {parser:12s} {ms:8.2f} ms/page  {1000 / ms:8.1f} pages/s")
+
+
+def selector_chain_text(html):
+    """
+    Cách trích xuất cũ: bỏ noise tag, thử lần lượt selector, rồi <p>, rồi cả trang.
+    Giữ đúng chuỗi soup.select_one từng selector của code cũ (không dùng select_first).
+    """
+    from bs4 import BeautifulSoup
+    from data_collection.page_parser import DEFAULT_PARSER
+
+    soup = BeautifulSoup(html, DEFAULT_PARSER)
+    for element in soup(SELECTOR_NOISE_TAGS):
+        element.decompose()
+    text = ''
+    for selector in SELECTOR_CHAIN:
+        main_content = soup.select_one(selector)
+        if main_content:
+            text = main_content.get_text(separator=' ', strip=True)
+            break
+    if len(text) < 50:
+        text = ' '.join(p for p in (p.get_text(strip=True) for p in soup.find_all('p')) if p)
+    if len(text) < 20:
+        text = soup.get_text(separator=' ', strip=True)
+    return text[:3000]
+
+
+def density_text(html):
+    from bs4 import BeautifulSoup
+    from data_collection.page_parser import DEFAULT_PARSER
+    from data_collection.content_extractor import extract_main_content
+
+    return extract_main_content(BeautifulSoup(html, DEFAULT_PARSER))[:3000]
+
+
+def bench_extract(args):
+    """Tốc độ và độ chính xác (token F1 so với .gold.txt nếu có) của hai cách trích nội dung chính"""
+    pages = load_corpus(args.corpus)
+    if not pages:
+        return
+    gold = load_gold(args.corpus)
+    methods = {'selectors': selector_chain_text, 'density': density_text}
+    outputs = {name: {url: func(html) for url, html in pages} for name, func in methods.items()}
+
+    print(f"\n⏱️  Main-content extraction ({len(pages)} pages, {len(gold)} with gold text, "
+          f"best of {args.repeat})")
+    for name, func in methods.items():
+        ms = time_per_page(lambda url, html: func(html), pages, args.repeat)
+        lengths = [len(text) for text in outputs[name].values()]
+        line = f"  {name:12s} {ms:8.2f} ms/page  avg {sum(lengths) / len(lengths):7.0f} chars"
+        if gold:
+            scores = [token_f1(outputs[name][url], gold[url]) for url in gold if url in outputs[name]]
+            if scores:
+                line += f"  F1 {sum(scores) / len(scores):.3f}"
+        print(line)
+
+    agreement = [token_f1(outputs['density'][url], outputs['selectors'][url]) for url, _ in pages]
+    print(f"  agreement between methods (token F1): {sum(agreement) / len(agreement):.3f}")
+
+
+def _entry_key(entry):
+    return (entry.get('id') or entry.get('link'), entry.get('title', ''),
+            tuple(entry['published_parsed'][:6]) if entry.get('published_parsed') else None)
+
+
+def bench_feeds(args):
+    """fast_parse so với feedparser trên feed đã lưu: tốc độ, kết quả khớp, và khi dừng sớm"""
+    import feedparser
+    from data_collection.feed_parser import fast_parse
+
+    feeds = load_corpus(args.feeds, raw=True)
+    if not feeds:
+        return
+    total_bytes = sum(len(content) for _, content in feeds)
+    print(f"\n⏱️  Feed parsing ({len(feeds)} feeds, {total_bytes / 1024:,.0f} KB, best of {args.repeat})")
+
+    mismatched = 0
+    for url, content in feeds:
+        expected = [_entry_key(entry) for entry in feedparser.parse(content).entries]
+        try:
+            actual = [_entry_key(entry) for entry in fast_parse(content).entries]
+        except Exception as e:
+            print(f"  ⚠️  {url}: fast parser failed ({e}), would fall back to feedparser")
+            mismatched += 1
+            continue
+        if actual != expected:
+            mismatched += 1
+            print(f"  ⚠️  {url}: {len(actual)} entries vs {len(expected)} from feedparser")
+
+    for name, func in (('feedparser', lambda url, content: feedparser.parse(content)),
+                       ('fast', lambda url, content: fast_parse(content)),
+                       ('fast max=10', lambda url, content: fast_parse(content, max_results=10))):
+        ms = time_per_page(func, feeds, args.repeat)
+        print(f"  {name:12s} {ms:8.2f} ms/feed  {1000 / ms:8.1f} feeds/s")
+    print(f"  entries identical (id, title, published) on {len(feeds) - mismatched}/{len(feeds)} feeds")
+
+
+def load_summaries(args):
+    """Summary HTML của các entry trong feed đã lưu, lặp lại cho đủ args.count"""
+    from data_collection.feed_parser import parse_feed
+
+    summaries = [entry.get('summary', '')
+                 for _, content in load_corpus(args.feeds, raw=True)
+                 for entry in parse_feed(content).entries if entry.get('summary')]
+    if not summaries:
+        return []
+    return [summaries[i % len(summaries)] for i in range(args.count)]
+
+
+def bench_html_text(args):
+    """BeautifulSoup.get_text so với html_to_text (không dựng cây) trên summary của feed"""
+    from bs4 import BeautifulSoup
+    from utils.html_text import html_to_text
+
+    summaries = load_summaries(args)
+    if not summaries:
+        return
+    items = [(None, summary) for summary in summaries]
+    total_kb = sum(len(summary) for summary in summaries) / 1024
+    print(f"\n⏱️  Summary HTML -> text ({len(items):,} summaries, {total_kb:,.0f} KB, best of {args.repeat})")
+    for name, func in (
+        ('bs4 html.parser', lambda _, summary: BeautifulSoup(summary, 'html.parser').get_text(separator=' ', strip=True)[:2000]),
+        ('html_to_text', lambda _, summary: html_to_text(summary)),
+        ('limit=2000', lambda _, summary: html_to_text(summary, limit=2000))
+    ):
+        ms = time_per_page(func, items, args.repeat)
+        print(f"  {name:16s} {ms * 1000:8.1f} µs/summary  {ms * len(items) / 1000:7.2f} s total")
+
+
+BENCHMARKS = {
+    'parse': bench_parse,
+    'extract': bench_extract,
+    'feeds': bench_feeds,
+    'html_text': bench_html_text
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark crawler parsing on saved pages and feeds')
+    parser.add_argument('benchmarks', nargs='*', default=list(BENCHMARKS), choices=list(BENCHMARKS),
+                        help='Benchmarks to run (default: all)')
+    parser.add_argument('--corpus', '-c', default=DEFAULT_CORPUS, help='Directory of saved pages')
+    parser.add_argument('--fetch', help='Download URLs from this file into the corpus first')
+    parser.add_argument('--feeds', default=DEFAULT_FEEDS, help='Directory of saved RSS/Atom feeds')
+    parser.add_argument('--fetch-feeds', help='Download feed URLs from this file into the feed directory first')
+    parser.add_argument('--repeat', '-r', type=int, default=3, help='Repetitions per benchmark')
+    parser.add_argument('--count', type=int, default=10000, help='Number of feed summaries for html_text')
+
+    args = parser.parse_args()
+
+    if args.fetch:
+        fetch_corpus(args.fetch, args.corpus)
+    if args.fetch_feeds:
+        fetch_corpus(args.fetch_feeds, args.feeds, raw=True)
+
+    for name in args.benchmarks:
+        BENCHMARKS[name](args)
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,12 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 from config.database import DatabaseConfig
-from data_collection.google_news_crawler import GoogleNewsCrawler
-from data_collection.reddit_crawler import RedditCrawler
-from data_collection.medium_crawler import MediumCrawler
-from data_collection.stackoverflow_crawler import StackOverflowCrawler
-from data_collection.hackernews_crawler import HackerNewsCrawler
+from data_collection.registry import create_crawlers
+from data_collection.http_client import get_http_client
+from data_collection.feed_fetcher import FeedFetcher
+from data_collection.seen_items import SeenItems
+from data_collection.orchestrator import CollectionOrchestrator
+from analysis.similarity_index import SimilarityIndex
 
 def main():
     print("\n" + "="*80)
@@ -36,98 +37,88 @@ def main():
     
     print("\n📊 DATA COLLECTION PHASE\n")
     
-    # 1. Google News Collection
-    print("\n" + "="*80)
-    print("📰 GOOGLE NEWS COLLECTION")
-    print("="*80)
-    google_crawler = GoogleNewsCrawler(db)
-    
-    # Search for AI education topics
-    google_crawler.collect_topics(ai_education_topics, max_results_per_query=30)
-    
-    # Get TECHNOLOGY topic news
-    tech_articles = google_crawler.get_topic_news('TECHNOLOGY', max_results=50)
-    google_crawler.save_to_mongodb(tech_articles)
-    
-    # Get SCIENCE topic news
-    science_articles = google_crawler.get_topic_news('SCIENCE', max_results=30)
-    google_crawler.save_to_mongodb(science_articles)
-    
-    # 2. Medium Collection
-    print("\n" + "="*80)
-    print("📝 MEDIUM COLLECTION")
-    print("="*80)
-    medium_crawler = MediumCrawler(db)
-    
-    medium_tags = [
-        "artificial-intelligence",
-        "machine-learning",
-        "education-technology",
-        "ai-education",
-        "edtech"
-    ]
-    medium_crawler.collect_topics(medium_tags, max_results_per_tag=30)
-    
-    # 3. Stack Overflow Collection
-    print("\n" + "="*80)
-    print("💻 STACK OVERFLOW COLLECTION")
-    print("="*80)
-    stackoverflow_crawler = StackOverflowCrawler(db)
-    
-    stackoverflow_tags = [
-        "machine-learning",
-        "artificial-intelligence",
-        "deep-learning",
-        "nlp",
-        "tensorflow",
-        "pytorch"
-    ]
-    stackoverflow_crawler.collect_topics(stackoverflow_tags, max_results_per_tag=50)
-    
-    # 4. Hacker News Collection
-    print("\n" + "="*80)
-    print("🚀 HACKER NEWS COLLECTION")
-    print("="*80)
-    hackernews_crawler = HackerNewsCrawler(db)
-    
-    hn_queries = [
-        "AI education",
-        "machine learning education",
-        "EdTech",
-        "online learning",
-        "educational technology"
-    ]
-    hackernews_crawler.collect_topics(hn_queries, max_results_per_query=30)
-    
-    # Get top stories
-    top_stories = hackernews_crawler.get_top_stories(max_results=50)
-    hackernews_crawler.save_to_mongodb(top_stories)
-    
-    # 5. Reddit Collection
-    print("\n" + "="*80)
-    print("🔴 REDDIT COLLECTION")
-    print("="*80)
-    reddit_crawler = RedditCrawler(
-        db=db,
-        client_id=os.getenv('REDDIT_CLIENT_ID', 'k6ozqL3mwwC0cGNUSmcdlQ'),
-        client_secret=os.getenv('REDDIT_CLIENT_SECRET', 'JR6XLrrWpp2oNi5RNk0uV2GrrCaelw'),
-        user_agent=os.getenv('REDDIT_USER_AGENT', 'windows:ai-trend-collector:v2.0')
-    )
-    
-    reddit_topics = [
-        "AI education",
-        "artificial intelligence learning",
-        "EdTech",
-        "machine learning",
-        "online education"
-    ]
-    reddit_crawler.collect_topics(reddit_topics, limit_per_topic=50)
+    # Shared conditional-GET state for all RSS sources
+    feed_fetcher = FeedFetcher(db)
+    # Item đã gặp ở query trước được bỏ qua trước khi dựng document
+    seen = SeenItems()
+    
+    # Mọi nguồn đã đăng ký trong registry, dùng chung feed_fetcher và seen filter
+    crawlers = create_crawlers(db, feed_fetcher=feed_fetcher, seen=seen)
+    
+    # Các nguồn và query chạy song song, giới hạn theo từng nguồn
+    orchestrator = CollectionOrchestrator()
+    
+    # Query và số kết quả mỗi query của từng nguồn
+    collection_plan = {
+        'google_news': (ai_education_topics, 30),
+        'medium': ([
+            "artificial-intelligence",
+            "machine-learning",
+            "education-technology",
+            "ai-education",
+            "edtech"
+        ], 30),
+        'stackoverflow': ([
+            "machine-learning",
+            "artificial-intelligence",
+            "deep-learning",
+            "nlp",
+            "tensorflow",
+            "pytorch"
+        ], 50),
+        'hackernews': ([
+            "AI education",
+            "machine learning education",
+            "EdTech",
+            "online learning",
+            "educational technology"
+        ], 30),
+        'reddit': ([
+            "AI education",
+            "artificial intelligence learning",
+            "EdTech",
+            "machine learning",
+            "online education"
+        ], 50)
+    }
+    for source, crawler in crawlers.items():
+        queries, max_results = collection_plan.get(
+            source, (crawler.default_queries, crawler.default_max_results))
+        for query in queries:
+            orchestrator.add_crawler(crawler, query, max_results=max_results)
+    
+    # Job riêng của từng nguồn: Google News TECHNOLOGY / SCIENCE topic news, HN top stories
+    if 'google_news' in crawlers:
+        google_crawler = crawlers['google_news']
+        orchestrator.add('google_news', 'TECHNOLOGY', google_crawler.get_topic_news,
+                         google_crawler.save_to_mongodb, 'TECHNOLOGY', max_results=50)
+        orchestrator.add('google_news', 'SCIENCE', google_crawler.get_topic_news,
+                         google_crawler.save_to_mongodb, 'SCIENCE', max_results=30)
+    if 'hackernews' in crawlers:
+        hackernews_crawler = crawlers['hackernews']
+        orchestrator.add('hackernews', 'top_stories', hackernews_crawler.get_top_stories,
+                         hackernews_crawler.save_to_mongodb, max_results=50)
+    
+    orchestrator.run()
+    
+    # Cập nhật score của câu hỏi Stack Overflow đã lưu (100 id mỗi request)
+    if 'stackoverflow' in crawlers:
+        crawlers['stackoverflow'].refresh_scores(limit=1000)
     
     # Summary
     print("\n" + "="*80)
     print("✅ DATA COLLECTION COMPLETED")
     print("="*80)
     
+    # Index new posts for similarity search
+    SimilarityIndex(db).update()
+    
+    orchestrator.print_report()
+    feed_fetcher.print_report()
+    seen.save()
+    seen.print_report()
+    get_http_client().print_stats()
+    
     total_posts = db['posts'].count_documents({})
     print(f"\n📊 Total posts in database: {total_posts:,}")
     
@@ -1,10 +1,28 @@
 """Database configuration and connection"""
 import os
 from pymongo import MongoClient
+from pymongo.errors import OperationFailure
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Khóa định danh theo nguồn; unique index thay cho find_one dedupe khi crawl
+UNIQUE_POST_KEYS = ('article_id', 'story_id', 'question_id', 'post_id')
+
+
+def create_unique_post_index(posts_collection, field):
+    """Unique index chỉ áp dụng cho post có field; False nếu dữ liệu hiện có còn bản trùng"""
+    try:
+        posts_collection.create_index(
+            [(field, 1)],
+            unique=True,
+            partialFilterExpression={field: {'$exists': True}}
+        )
+        return True
+    except OperationFailure:
+        return False
+
+
 class DatabaseConfig:
     def __init__(self):
         self.MONGO_URI = os.getenv('MONGO_URI')
@@ -24,10 +42,27 @@ class DatabaseConfig:
             posts_collection.create_index([("created_at", -1)])
             posts_collection.create_index([("hashtags", 1)])
             posts_collection.create_index([("topic", 1)])
+            posts_collection.create_index([("lsh_bands", 1)])
+            posts_collection.create_index([("dup_cluster", 1)])
+            posts_collection.create_index([("lda_topic", 1)])
+            posts_collection.create_index([("sentiment", 1), ("platform", 1), ("likes", 1)])
+            for field in UNIQUE_POST_KEYS:
+                if not create_unique_post_index(posts_collection, field):
+                    # Không tự xóa dữ liệu khi kết nối: người dùng chạy migration riêng
+                    print(f"⚠️  Unique index on posts.{field} not created: duplicate posts exist. "
+                          f"Run 'python dedupe_posts.py' (or '--dry-run' first) to remove them.")
+            # Mỗi URL chuẩn hóa chỉ có một bản ghi cache (bản ghi cũ chưa có hash được bỏ qua)
+            db['url_cache'].create_index(
+                [("canonical_hash", 1)],
+                unique=True,
+                partialFilterExpression={'canonical_hash': {'$exists': True}}
+            )
+            # Bản ghi cũ chưa có canonical_hash vẫn được tra theo url_hash
+            db['url_cache'].create_index([("url_hash", 1)])
             
             print("MongoDB connected successfully!")
             return db
             
         except Exception as e:
             print(f"MongoDB connection failed: {e}")
-            return None
\ No newline at end of file
+            return None
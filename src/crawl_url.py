@@ -14,6 +14,10 @@ def main():
     parser.add_argument('--file', '-f', help='File containing URLs (one per line)')
     parser.add_argument('--topic', '-t', help='Topic/category for the content')
     parser.add_argument('--analyze', '-a', action='store_true', help='Run sentiment analysis after crawling')
+    parser.add_argument('--workers', '-w', type=int, default=16, help='Concurrent downloads when using --file')
+    parser.add_argument('--per-domain', type=int, default=2, help='Max concurrent requests per domain')
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help='Processes for HTML parsing (0 = parse in download threads)')
     
     args = parser.parse_args()
     
@@ -22,6 +26,7 @@ def main():
         print("\nExamples:")
         print("  python src/crawl_url.py https://twitter.com/...")
         print("  python src/crawl_url.py --file urls.txt --topic 'AI Education'")
+        print("  python src/crawl_url.py --file urls.txt --workers 32 --per-domain 4")
         print("  python src/crawl_url.py https://reddit.com/... --analyze")
         return
     
@@ -39,7 +44,12 @@ def main():
     # Crawl
     if args.file:
         print(f" Reading URLs from file: {args.file}")
-        results = crawler.crawl_from_file(args.file, args.topic)
+        results = crawler.crawl_from_file(
+            args.file, args.topic,
+            max_workers=args.workers,
+            per_domain=args.per_domain,
+            parse_workers=args.parse_workers
+        )
     else:
         print(f" Crawling URL: {args.url}")
         post_id = crawler.crawl_url(args.url, args.topic)
@@ -1,6 +1,5 @@
 # src/dashboard/dash_app.py - PHIÊN BẢN NÂNG CẤP
 """Dash dashboard for social media analysis - Enhanced Version"""
-import os
 import dash
 from dash import dcc, html, Input, Output, State, dash_table, callback_context
 import dash_bootstrap_components as dbc
@@ -9,6 +8,17 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 from datetime import datetime
+from bson import ObjectId
+from data_collection.registry import load_crawlers, create_crawler
+
+# Nút thu thập nhanh -> nguồn trong registry
+QUICK_COLLECT_BUTTONS = {
+    'quick-google-btn': 'google_news',
+    'quick-reddit-btn': 'reddit',
+    'quick-medium-btn': 'medium',
+    'quick-stackoverflow-btn': 'stackoverflow',
+    'quick-hackernews-btn': 'hackernews'
+}
 
 class DashboardApp:
     def __init__(self, db):
@@ -16,6 +26,7 @@ class DashboardApp:
         self.posts_collection = db['posts']
         self.trends_collection = db['trends']
         self.url_cache_collection = db.get_collection('url_cache')
+        self.similarity_index = None
         self.app = dash.Dash(
             __name__, 
             external_stylesheets=[
@@ -277,6 +288,25 @@ class DashboardApp:
                 ])
             ], className="mb-4"),
             
+            # Similar Posts Search
+            dbc.Row([
+                dbc.Col([
+                    dbc.Card([
+                        dbc.CardHeader([
+                            html.I(className="fas fa-project-diagram me-2"),
+                            "Tìm bài viết tương tự"
+                        ], style={'backgroundColor': '#2c3e50', 'color': 'white', 'fontWeight': 'bold'}),
+                        dbc.CardBody([
+                            dbc.InputGroup([
+                                dbc.Input(id='similar-post-id-input', type='text', placeholder='Post ID'),
+                                dbc.Button("Tìm", id='similar-search-btn', color='primary')
+                            ], className='mb-3'),
+                            dcc.Loading(children=html.Div(id='similar-posts-results'))
+                        ])
+                    ], style={'boxShadow': '0 4px 6px rgba(0,0,0,0.1)'})
+                ])
+            ], className="mb-4"),
+            
         ], fluid=True)
     
     def create_auto_crawler_tab(self):
@@ -389,13 +419,10 @@ class DashboardApp:
                                     dcc.Dropdown(
                                         id='source-dropdown',
                                         options=[
-                                            {'label': '📰 Google News', 'value': 'google'},
-                                            {'label': '🔴 Reddit', 'value': 'reddit'},
-                                            {'label': '📝 Medium', 'value': 'medium'},
-                                            {'label': '💻 Stack Overflow', 'value': 'stackoverflow'},
-                                            {'label': '🚀 Hacker News', 'value': 'hackernews'}
+                                            {'label': f"{cls.icon} {cls.display_name}", 'value': source}
+                                            for source, cls in load_crawlers().items()
                                         ],
-                                        value='google',
+                                        value='google_news',
                                         className='mb-3'
                                     )
                                 ], width=6),
@@ -1069,6 +1096,7 @@ class DashboardApp:
                     likes = row.get('likes', 0)
                     
                     table_data.append({
+                        'id': str(row.get('_id', '')),
                         'date': date_str,
                         'text': display_text,
                         'raw_text': raw_text,  # Keep original for debugging
@@ -1104,7 +1132,7 @@ class DashboardApp:
                             html.Td(
                                 html.Div([
                                     html.P(display_text, style={'margin': '0', 'fontSize': '13px', 'lineHeight': '1.4'}),
-                                    html.Small(f"Length: {len(post.get('raw_text', post['text']))} chars", style={'color': '#6c757d', 'fontSize': '11px'})
+                                    html.Small(f"Length: {len(post.get('raw_text', post['text']))} chars · ID: {post['id']}", style={'color': '#6c757d', 'fontSize': '11px'})
                                 ]),
                                 style={'maxWidth': '400px', 'wordWrap': 'break-word'}
                             ),
@@ -1154,6 +1182,38 @@ class DashboardApp:
                 print(f"Error creating posts table: {e}")
                 return dbc.Alert(f"Error loading posts: {str(e)}", color="danger")
         
+        # Similar posts search
+        @self.app.callback(
+            Output('similar-posts-results', 'children'),
+            Input('similar-search-btn', 'n_clicks'),
+            State('similar-post-id-input', 'value'),
+            prevent_initial_call=True
+        )
+        def search_similar_posts(n_clicks, post_id):
+            if not post_id or not ObjectId.is_valid(post_id.strip()):
+                return dbc.Alert("⚠ Please enter a valid post ID", color="warning")
+            
+            try:
+                if self.similarity_index is None:
+                    from analysis.similarity_index import SimilarityIndex
+                    self.similarity_index = SimilarityIndex(self.db)
+                # collect_data / analyze_data có thể đã ghi lại index kể từ lần tìm trước
+                self.similarity_index.reload_if_changed()
+                
+                similar = self.similarity_index.similar_posts(ObjectId(post_id.strip()), k=10)
+                if not similar:
+                    return dbc.Alert("No similar posts found (post may not be indexed yet)", color="info")
+                
+                return dbc.ListGroup([
+                    dbc.ListGroupItem([
+                        dbc.Badge(f"{p['score']:.2f}", color='primary', className='me-2'),
+                        html.Strong(p.get('title') or str(p.get('text', ''))[:80]),
+                        html.Small(f"  ({p.get('source', 'unknown')})", className='text-muted')
+                    ]) for p in similar
+                ])
+            except Exception as e:
+                return dbc.Alert(f"❌ Error: {str(e)}", color="danger")
+        
         # URL Crawler callbacks (giữ nguyên như cũ)
         @self.app.callback(
             Output('crawl-status', 'children'),
@@ -1238,7 +1298,8 @@ class DashboardApp:
                 from analysis.sentiment_analyzer import SentimentAnalyzer
                 
                 crawler = URLCrawler(self.db)
-                results = crawler.crawl_multiple_urls(urls, topic)
+                # Process pool không fork từ process Dash đa luồng đang giữ MongoClient
+                results = crawler.crawl_multiple_urls(urls, topic, parse_workers=0)
                 
                 analyzer = SentimentAnalyzer(self.db)
                 analyzer.analyze_all_posts()
@@ -1343,18 +1404,9 @@ class DashboardApp:
             button_id = ctx.triggered[0]['prop_id'].split('.')[0]
             
             try:
-                if button_id == 'quick-google-btn':
-                    return self._collect_google_news()
-                elif button_id == 'quick-reddit-btn':
-                    return self._collect_reddit()
-                elif button_id == 'quick-medium-btn':
-                    return self._collect_medium()
-                elif button_id == 'quick-stackoverflow-btn':
-                    return self._collect_stackoverflow()
-                elif button_id == 'quick-hackernews-btn':
-                    return self._collect_hackernews()
-                elif button_id == 'quick-all-btn':
+                if button_id == 'quick-all-btn':
                     return self._collect_all_sources()
+                return self._collect_source(QUICK_COLLECT_BUTTONS[button_id])
             except Exception as e:
                 return dbc.Alert(f"❌ Error: {str(e)}", color="danger")
         
@@ -1463,157 +1515,55 @@ class DashboardApp:
             except Exception as e:
                 return html.P(f"Error: {str(e)}", className="text-danger"), "0"
     
-    def _collect_google_news(self):
-        """Collect from Google News"""
-        try:
-            from data_collection.google_news_crawler import GoogleNewsCrawler
-            from analysis.sentiment_analyzer import SentimentAnalyzer
-            
-            crawler = GoogleNewsCrawler(self.db)
-            initial_count = self.posts_collection.count_documents({})
-            
-            crawler.collect_topics(["AI education", "artificial intelligence education"], max_results_per_query=15)
-            
-            final_count = self.posts_collection.count_documents({})
-            new_posts = final_count - initial_count
-            
-            # Analyze sentiment for new posts
-            analyzer = SentimentAnalyzer(self.db)
-            analyzer.analyze_all_posts()
-            
-            return dbc.Alert([
-                html.H5("✅ Google News Collection Complete!", className="alert-heading"),
-                html.P(f"Collected {new_posts} new posts")
-            ], color="success", dismissable=True)
-        except Exception as e:
-            return dbc.Alert(f"❌ Google News Error: {str(e)}", color="danger")
-    
-    def _collect_reddit(self):
-        """Collect from Reddit"""
-        try:
-            from data_collection.reddit_crawler import RedditCrawler
-            from analysis.sentiment_analyzer import SentimentAnalyzer
-            
-            crawler = RedditCrawler(
-                db=self.db,
-                client_id=os.getenv('REDDIT_CLIENT_ID', 'k6ozqL3mwwC0cGNUSmcdlQ'),
-                client_secret=os.getenv('REDDIT_CLIENT_SECRET', 'JR6XLrrWpp2oNi5RNk0uV2GrrCaelw'),
-                user_agent=os.getenv('REDDIT_USER_AGENT', 'windows:ai-trend-collector:v2.0')
-            )
-            initial_count = self.posts_collection.count_documents({})
-            
-            crawler.collect_topics(['AI education', 'EdTech'], limit_per_topic=15)
-            
-            final_count = self.posts_collection.count_documents({})
-            new_posts = final_count - initial_count
-            
-            analyzer = SentimentAnalyzer(self.db)
-            analyzer.analyze_all_posts()
-            
-            return dbc.Alert([
-                html.H5("✅ Reddit Collection Complete!", className="alert-heading"),
-                html.P(f"Collected {new_posts} new posts")
-            ], color="success", dismissable=True)
-        except Exception as e:
-            return dbc.Alert(f"❌ Reddit Error: {str(e)}", color="danger")
-    
-    def _collect_medium(self):
-        """Collect from Medium"""
-        try:
-            from data_collection.medium_crawler import MediumCrawler
-            from analysis.sentiment_analyzer import SentimentAnalyzer
-            
-            crawler = MediumCrawler(self.db)
-            initial_count = self.posts_collection.count_documents({})
-            
-            crawler.collect_topics(['artificial-intelligence', 'machine-learning'], max_results_per_tag=10)
-            
-            final_count = self.posts_collection.count_documents({})
-            new_posts = final_count - initial_count
-            
-            analyzer = SentimentAnalyzer(self.db)
-            analyzer.analyze_all_posts()
-            
-            return dbc.Alert([
-                html.H5("✅ Medium Collection Complete!", className="alert-heading"),
-                html.P(f"Collected {new_posts} new posts")
-            ], color="success", dismissable=True)
-        except Exception as e:
-            return dbc.Alert(f"❌ Medium Error: {str(e)}", color="danger")
+    def _collect_from(self, source, queries=None, per_query=None):
+        """Thu thập một nguồn trong registry (mặc định: query mặc định của crawler); trả về số post mới"""
+        crawler = create_crawler(source, self.db)
+        initial_count = self.posts_collection.count_documents({})
+        crawler.collect_topics(queries or crawler.default_queries,
+                               max_results_per_query=per_query or crawler.default_max_results)
+        return self.posts_collection.count_documents({}) - initial_count
     
-    def _collect_stackoverflow(self):
-        """Collect from Stack Overflow"""
+    def _collect_source(self, source):
+        """Quick collection from one source"""
+        display_name = load_crawlers()[source].display_name
         try:
-            from data_collection.stackoverflow_crawler import StackOverflowCrawler
             from analysis.sentiment_analyzer import SentimentAnalyzer
             
-            crawler = StackOverflowCrawler(self.db)
-            initial_count = self.posts_collection.count_documents({})
-            
-            crawler.collect_topics(['machine-learning', 'artificial-intelligence'], max_results_per_tag=15)
-            
-            final_count = self.posts_collection.count_documents({})
-            new_posts = final_count - initial_count
-            
-            analyzer = SentimentAnalyzer(self.db)
-            analyzer.analyze_all_posts()
-            
-            return dbc.Alert([
-                html.H5("✅ Stack Overflow Collection Complete!", className="alert-heading"),
-                html.P(f"Collected {new_posts} new posts")
-            ], color="success", dismissable=True)
-        except Exception as e:
-            return dbc.Alert(f"❌ Stack Overflow Error: {str(e)}", color="danger")
-    
-    def _collect_hackernews(self):
-        """Collect from Hacker News"""
-        try:
-            from data_collection.hackernews_crawler import HackerNewsCrawler
-            from analysis.sentiment_analyzer import SentimentAnalyzer
-            
-            crawler = HackerNewsCrawler(self.db)
-            initial_count = self.posts_collection.count_documents({})
-            
-            crawler.collect_topics(['AI education', 'EdTech'], max_results_per_query=10)
-            
-            final_count = self.posts_collection.count_documents({})
-            new_posts = final_count - initial_count
+            new_posts = self._collect_from(source)
             
+            # Analyze sentiment for new posts
             analyzer = SentimentAnalyzer(self.db)
             analyzer.analyze_all_posts()
             
             return dbc.Alert([
-                html.H5("✅ Hacker News Collection Complete!", className="alert-heading"),
+                html.H5(f"✅ {display_name} Collection Complete!", className="alert-heading"),
                 html.P(f"Collected {new_posts} new posts")
             ], color="success", dismissable=True)
         except Exception as e:
-            return dbc.Alert(f"❌ Hacker News Error: {str(e)}", color="danger")
+            return dbc.Alert(f"❌ {display_name} Error: {str(e)}", color="danger")
     
     def _collect_all_sources(self):
         """Collect from all sources"""
         try:
+            from analysis.sentiment_analyzer import SentimentAnalyzer
+            
             initial_count = self.posts_collection.count_documents({})
             results = []
             
-            # Collect from each source
-            sources = [
-                ('Google News', self._collect_google_news),
-                ('Reddit', self._collect_reddit),
-                ('Medium', self._collect_medium),
-                ('Stack Overflow', self._collect_stackoverflow),
-                ('Hacker News', self._collect_hackernews)
-            ]
-            
-            for source_name, collect_func in sources:
+            # Collect from each registered source
+            for source, cls in load_crawlers().items():
                 try:
-                    collect_func()
-                    results.append(f"✅ {source_name}")
+                    self._collect_from(source)
+                    results.append(f"✅ {cls.display_name}")
                 except Exception as e:
-                    results.append(f"❌ {source_name}: {str(e)[:50]}")
+                    results.append(f"❌ {cls.display_name}: {str(e)[:50]}")
             
             final_count = self.posts_collection.count_documents({})
             total_new = final_count - initial_count
             
+            analyzer = SentimentAnalyzer(self.db)
+            analyzer.analyze_all_posts()
+            
             return dbc.Alert([
                 html.H5("🚀 All Sources Collection Complete!", className="alert-heading"),
                 html.P(f"Total new posts: {total_new}"),
@@ -1634,45 +1584,17 @@ class DashboardApp:
             if count > 200:
                 count = 200  # Max limit
             
-            initial_count = self.posts_collection.count_documents({})
             keywords_list = [k.strip() for k in keywords.split(',')]
             per_keyword = max(1, count // len(keywords_list))
             
-            if source == 'google':
-                from data_collection.google_news_crawler import GoogleNewsCrawler
-                crawler = GoogleNewsCrawler(self.db)
-                crawler.collect_topics(keywords_list, max_results_per_query=per_keyword)
-            elif source == 'reddit':
-                from data_collection.reddit_crawler import RedditCrawler
-                crawler = RedditCrawler(
-                    db=self.db,
-                    client_id=os.getenv('REDDIT_CLIENT_ID', 'k6ozqL3mwwC0cGNUSmcdlQ'),
-                    client_secret=os.getenv('REDDIT_CLIENT_SECRET', 'JR6XLrrWpp2oNi5RNk0uV2GrrCaelw'),
-                    user_agent=os.getenv('REDDIT_USER_AGENT', 'windows:ai-trend-collector:v2.0')
-                )
-                crawler.collect_topics(keywords_list, limit_per_topic=per_keyword)
-            elif source == 'medium':
-                from data_collection.medium_crawler import MediumCrawler
-                crawler = MediumCrawler(self.db)
-                crawler.collect_topics(keywords_list, max_results_per_tag=per_keyword)
-            elif source == 'stackoverflow':
-                from data_collection.stackoverflow_crawler import StackOverflowCrawler
-                crawler = StackOverflowCrawler(self.db)
-                crawler.collect_topics(keywords_list, max_results_per_tag=per_keyword)
-            elif source == 'hackernews':
-                from data_collection.hackernews_crawler import HackerNewsCrawler
-                crawler = HackerNewsCrawler(self.db)
-                crawler.collect_topics(keywords_list, max_results_per_query=per_keyword)
-            
-            final_count = self.posts_collection.count_documents({})
-            new_posts = final_count - initial_count
+            new_posts = self._collect_from(source, keywords_list, per_keyword)
             
             analyzer = SentimentAnalyzer(self.db)
             analyzer.analyze_all_posts()
             
             return dbc.Alert([
                 html.H5(f"✅ Custom Collection Complete!", className="alert-heading"),
-                html.P(f"Source: {source.title()}"),
+                html.P(f"Source: {load_crawlers()[source].display_name}"),
                 html.P(f"Keywords: {keywords}"),
                 html.P(f"Collected: {new_posts} new posts")
             ], color="success", dismissable=True)
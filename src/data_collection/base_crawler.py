@@ -0,0 +1,213 @@
+"""Shared crawler skeleton: pluggable fetch/parse hooks and one ingestion pipeline for every source"""
+import time
+from datetime import datetime
+from utils.minhash import add_minhash
+from utils.html_text import extract_hashtags
+from data_collection.post_writer import upsert_new_posts
+from data_collection.http_client import get_http_client
+from data_collection.crawl_watermarks import CrawlWatermarks
+from data_collection.seen_items import SeenItems
+
+
+def to_datetime(value):
+    """datetime từ epoch giây, struct_time (feed) hoặc datetime; None nếu không đọc được"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value)
+    if isinstance(value, (time.struct_time, tuple)):
+        return datetime(*value[:6])
+    return None
+
+
+class BaseCrawler:
+    """
+    Crawler một nguồn. Lớp con khai báo metadata và cài đặt các hook:
+      fetch(query, max_results, watermark, **options) -> iterable item thô (None = feed không đổi)
+      item_id(item), item_time(item), item_url(item) -> khóa cho watermark / seen filter, trước khi parse
+      parse(item, query, **options) -> document (chỉ các trường riêng của nguồn)
+      doc_url(doc) -> URL của document, để đánh dấu seen filter sau khi lưu thành công
+    Pipeline chung: lọc watermark (nguồn newest_first) -> dedupe (seen filter) -> parse -> normalize
+    -> enrich -> batch write.
+    """
+    source = None              # key trong registry, watermark và seen filter
+    display_name = None
+    icon = '❓'
+    source_name = None         # giá trị mặc định của field 'source'
+    platform = None
+    key_field = None           # unique key của document (upsert)
+    item_label = 'posts'
+    newest_first = True        # item sắp mới nhất trước: gặp item đã thấy thì dừng hẳn.
+                               # False (sắp theo độ liên quan): không dùng watermark created_at,
+                               # chỉ dedupe theo id (seen filter + unique key)
+    default_fields = {}        # bộ đếm mặc định (likes, num_comments...)
+    default_queries = ()       # query dùng khi thu thập nhanh từ dashboard
+    default_max_results = 15
+
+    def __init__(self, db, http=None, seen=None, feed_fetcher=None):
+        self.db = db
+        self.posts_collection = db['posts']
+        self.http = http or get_http_client()
+        self.watermarks = CrawlWatermarks(db)
+        self.seen = seen or SeenItems()
+        self.feed_fetcher = feed_fetcher
+        # ETag / Last-Modified theo query, chỉ commit khi document của query đã được lưu
+        self._pending_validators = {}
+        # Query đã fetch theo thứ tự mới nhất trước: save_to_mongodb đẩy watermark của chúng
+        self._newest_first_queries = set()
+
+    # Hook của từng nguồn
+    def fetch(self, query, max_results, watermark, **options):
+        raise NotImplementedError
+
+    def is_newest_first(self, **options):
+        """Kết quả fetch với các option này có sắp mới nhất trước không (mặc định: newest_first)"""
+        return self.newest_first
+
+    def item_id(self, item):
+        raise NotImplementedError
+
+    def item_time(self, item):
+        return None
+
+    def item_url(self, item):
+        return None
+
+    def doc_url(self, doc):
+        """URL của document đã dựng, khớp với item_url(item) để đánh dấu seen sau khi lưu"""
+        return None
+
+    def parse(self, item, query, **options):
+        raise NotImplementedError
+
+    def fetch_feed(self, query, url, max_results, stop=None):
+        """Entry của feed qua FeedFetcher dùng chung (None nếu 304); validators chờ save_to_mongodb"""
+        feed = self.feed_fetcher.fetch(url, max_results=max_results, stop=stop)
+        if feed is None:
+            return None
+        self._pending_validators[query] = feed.get('validators')
+        return feed.entries
+
+    # Pipeline chung
+    def collect(self, query, max_results=50, incremental=True, **options):
+        """Thu thập một query: fetch rồi chạy pipeline; lỗi được log rồi raise lại để orchestrator ghi nhận"""
+        # Watermark created_at chỉ đúng với nguồn sắp mới nhất trước: với nguồn sắp theo
+        # độ liên quan, item cũ hơn item mới nhất có thể chưa từng được lấy
+        newest_first = self.is_newest_first(**options)
+        watermark = self.watermarks.get(self.source, query) if incremental and newest_first else {}
+        if newest_first:
+            self._newest_first_queries.add(query)
+        try:
+            items = self.fetch(query, max_results, watermark, **options)
+            if items is None:
+                self._newest_first_queries.discard(query)
+                print(f"ℹ️  Feed not modified since last crawl: {query}")
+                return []
+            docs = self.ingest(query, items, watermark, max_results, **options)
+            if not docs:
+                # Không còn gì để lưu (entry cũ / đã lưu): commit ngay để lần sau nhận 304
+                self._commit_validators([query])
+                self._newest_first_queries.discard(query)
+        except Exception as e:
+            # Không commit validators: lần sau tải lại đầy đủ thay vì nhận 304
+            self._pending_validators.pop(query, None)
+            self._newest_first_queries.discard(query)
+            print(f"❌ Error fetching {self.display_name} {self.item_label} for '{query}': {e}")
+            raise
+        print(f"✅ Found {len(docs)} {self.display_name} {self.item_label} for '{query}'")
+        return docs
+
+    def ingest(self, query, items, watermark=None, max_results=None, **options):
+        """Item thô -> document đã chuẩn hóa; item cũ hoặc đã gặp bị bỏ trước khi parse"""
+        docs, skipped = [], 0
+        for position, item in enumerate(items):
+            if max_results and position >= max_results:
+                break
+            item_id = self.item_id(item)
+            if self.watermarks.is_seen(watermark, item_id, self.item_time(item)):
+                break
+            # Chỉ kiểm tra: item được đánh dấu trong save_to_mongodb sau khi upsert thành công
+            if self.seen.contains(self.source, item_id, self.item_url(item)):
+                skipped += 1
+                continue
+            doc = self.parse(item, query, **options)
+            if doc:
+                docs.append(self.normalize(doc, query))
+        self.seen.note_batch(len(docs), skipped)
+        return self.enrich(docs)
+
+    def normalize(self, doc, query):
+        """Trường chung của mọi post: thời gian, topic, source/platform, text, hashtags, bộ đếm"""
+        now = datetime.now()
+        created_at = to_datetime(doc.get('created_at')) or now
+        doc['created_at'] = created_at
+        doc['published'] = to_datetime(doc.get('published')) or created_at
+        doc['collected_at'] = now
+        doc.setdefault('topic', query)
+        doc.setdefault('source', self.source_name)
+        doc.setdefault('platform', self.platform)
+        doc['title'] = doc.get('title') or ''
+        if not doc.get('text'):
+            doc['text'] = doc['title']
+        if 'hashtags' not in doc:
+            doc['hashtags'] = extract_hashtags(f"{doc['title']} {doc['text']}")
+        for field, value in self.default_fields.items():
+            doc.setdefault(field, value)
+        return doc
+
+    def enrich(self, docs):
+        """Trường dẫn xuất tính theo lô trước khi ghi (MinHash/LSH cho phát hiện trùng lặp)"""
+        return add_minhash(docs)
+
+    def save_to_mongodb(self, docs):
+        """Ghi cả lô trong một bulk upsert và đẩy watermark"""
+        if not docs:
+            print(f"ℹ️  No {self.item_label} to save")
+            return 0
+
+        saved = upsert_new_posts(self.posts_collection, docs, self.key_field)
+        for doc in docs:
+            self.seen.mark(self.source, doc[self.key_field], self.doc_url(doc))
+        if saved:
+            print(f"💾 Saved {saved} new {self.display_name} {self.item_label}")
+        else:
+            print(f"ℹ️  No new {self.item_label} to save (all duplicates)")
+
+        queries = {doc.get('topic') for doc in docs}
+        ordered = queries & self._newest_first_queries
+        if ordered:
+            self.watermarks.advance(self.source, [doc for doc in docs if doc.get('topic') in ordered],
+                                    self.key_field)
+            self._newest_first_queries -= ordered
+        self._commit_validators(queries)
+        return saved
+
+    def _commit_validators(self, queries):
+        for query in queries:
+            validators = self._pending_validators.pop(query, None)
+            if validators and self.feed_fetcher:
+                self.feed_fetcher.commit(validators)
+
+    def collect_topics(self, queries, max_results_per_query=50):
+        """Thu thập và lưu lần lượt nhiều query; trả về số document thu được"""
+        total_collected = 0
+
+        for query in queries:
+            print(f"\n{'='*60}")
+            print(f"{self.icon} Collecting {self.display_name}: {query}")
+            print(f"{'='*60}")
+
+            try:
+                docs = self.collect(query, max_results=max_results_per_query)
+            except Exception:
+                # collect đã in lỗi: bỏ qua query này, tiếp tục query sau
+                continue
+            self.save_to_mongodb(docs)
+            total_collected += len(docs)
+
+        print(f"\n{'='*60}")
+        print(f"✅ Total {self.display_name} {self.item_label}: {total_collected}")
+        print(f"{'='*60}\n")
+        return total_collected
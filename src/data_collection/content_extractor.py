@@ -0,0 +1,151 @@
+"""Readability-style main-content extraction: one pass over the parse tree, score blocks by density"""
+import re
+from bs4 import Tag, NavigableString
+from bs4.element import PreformattedString
+
+# Không bao giờ là nội dung chính, không duyệt vào bên trong
+NOISE_TAGS = frozenset({
+    'script', 'style', 'noscript', 'template', 'nav', 'footer', 'header', 'aside',
+    'form', 'iframe', 'svg', 'button', 'select', 'head'
+})
+# Khối văn bản cộng điểm cho khối cha / ông
+PARAGRAPH_TAGS = frozenset({'p', 'pre', 'td', 'blockquote', 'li'})
+TAG_WEIGHTS = {
+    'article': 10, 'main': 10, 'div': 5, 'section': 3, 'pre': 3, 'td': 3, 'blockquote': 3,
+    'ol': -3, 'ul': -3, 'dl': -3, 'dd': -3, 'dt': -3, 'li': -3, 'address': -3,
+    'h1': -5, 'h2': -5, 'h3': -5, 'h4': -5, 'h5': -5, 'h6': -5, 'th': -5
+}
+POSITIVE_HINTS = re.compile(r'article|body|content|entry|main|post|story|text|blog|prose', re.I)
+NEGATIVE_HINTS = re.compile(r'comment|footer|footnote|sidebar|widget|related|share|social|promo|sponsor'
+                            r'|banner|menu|nav|breadcrumb|masthead|cookie|popup|modal|subscribe|\bads?\b', re.I)
+MIN_PARAGRAPH_CHARS = 25
+
+
+def _class_weight(tag):
+    hints = ' '.join(tag.get('class', ())) + ' ' + (tag.get('id') or '')
+    if not hints.strip():
+        return 0
+    weight = 0
+    if POSITIVE_HINTS.search(hints):
+        weight += 25
+    if NEGATIVE_HINTS.search(hints):
+        weight -= 25
+    return weight
+
+
+def _score_blocks(root):
+    """
+    Duyệt cây một lần (post-order, không đệ quy) tính độ dài text, text trong link và
+    điểm của từng khối. Trả về {id(tag): [tag, score, text_len, link_len]}.
+    """
+    stats = {}
+    candidates = {}
+    stack = [(root, False)]
+    while stack:
+        node, leaving = stack.pop()
+        if not leaving:
+            stack.append((node, True))
+            for child in node.contents:
+                if isinstance(child, Tag):
+                    if child.name not in NOISE_TAGS:
+                        stack.append((child, False))
+            continue
+
+        text_len = link_len = commas = 0
+        for child in node.contents:
+            if isinstance(child, Tag):
+                child_stats = stats.get(id(child))
+                if child_stats:
+                    text_len += child_stats[0]
+                    link_len += child_stats[1]
+                    commas += child_stats[2]
+            elif isinstance(child, NavigableString) and not isinstance(child, PreformattedString):
+                text = child.strip()
+                if text:
+                    text_len += len(text)
+                    commas += text.count(',')
+        if node.name == 'a':
+            link_len = text_len
+        stats[id(node)] = (text_len, link_len, commas)
+
+        if node.name in PARAGRAPH_TAGS and text_len >= MIN_PARAGRAPH_CHARS:
+            score = 1 + commas + min(text_len // 100, 3)
+            for level, ancestor in enumerate((node.parent, node.parent.parent if node.parent else None)):
+                # Chỉ chấm điểm khối nằm trong root (đoạn văn ngay dưới body không đẩy điểm lên html)
+                if not isinstance(ancestor, Tag) or node is root or (level and node.parent is root):
+                    break
+                entry = candidates.get(id(ancestor))
+                if entry is None:
+                    entry = candidates[id(ancestor)] = [
+                        ancestor, TAG_WEIGHTS.get(ancestor.name, 0) + _class_weight(ancestor), 0, 0
+                    ]
+                entry[1] += score if level == 0 else score / 2
+
+    for entry in candidates.values():
+        entry[2], entry[3] = stats[id(entry[0])][:2]
+    return candidates
+
+
+def _node_text(node, limit):
+    """Text của khối, bỏ qua noise tag và comment; dừng khi đủ limit ký tự"""
+    parts, total = [], 0
+    stack = [node]
+    while stack and total < limit:
+        current = stack.pop()
+        if isinstance(current, Tag):
+            if current.name in NOISE_TAGS:
+                continue
+            stack.extend(reversed(current.contents))
+        elif not isinstance(current, PreformattedString):
+            text = current.strip()
+            if text:
+                parts.append(text)
+                total += len(text) + 1
+    return ' '.join(parts)
+
+
+def find_main_content(soup):
+    """
+    Các khối nội dung chính theo thứ tự trong trang: khối điểm cao nhất
+    (điểm * (1 - link density)) cùng các khối anh em đủ điểm. Rỗng nếu trang không có đoạn văn.
+    """
+    root = soup.body or soup
+    candidates = _score_blocks(root)
+    if not candidates:
+        return []
+
+    def final_score(entry):
+        _, score, text_len, link_len = entry
+        return score * (1 - link_len / text_len) if text_len else 0
+
+    top = max(candidates.values(), key=final_score)
+    top_score = final_score(top)
+    parent = top[0].parent
+    if not isinstance(parent, Tag):
+        return [top[0]]
+
+    # Anh em của khối chính thường là phần tiếp của bài (bài bị chia nhiều div)
+    threshold = max(10, top_score * 0.2)
+    blocks = []
+    for sibling in parent.contents:
+        if sibling is top[0]:
+            blocks.append(sibling)
+        elif isinstance(sibling, Tag):
+            entry = candidates.get(id(sibling))
+            if entry and final_score(entry) >= threshold:
+                blocks.append(sibling)
+    return blocks
+
+
+def extract_main_content(soup, limit=3000):
+    """Text nội dung chính (tối đa ~limit ký tự); '' nếu không tìm được khối nào"""
+    parts = []
+    remaining = limit
+    for block in find_main_content(soup):
+        text = _node_text(block, remaining)
+        if text:
+            parts.append(text)
+            remaining -= len(text) + 1
+        if remaining <= 0:
+            break
+    return re.sub(r'\s+', ' ', ' '.join(parts)).strip()
@@ -0,0 +1,164 @@
+"""Per-domain crawl policy (robots.txt, crawl-delay, failure history) cached in memory and MongoDB"""
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import requests
+from data_collection.http_client import get_http_client, DEFAULT_USER_AGENT
+
+# Product token của User-Agent mà HttpClient gửi, để khớp nhóm luật robots.txt của chính crawler
+ROBOTS_AGENT = DEFAULT_USER_AGENT.split('/')[0]
+MAX_ROBOTS_CHARS = 500_000        # Giới hạn RFC 9309 là 500 KiB
+UNREACHABLE_TTL = 3600            # robots.txt lỗi 5xx/mạng: thử lại sau 1 giờ
+FAILURE_HISTORY = 10
+
+
+class CrawlPolicyCache:
+    """
+    Chính sách crawl theo domain: luật robots.txt, crawl-delay và lịch sử lỗi.
+    robots.txt chỉ được tải khi domain chưa có trong bộ nhớ lẫn MongoDB hoặc đã quá ttl,
+    nên domain "ấm" không tốn thêm request nào.
+    """
+
+    def __init__(self, db, http=None, ttl=86400, agent=ROBOTS_AGENT, max_failures=3, failure_cooldown=600):
+        self.collection = db['crawl_policies']
+        self.http = http or get_http_client()
+        self.ttl = ttl
+        self.agent = agent
+        self.max_failures = max_failures
+        self.failure_cooldown = failure_cooldown
+        self._policies = {}
+        self._domain_locks = {}
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'db_hits': 0, 'robots_fetched': 0, 'disallowed': 0, 'cooling_down': 0}
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _domain_lock(self, domain):
+        with self._lock:
+            if domain not in self._domain_locks:
+                self._domain_locks[domain] = threading.Lock()
+            return self._domain_locks[domain]
+
+    def _fetch_robots(self, scheme, domain):
+        """(status, robots_txt, ttl) theo RFC 9309: 4xx = không giới hạn, 5xx/lỗi mạng = cấm tạm thời"""
+        self._count('robots_fetched')
+        try:
+            response = self.http.get(f"{scheme}://{domain}/robots.txt", timeout=10)
+        except requests.RequestException:
+            return 'unreachable', '', UNREACHABLE_TTL
+        if response.status_code >= 500:
+            return 'unreachable', '', UNREACHABLE_TTL
+        if response.status_code >= 400:
+            return 'missing', '', self.ttl
+        return 'ok', response.text[:MAX_ROBOTS_CHARS], self.ttl
+
+    @staticmethod
+    def _parser(doc):
+        parser = RobotFileParser()
+        if doc['robots_status'] == 'missing':
+            parser.allow_all = True
+        elif doc['robots_status'] == 'unreachable':
+            parser.disallow_all = True
+        else:
+            parser.parse(doc['robots_txt'].splitlines())
+        return parser
+
+    def _crawl_delay(self, parser):
+        """Khoảng cách tối thiểu giữa hai request (giây) theo Crawl-delay / Request-rate"""
+        delay = parser.crawl_delay(self.agent)
+        rate = parser.request_rate(self.agent)
+        if rate and rate.requests:
+            delay = max(delay or 0, rate.seconds / rate.requests)
+        return float(delay) if delay else None
+
+    def _load(self, url):
+        """Policy của domain: bộ nhớ -> MongoDB -> tải robots.txt"""
+        parts = urlparse(url)
+        domain = parts.netloc.lower()
+        now = datetime.now()
+
+        policy = self._policies.get(domain)
+        if policy and policy['doc']['expires_at'] > now:
+            self._count('memory_hits')
+            return policy
+
+        with self._domain_lock(domain):
+            # Luồng khác có thể vừa nạp xong domain này
+            policy = self._policies.get(domain)
+            if policy and policy['doc']['expires_at'] > now:
+                self._count('memory_hits')
+                return policy
+
+            doc = self.collection.find_one({'_id': domain})
+            if doc and doc.get('expires_at') and doc['expires_at'] > now:
+                self._count('db_hits')
+            else:
+                status, robots_txt, ttl = self._fetch_robots(parts.scheme or 'https', domain)
+                fields = {
+                    'robots_status': status,
+                    'robots_txt': robots_txt,
+                    'fetched_at': now,
+                    'expires_at': now + timedelta(seconds=ttl)
+                }
+                parser = self._parser(fields)
+                fields['crawl_delay'] = self._crawl_delay(parser)
+                doc = dict(doc or {'_id': domain, 'failures': 0, 'failure_history': []}, **fields)
+                self.collection.update_one({'_id': domain}, {'$set': fields}, upsert=True)
+
+            policy = {'doc': doc, 'parser': self._parser(doc)}
+            if doc.get('crawl_delay'):
+                # Crawl-delay áp vào rate limiter dùng chung, không cần sleep riêng
+                limiter = self.http.rate_limiter
+                limiter.set_rate(domain, min(limiter.current_rate(domain), 1.0 / doc['crawl_delay']))
+            self._policies[domain] = policy
+            return policy
+
+    def check(self, url):
+        """(allowed, reason): robots.txt cho phép và domain không đang tạm dừng vì lỗi liên tiếp"""
+        policy = self._load(url)
+        doc = policy['doc']
+        blocked_until = doc.get('blocked_until')
+        if blocked_until and blocked_until > datetime.now():
+            self._count('cooling_down')
+            return False, f"{doc['failures']} consecutive failures, paused until {blocked_until:%H:%M:%S}"
+        if not policy['parser'].can_fetch(self.agent, url):
+            self._count('disallowed')
+            return False, f"disallowed by robots.txt ({doc['robots_status']})"
+        return True, None
+
+    def crawl_delay(self, url):
+        return self._load(url)['doc'].get('crawl_delay')
+
+    def record_success(self, url):
+        """Reset chuỗi lỗi; chỉ ghi MongoDB khi domain đang có lỗi"""
+        doc = self._load(url)['doc']
+        if not doc.get('failures'):
+            return
+        doc.update(failures=0, blocked_until=None)
+        self.collection.update_one({'_id': doc['_id']}, {'$set': {'failures': 0, 'blocked_until': None}})
+
+    def record_failure(self, url, error):
+        """Lưu lỗi; sau max_failures lỗi liên tiếp tạm dừng domain, thời gian dừng tăng gấp đôi mỗi lần"""
+        doc = self._load(url)['doc']
+        now = datetime.now()
+        with self._lock:
+            doc['failures'] = doc.get('failures', 0) + 1
+            entry = {'at': now, 'url': url, 'error': str(error)[:200]}
+            doc['failure_history'] = (doc.get('failure_history', []) + [entry])[-FAILURE_HISTORY:]
+            update = {'$set': {'failures': doc['failures']},
+                      '$push': {'failure_history': {'$each': [entry], '$slice': -FAILURE_HISTORY}}}
+            if doc['failures'] >= self.max_failures:
+                pause = self.failure_cooldown * 2 ** (doc['failures'] - self.max_failures)
+                doc['blocked_until'] = now + timedelta(seconds=min(pause, self.ttl))
+                update['$set']['blocked_until'] = doc['blocked_until']
+        self.collection.update_one({'_id': doc['_id']}, update)
+
+    def print_report(self):
+        """In số domain, số lần tải robots.txt và số URL bị chặn"""
+        stats = self.stats
+        print(f" 🤖 Crawl policy: {len(self._policies)} domains; robots.txt fetched {stats['robots_fetched']}, "
+              f"loaded from MongoDB {stats['db_hits']}, memory hits {stats['memory_hits']}; "
+              f"{stats['disallowed']} URLs disallowed, {stats['cooling_down']} skipped on failing domains")
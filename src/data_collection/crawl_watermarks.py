@@ -0,0 +1,52 @@
+"""Per-source, per-query incremental crawl watermarks"""
+from datetime import datetime
+
+
+class CrawlWatermarks:
+    def __init__(self, db):
+        self.collection = db['crawl_watermarks']
+
+    def get(self, source, query):
+        """Watermark hiện tại: {'created_at': datetime, 'item_id': str} hoặc {}"""
+        return self.collection.find_one({'_id': f"{source}:{query}"}) or {}
+
+    @staticmethod
+    def is_seen(watermark, item_id, created_at):
+        """Item đã được thấy ở lần crawl trước (cùng id hoặc không mới hơn watermark)"""
+        if not watermark:
+            return False
+        if item_id is not None and item_id == watermark.get('item_id'):
+            return True
+        return created_at is not None and watermark.get('created_at') is not None \
+            and created_at <= watermark['created_at']
+
+    @classmethod
+    def feed_stop(cls, watermark):
+        """Điều kiện dừng parse cho feed sắp mới nhất trước: entry đầu tiên đã thấy"""
+        if not watermark:
+            return None
+
+        def stop(entry):
+            published = datetime(*entry['published_parsed'][:6]) if entry.get('published_parsed') else None
+            return cls.is_seen(watermark, entry.get('id', entry.get('link')), published)
+        return stop
+
+    def advance(self, source, docs, id_field):
+        """Đẩy watermark của từng query (field 'topic') lên item mới nhất trong docs"""
+        newest = {}
+        for doc in docs:
+            created_at = doc.get('created_at')
+            if not isinstance(created_at, datetime):
+                continue
+            query = doc.get('topic')
+            if query not in newest or created_at > newest[query]['created_at']:
+                newest[query] = doc
+
+        for query, doc in newest.items():
+            key = f"{source}:{query}"
+            self.collection.update_one({'_id': key}, {'$max': {'created_at': doc['created_at']}}, upsert=True)
+            # Chỉ ghi item_id nếu item này thực sự là mới nhất
+            self.collection.update_one(
+                {'_id': key, 'created_at': doc['created_at']},
+                {'$set': {'item_id': doc.get(id_field), 'updated_at': datetime.now()}}
+            )
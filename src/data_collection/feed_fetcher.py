@@ -0,0 +1,87 @@
+"""Conditional GET (ETag / Last-Modified) for RSS & Atom feeds"""
+import threading
+import time
+from datetime import datetime
+from data_collection.http_client import get_http_client
+from data_collection.feed_parser import parse_feed
+
+
+class FeedFetcher:
+    def __init__(self, db, http=None):
+        self.validators_collection = db['feed_validators']
+        self.http = http or get_http_client()
+        self.stats = {'fetched': 0, 'not_modified': 0, 'bytes_saved': 0, 'parses_saved': 0,
+                      'fallbacks': 0, 'parse_seconds': 0.0}
+        self._stats_lock = threading.Lock()
+
+    def fetch(self, url, max_results=None, stop=None):
+        """
+        Tải và parse feed; trả về None nếu server báo 304 Not Modified.
+        Parse dừng sớm khi đủ max_results entry hoặc khi stop(entry) trả về True
+        (ví dụ entry đã qua watermark trong feed sắp mới nhất trước).
+        ETag / Last-Modified không được lưu ở đây: feed['validators'] được trả về để
+        người gọi commit() sau khi đã lưu xong các entry. Feed bị cắt ở max_results
+        (như Google News search) lưu validators theo cả max_results: 304 chỉ đúng khi
+        lần sau cũng chỉ đọc bấy nhiêu entry đầu, còn max_results lớn hơn sẽ tải lại.
+        """
+        keys = [url] if max_results is None else [url, self._capped_key(url, max_results)]
+        validators = self.validators_collection.find_one({'_id': {'$in': keys}}) or {}
+
+        headers = {}
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+        response = self.http.get(url, headers=headers)
+
+        if response.status_code == 304:
+            with self._stats_lock:
+                self.stats['not_modified'] += 1
+                self.stats['bytes_saved'] += validators.get('content_length', 0)
+                self.stats['parses_saved'] += 1
+            return None
+
+        response.raise_for_status()
+
+        started = time.perf_counter()
+        feed = parse_feed(response.content, max_results, stop)
+        with self._stats_lock:
+            self.stats['fetched'] += 1
+            self.stats['fallbacks'] += feed.get('parser') == 'feedparser'
+            self.stats['parse_seconds'] += time.perf_counter() - started
+
+        feed['validators'] = {
+            '_id': self._capped_key(url, max_results) if feed.get('truncated') else url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_length': len(response.content)
+        }
+        return feed
+
+    @staticmethod
+    def _capped_key(url, max_results):
+        return f"{url}#max_results={max_results}"
+
+    def commit(self, validators):
+        """Lưu ETag / Last-Modified của feed (gọi sau khi entry đã được lưu)"""
+        if not validators:
+            return
+        fields = {key: value for key, value in validators.items() if key != '_id'}
+        self.validators_collection.update_one(
+            {'_id': validators['_id']},
+            {'$set': dict(fields, fetched_at=datetime.now())},
+            upsert=True
+        )
+
+    def print_report(self):
+        """In số lần tải/parse đã tiết kiệm nhờ conditional GET"""
+        total = self.stats['fetched'] + self.stats['not_modified']
+        if not total:
+            return
+        print(f"\n📡 Feeds: {total} requested, {self.stats['not_modified']} not modified (304)")
+        print(f"   Saved {self.stats['parses_saved']} parses and "
+              f"{self.stats['bytes_saved'] / 1024:,.1f} KB of downloads")
+        if self.stats['fetched']:
+            print(f"   Parsed {self.stats['fetched']} feeds in {self.stats['parse_seconds'] * 1000:,.0f} ms, "
+                  f"{self.stats['fallbacks']} malformed feeds parsed with feedparser")
@@ -0,0 +1,139 @@
+"""Lean RSS/Atom parser for hot feeds: only the fields crawlers use, with early stop"""
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from io import BytesIO
+import feedparser
+
+ENTRY_TAGS = frozenset({'item', 'entry'})
+FEED_ROOTS = frozenset({'rss', 'feed', 'RDF'})
+
+
+class FeedDict(dict):
+    """dict truy cập được như thuộc tính, giống FeedParserDict (entry.title, hasattr(entry, 'published_parsed'))"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def _local(tag):
+    return tag.rpartition('}')[2] if isinstance(tag, str) else ''
+
+
+def _parse_date(value):
+    """pubDate (RFC 822) hoặc published/updated (ISO 8601) -> struct_time UTC như feedparser"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).timetuple()
+
+
+def _text(element):
+    # Atom type="xhtml" chứa phần tử con thay vì text
+    if len(element):
+        return ''.join(element.itertext()).strip()
+    return (element.text or '').strip()
+
+
+def _build_entry(element):
+    """Chỉ lấy id, title, link, summary, author, published và source"""
+    entry = FeedDict()
+    date = None
+    for child in element:
+        name = _local(child.tag)
+        if name in ('guid', 'id'):
+            entry['id'] = _text(child)
+        elif name == 'title':
+            entry['title'] = _text(child)
+        elif name == 'link':
+            href = child.get('href')
+            if href is None:
+                entry.setdefault('link', _text(child))
+            elif child.get('rel', 'alternate') == 'alternate' or 'link' not in entry:
+                entry['link'] = href
+        elif name in ('description', 'summary'):
+            entry['summary'] = _text(child)
+        elif name in ('encoded', 'content') and 'summary' not in entry:
+            entry['summary'] = _text(child)
+        elif name in ('creator', 'author'):
+            author_name = child.find('{*}name')
+            entry['author'] = _text(author_name if author_name is not None else child)
+        elif name in ('pubDate', 'published', 'date'):
+            date = _text(child)
+        elif name == 'updated' and date is None:
+            date = _text(child)
+        elif name == 'source':
+            title = child.find('{*}title')
+            entry['source'] = FeedDict(
+                title=_text(title if title is not None else child),
+                href=child.get('url', '')
+            )
+
+    published = _parse_date(date)
+    if published:
+        entry['published_parsed'] = published
+    entry.setdefault('title', '')
+    entry.setdefault('link', entry.get('id', ''))
+    return entry
+
+
+def fast_parse(content, max_results=None, stop=None):
+    """
+    Parse feed bằng iterparse, giải phóng từng entry sau khi đọc.
+    Dừng khi đủ max_results hoặc khi stop(entry) trả về True (entry đó không được lấy).
+    truncated=True nếu feed còn entry sau max_results (chưa đọc hết feed).
+    Raise ET.ParseError / ValueError nếu không phải RSS/Atom hợp lệ.
+    """
+    entries = []
+    root_checked = False
+    truncated = False
+    for event, element in ET.iterparse(BytesIO(content), events=('start', 'end')):
+        if event == 'start':
+            if not root_checked:
+                if _local(element.tag) not in FEED_ROOTS:
+                    raise ValueError(f"not an RSS/Atom feed: <{_local(element.tag)}>")
+                root_checked = True
+            elif max_results and len(entries) >= max_results and _local(element.tag) in ENTRY_TAGS:
+                # Đã đủ max_results mà feed vẫn còn entry
+                truncated = True
+                break
+            continue
+        if _local(element.tag) not in ENTRY_TAGS:
+            continue
+        entry = _build_entry(element)
+        element.clear()
+        if stop and stop(entry):
+            break
+        entries.append(entry)
+    return FeedDict(entries=entries, bozo=0, parser='fast', truncated=truncated)
+
+
+def parse_feed(content, max_results=None, stop=None):
+    """fast_parse; feed lỗi định dạng thì dùng feedparser (chịu lỗi tốt hơn)"""
+    try:
+        return fast_parse(content, max_results, stop)
+    except (ET.ParseError, ValueError):
+        feed = feedparser.parse(content)
+        entries = []
+        for entry in feed.entries:
+            if stop and stop(entry):
+                break
+            entries.append(entry)
+            if max_results and len(entries) >= max_results:
+                break
+        feed['truncated'] = len(entries) == max_results and len(feed.entries) > len(entries)
+        feed['entries'] = entries
+        feed['parser'] = 'feedparser'
+        return feed
@@ -1,141 +1,73 @@
 # src/data_collection/google_news_crawler.py
 """Google News RSS Crawler"""
-import feedparser
-import requests
-from datetime import datetime
 from urllib.parse import quote
-import re
+from utils.html_text import html_to_text
+from data_collection.base_crawler import BaseCrawler, to_datetime
+from data_collection.feed_fetcher import FeedFetcher
+from data_collection.registry import register_crawler
 
-class GoogleNewsCrawler:
-    def __init__(self, db):
-        self.db = db
-        self.posts_collection = db['posts']
+@register_crawler
+class GoogleNewsCrawler(BaseCrawler):
+    source = 'google_news'
+    display_name = 'Google News'
+    icon = '📰'
+    source_name = 'Google News'
+    platform = 'google_news'
+    key_field = 'article_id'
+    item_label = 'articles'
+    # Kết quả sắp theo độ liên quan: chỉ dedupe theo id, không dùng watermark created_at
+    newest_first = False
+    default_fields = {'likes': 0, 'retweets': 0, 'replies': 0}
+    default_queries = ("AI education", "artificial intelligence education")
+    default_max_results = 15
+
+    def __init__(self, db, http=None, feed_fetcher=None, seen=None):
+        super().__init__(db, http=http, seen=seen)
         self.base_url = "https://news.google.com/rss"
+        self.feed_fetcher = feed_fetcher or FeedFetcher(db, self.http)
+    
+    def fetch(self, query, max_results, watermark, language='en', country='US', topic=None):
+        """Entry của RSS tìm kiếm, hoặc RSS chủ đề khi có topic; None nếu feed không đổi"""
+        locale = f"hl={language}&gl={country}&ceid={country}:{language}"
+        if topic:
+            rss_url = f"{self.base_url}/topics/{topic}?{locale}"
+            print(f"🔍 Fetching {topic} news from Google News...")
+        else:
+            rss_url = f"{self.base_url}/search?q={quote(query)}&{locale}"
+            print(f"🔍 Fetching from: {rss_url}")
         
-    def search_news(self, query, language='en', country='US', max_results=100):
+        return self.fetch_feed(query, rss_url, max_results)
+    
+    def item_id(self, entry):
+        return entry.get('id', entry.link)
+    
+    def item_time(self, entry):
+        return to_datetime(entry.get('published_parsed'))
+    
+    def item_url(self, entry):
+        return entry.link
+    
+    def doc_url(self, doc):
+        return doc['link']
+    
+    def parse(self, entry, query, **options):
+        return {
+            'article_id': self.item_id(entry),
+            'title': entry.title,
+            'text': html_to_text(entry.get('summary', '')) or entry.title,
+            'link': entry.link,
+            'created_at': self.item_time(entry),
+            'source': entry.get('source', {}).get('title', 'Google News')
+        }
+    
+    def search_news(self, query, language='en', country='US', max_results=100, incremental=True):
         """Thu thập tin tức từ Google News RSS theo từ khóa"""
-        articles_data = []
-        
-        try:
-            # Build RSS URL with search query
-            encoded_query = quote(query)
-            rss_url = f"{self.base_url}/search?q={encoded_query}&hl={language}&gl={country}&ceid={country}:{language}"
-            
-            print(f"🔍 Fetching from: {rss_url}")
-            
-            # Parse RSS feed
-            feed = feedparser.parse(rss_url)
-            
-            if not feed.entries:
-                print(f"⚠️  No articles found for query: {query}")
-                return []
-            
-            for entry in feed.entries[:max_results]:
-                # Extract hashtags from title and description
-                text = f"{entry.title} {entry.get('summary', '')}"
-                hashtags = re.findall(r'#\w+', text)
-                hashtags = [tag[1:] for tag in hashtags]
-                
-                article_doc = {
-                    'article_id': entry.get('id', entry.link),
-                    'title': entry.title,
-                    'text': entry.get('summary', entry.title),
-                    'link': entry.link,
-                    'published': datetime(*entry.published_parsed[:6]) if hasattr(entry, 'published_parsed') else datetime.now(),
-                    'created_at': datetime(*entry.published_parsed[:6]) if hasattr(entry, 'published_parsed') else datetime.now(),
-                    'source': entry.get('source', {}).get('title', 'Google News'),
-                    'topic': query,
-                    'hashtags': hashtags,
-                    'platform': 'google_news',
-                    'collected_at': datetime.now(),
-                    'likes': 0,
-                    'retweets': 0,
-                    'replies': 0
-                }
-                articles_data.append(article_doc)
-            
-            print(f"✅ Found {len(articles_data)} articles for '{query}'")
-            return articles_data
-            
-        except Exception as e:
-            print(f"❌ Error fetching Google News: {e}")
-            return []
+        return self.collect(query, max_results, incremental, language=language, country=country)
     
-    def get_topic_news(self, topic='TECHNOLOGY', language='en', country='US', max_results=100):
+    def get_topic_news(self, topic='TECHNOLOGY', language='en', country='US', max_results=100, incremental=True):
         """
         Thu thập tin tức theo chủ đề Google News
         Topics: WORLD, NATION, BUSINESS, TECHNOLOGY, ENTERTAINMENT, SPORTS, SCIENCE, HEALTH
         """
-        try:
-            rss_url = f"{self.base_url}/topics/{topic}?hl={language}&gl={country}&ceid={country}:{language}"
-            
-            print(f"🔍 Fetching {topic} news from Google News...")
-            
-            feed = feedparser.parse(rss_url)
-            articles_data = []
-            
-            for entry in feed.entries[:max_results]:
-                text = f"{entry.title} {entry.get('summary', '')}"
-                hashtags = re.findall(r'#\w+', text)
-                hashtags = [tag[1:] for tag in hashtags]
-                
-                article_doc = {
-                    'article_id': entry.get('id', entry.link),
-                    'title': entry.title,
-                    'text': entry.get('summary', entry.title),
-                    'link': entry.link,
-                    'published': datetime(*entry.published_parsed[:6]) if hasattr(entry, 'published_parsed') else datetime.now(),
-                    'created_at': datetime(*entry.published_parsed[:6]) if hasattr(entry, 'published_parsed') else datetime.now(),
-                    'source': entry.get('source', {}).get('title', 'Google News'),
-                    'topic': topic.lower(),
-                    'hashtags': hashtags,
-                    'platform': 'google_news',
-                    'collected_at': datetime.now(),
-                    'likes': 0,
-                    'retweets': 0,
-                    'replies': 0
-                }
-                articles_data.append(article_doc)
-            
-            print(f"✅ Found {len(articles_data)} {topic} articles")
-            return articles_data
-            
-        except Exception as e:
-            print(f"❌ Error fetching topic news: {e}")
-            return []
-    
-    def save_to_mongodb(self, articles_data):
-        """Lưu vào MongoDB"""
-        if not articles_data:
-            print("ℹ️  No articles to save")
-            return
-        
-        new_articles = []
-        for article in articles_data:
-            # Check if article already exists
-            existing = self.posts_collection.find_one({'article_id': article['article_id']})
-            if not existing:
-                new_articles.append(article)
-        
-        if new_articles:
-            self.posts_collection.insert_many(new_articles)
-            print(f"💾 Saved {len(new_articles)} new articles to MongoDB")
-        else:
-            print("ℹ️  No new articles to save (all duplicates)")
-    
-    def collect_topics(self, queries, max_results_per_query=50):
-        """Thu thập dữ liệu cho nhiều chủ đề/từ khóa"""
-        total_collected = 0
-        
-        for query in queries:
-            print(f"\n{'='*60}")
-            print(f"📰 Collecting: {query}")
-            print(f"{'='*60}")
-            
-            articles = self.search_news(query, max_results=max_results_per_query)
-            self.save_to_mongodb(articles)
-            total_collected += len(articles)
-        
-        print(f"\n{'='*60}")
-        print(f"✅ Total collected: {total_collected} articles")
-        print(f"{'='*60}\n")
\ No newline at end of file
+        return self.collect(topic.lower(), max_results, incremental,
+                            language=language, country=country, topic=topic)
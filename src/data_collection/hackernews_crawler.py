@@ -1,153 +1,322 @@
 # src/data_collection/hackernews_crawler.py
 """Hacker News API Crawler"""
-import requests
-from datetime import datetime
-import time
+import math
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+from utils.html_text import html_to_text
+from data_collection.post_writer import upsert_new_posts
+from data_collection.hn_item_cache import HNItemCache
+from data_collection.base_crawler import BaseCrawler, to_datetime
+from data_collection.registry import register_crawler
 
-class HackerNewsCrawler:
-    def __init__(self, db):
-        self.db = db
-        self.posts_collection = db['posts']
+# Algolia trả tối đa 1000 hit cho một truy vấn (kể cả khi phân trang)
+ALGOLIA_HIT_CAP = 1000
+
+@register_crawler
+class HackerNewsCrawler(BaseCrawler):
+    source = 'hackernews'
+    display_name = 'Hacker News'
+    icon = '🚀'
+    source_name = 'Hacker News'
+    platform = 'hackernews'
+    key_field = 'story_id'
+    item_label = 'stories'
+    # Algolia search sắp theo độ liên quan: chỉ dedupe theo id, không dùng watermark.
+    # Lần chạy incremental dùng search_by_date (mới nhất trước) nên có watermark, xem is_newest_first
+    newest_first = False
+    default_fields = {'score': 0, 'likes': 0, 'num_comments': 0}
+    default_queries = ('AI education', 'EdTech')
+    default_max_results = 10
+
+    def __init__(self, db, max_workers=32, requests_per_second=None, counter_ttl_minutes=60,
+                 http=None, seen=None, feed_fetcher=None):
+        super().__init__(db, http=http, seen=seen)
         self.api_base = "https://hacker-news.firebaseio.com/v0"
+        self.api_host = urlparse(self.api_base).netloc
+        self.algolia_base = "https://hn.algolia.com/api/v1"
+        self.max_workers = max_workers
+        self.item_cache = HNItemCache(db, counter_ttl_minutes=counter_ttl_minutes)
+        self.backfill_collection = db['hn_backfill_slices']
+        # Rate limit theo host nằm trong HTTP client dùng chung
+        if requests_per_second:
+            self.http.rate_limiter.set_rate(self.api_host, requests_per_second)
     
-    def get_story_details(self, story_id):
-        """Lấy chi tiết một story"""
+    def _fetch_item(self, story_id):
+        """Fetch đầy đủ một item từ Firebase API (không qua cache)"""
         try:
             url = f"{self.api_base}/item/{story_id}.json"
-            response = requests.get(url, timeout=10)
+            response = self.http.get(url, timeout=10)
             response.raise_for_status()
             return response.json()
         except Exception as e:
             print(f"❌ Error fetching story {story_id}: {e}")
             return None
     
-    def search_by_keyword(self, query, max_results=100):
+    def get_story_details(self, story_id):
+        """Lấy chi tiết một story"""
+        return self.fetch_items([story_id])[0]
+    
+    def _refresh_counters(self, story_ids):
         """
-        Tìm kiếm stories theo từ khóa
-        Note: HN không có search API chính thức, phải dùng algolia
+        Refresh score/descendants theo lô qua Algolia (tối đa 100 id mỗi request).
+        Trả về danh sách id Algolia không trả về (cần fetch lại từ Firebase).
         """
-        try:
-            algolia_url = "https://hn.algolia.com/api/v1/search"
+        counters = {}
+        for start in range(0, len(story_ids), 100):
+            chunk = story_ids[start:start + 100]
             params = {
-                'query': query,
-                'tags': 'story',
-                'hitsPerPage': max_results
+                'tags': f"story,({','.join(f'story_{i}' for i in chunk)})",
+                'hitsPerPage': len(chunk),
+                'attributesToRetrieve': 'objectID,points,num_comments'
             }
-            
-            print(f"🔍 Searching Hacker News for: {query}")
-            
-            response = requests.get(algolia_url, params=params, timeout=15)
+            try:
+                response = self.http.get(f"{self.algolia_base}/search", params=params, timeout=15)
+                response.raise_for_status()
+                for hit in response.json().get('hits', []):
+                    counters[int(hit['objectID'])] = {
+                        'score': hit.get('points') or 0,
+                        'descendants': hit.get('num_comments') or 0
+                    }
+            except Exception as e:
+                print(f"⚠️  Counter refresh failed for {len(chunk)} stories: {e}")
+        
+        self.item_cache.update_counters(counters)
+        return counters, [i for i in story_ids if i not in counters]
+    
+    def fetch_items(self, story_ids):
+        """
+        Lấy nhiều item, giữ nguyên thứ tự:
+        trường bất biến đọc từ cache, chỉ refresh bộ đếm khi hết hạn, chỉ fetch đầy đủ item mới
+        """
+        items, stale_ids, missing_ids = self.item_cache.lookup(story_ids)
+        
+        refreshed = 0
+        if stale_ids:
+            counters, not_found = self._refresh_counters(stale_ids)
+            refreshed = len(counters)
+            for item_id, values in counters.items():
+                items[item_id].update(values)
+            missing_ids += not_found
+        
+        if missing_ids:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                fetched = list(executor.map(self._fetch_item, missing_ids))
+            self.item_cache.store(fetched)
+            items.update({item['id']: item for item in fetched if item and 'id' in item})
+        
+        cache_hits = len(story_ids) - len(missing_ids) - refreshed
+        print(f"   ♻️  {cache_hits} cached, {refreshed} counters refreshed "
+              f"({(len(stale_ids) + 99) // 100} requests), {len(missing_ids)} fetched")
+        return [items.get(story_id) for story_id in story_ids]
+    
+    def item_id(self, hit):
+        return f"hn_{hit['objectID']}"
+    
+    def item_time(self, hit):
+        return to_datetime(hit.get('created_at_i'))
+    
+    def parse(self, hit, query, **options):
+        """Chuyển hit Algolia thành document"""
+        return {
+            'story_id': self.item_id(hit),
+            'title': hit.get('title', ''),
+            'text': html_to_text(hit.get('story_text')),
+            'link': hit.get('url', f"https://news.ycombinator.com/item?id={hit['objectID']}"),
+            'created_at': self.item_time(hit),
+            'author': hit.get('author', 'Unknown'),
+            'hashtags': [query],
+            'score': hit.get('points', 0),
+            'likes': hit.get('points', 0),
+            'num_comments': hit.get('num_comments', 0)
+        }
+    
+    def _algolia_pages(self, endpoint, params, max_hits):
+        """Đọc lần lượt các trang Algolia tới khi đủ max_hits hoặc hết trang"""
+        hits, page, nb_hits = [], 0, 0
+        while len(hits) < max_hits:
+            response = self.http.get(f"{self.algolia_base}/{endpoint}", params=dict(params, page=page), timeout=15)
             response.raise_for_status()
-            
             data = response.json()
-            stories_data = []
-            
-            for hit in data.get('hits', []):
-                story_doc = {
-                    'story_id': f"hn_{hit['objectID']}",
-                    'title': hit.get('title', ''),
-                    'text': hit.get('story_text', hit.get('title', '')),
-                    'link': hit.get('url', f"https://news.ycombinator.com/item?id={hit['objectID']}"),
-                    'published': datetime.fromtimestamp(hit['created_at_i']) if 'created_at_i' in hit else datetime.now(),
-                    'created_at': datetime.fromtimestamp(hit['created_at_i']) if 'created_at_i' in hit else datetime.now(),
-                    'author': hit.get('author', 'Unknown'),
-                    'source': 'Hacker News',
-                    'topic': query,
-                    'hashtags': [query],
-                    'platform': 'hackernews',
-                    'collected_at': datetime.now(),
-                    'score': hit.get('points', 0),
-                    'likes': hit.get('points', 0),
-                    'num_comments': hit.get('num_comments', 0)
-                }
-                stories_data.append(story_doc)
-            
-            print(f"✅ Found {len(stories_data)} Hacker News stories")
-            return stories_data
-            
-        except Exception as e:
-            print(f"❌ Error searching Hacker News: {e}")
-            return []
+            nb_hits = data.get('nbHits', 0)
+            hits.extend(data.get('hits', []))
+            page += 1
+            if page >= data.get('nbPages', 0) or not data.get('hits'):
+                break
+        return hits[:max_hits], nb_hits
+    
+    def collect(self, query, max_results=50, incremental=True, **options):
+        # Incremental: chỉ lấy story mới hơn watermark qua search_by_date
+        options.setdefault('by_date', incremental)
+        return super().collect(query, max_results, incremental, **options)
+    
+    def is_newest_first(self, by_date=False, **options):
+        return by_date
+    
+    def fetch(self, query, max_results, watermark, by_date=False):
+        """
+        Tìm kiếm stories theo từ khóa
+        Note: HN không có search API chính thức, phải dùng algolia
+        """
+        params = {
+            'query': query,
+            'tags': 'story',
+            'hitsPerPage': min(max_results, ALGOLIA_HIT_CAP)
+        }
+        if not by_date:
+            # Kết quả sắp theo độ liên quan nên không lọc theo created_at của lần crawl trước:
+            # story đã có được bỏ qua theo id (seen filter / unique key story_id)
+            print(f"🔍 Searching Hacker News for: {query}")
+            hits, _ = self._algolia_pages('search', params, max_results)
+            return hits
+        
+        if watermark.get('created_at'):
+            params['numericFilters'] = f"created_at_i>{int(watermark['created_at'].timestamp())}"
+        print(f"🔍 Searching new Hacker News stories for: {query}")
+        hits, _ = self._algolia_pages('search_by_date', params, max_results)
+        return hits
+    
+    def search_by_keyword(self, query, max_results=100, incremental=True):
+        """Thu thập stories theo từ khóa qua Algolia (incremental: story mới từ lần trước)"""
+        return self.collect(query, max_results, incremental)
+    
+    def _fetch_slice(self, query, start, end):
+        """
+        Lấy mọi story của query trong [start, end) (epoch giây).
+        Trả về (docs, children): nếu slice vượt giới hạn 1000 hit của Algolia
+        thì chia thành các lát con đủ nhỏ (ước lượng theo nbHits) để lấy tiếp.
+        """
+        params = {
+            'query': query,
+            'tags': 'story',
+            'numericFilters': f"created_at_i>={start},created_at_i<{end}",
+            'hitsPerPage': ALGOLIA_HIT_CAP
+        }
+        hits, nb_hits = self._algolia_pages('search_by_date', params, ALGOLIA_HIT_CAP)
+        if nb_hits > ALGOLIA_HIT_CAP and end - start > 1:
+            # Chừa 20% dư cho phân bố không đều; lát con vẫn quá tải sẽ được chia tiếp
+            parts = min(end - start, max(2, math.ceil(nb_hits / (ALGOLIA_HIT_CAP * 0.8))))
+            bounds = [start + (end - start) * i // parts for i in range(parts)] + [end]
+            return [], list(zip(bounds[:-1], bounds[1:]))
+        return self.enrich([self.normalize(self.parse(hit, query), query) for hit in hits]), []
+    
+    def backfill(self, query, since, until=None, slice_days=30, max_workers=4):
+        """
+        Lấy toàn bộ lịch sử của query qua search_by_date, chia theo lát thời gian.
+        Lát quá 1000 hit được chia đôi; lát đã xong được checkpoint trong
+        hn_backfill_slices nên có thể chạy lại để tiếp tục.
+        """
+        until = until or datetime.now()
+        step = int(timedelta(days=slice_days).total_seconds())
+        start_ts, end_ts = int(since.timestamp()), int(until.timestamp())
+        initial = [(lo, min(lo + step, end_ts)) for lo in range(start_ts, end_ts, step)]
+        
+        checkpoints = {
+            (doc['start'], doc['end']): doc
+            for doc in self.backfill_collection.find({'query': query})
+        }
+        
+        print(f"⏪ Backfilling Hacker News '{query}' from {since:%Y-%m-%d} to {until:%Y-%m-%d} "
+              f"({len(initial)} slices)")
+        
+        totals = {'slices': 0, 'skipped': 0, 'splits': 0, 'fetched': 0, 'saved': 0}
+        
+        def expand(slices):
+            # Lát đã xong thì bỏ qua, lát đã từng bị chia thì đi thẳng xuống các lát con
+            pending = []
+            while slices:
+                lo, hi = slices.pop()
+                saved = checkpoints.get((lo, hi), {})
+                if saved.get('status') == 'done':
+                    totals['skipped'] += 1
+                elif saved.get('status') == 'split':
+                    slices.extend(tuple(child) for child in saved['children'])
+                else:
+                    pending.append((lo, hi))
+            return pending
+        
+        def checkpoint(lo, hi, status, hits=0, children=None):
+            self.backfill_collection.update_one(
+                {'_id': f"{query}:{lo}:{hi}"},
+                {'$set': {'query': query, 'start': lo, 'end': hi, 'status': status,
+                          'hits': hits, 'children': children or [], 'updated_at': datetime.now()}},
+                upsert=True
+            )
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._fetch_slice, query, lo, hi): (lo, hi)
+                for lo, hi in expand(initial)
+            }
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    lo, hi = futures.pop(future)
+                    try:
+                        docs, children = future.result()
+                    except Exception as e:
+                        print(f"❌ Slice {datetime.fromtimestamp(lo):%Y-%m-%d %H:%M} failed: {e}")
+                        continue
+                    
+                    if children:
+                        checkpoint(lo, hi, 'split', children=[list(child) for child in children])
+                        totals['splits'] += 1
+                        for child in children:
+                            futures[executor.submit(self._fetch_slice, query, *child)] = child
+                        continue
+                    
+                    saved = upsert_new_posts(self.posts_collection, docs, 'story_id') if docs else 0
+                    checkpoint(lo, hi, 'done', len(docs))
+                    totals['slices'] += 1
+                    totals['fetched'] += len(docs)
+                    totals['saved'] += saved
+                    print(f"   [{totals['slices']} done, {len(futures)} pending] "
+                          f"{datetime.fromtimestamp(lo):%Y-%m-%d} → {datetime.fromtimestamp(hi):%Y-%m-%d}: "
+                          f"{len(docs)} stories, {saved} new")
+        
+        print(f"✅ Backfill finished: {totals['fetched']} stories fetched, {totals['saved']} new, "
+              f"{totals['splits']} slices split, {totals['skipped']} slices already done")
+        return totals
     
     def get_top_stories(self, max_results=100):
-        """Lấy top stories từ Hacker News"""
+        """Lấy top stories từ Hacker News; lỗi được raise lại để orchestrator ghi nhận"""
         try:
             print(f"🔍 Fetching top {max_results} Hacker News stories...")
             
             # Get top story IDs
             url = f"{self.api_base}/topstories.json"
-            response = requests.get(url, timeout=15)
+            response = self.http.get(url, timeout=15)
             response.raise_for_status()
             
-            story_ids = response.json()[:max_results]
-            stories_data = []
-            
-            for i, story_id in enumerate(story_ids, 1):
-                if i % 20 == 0:
-                    print(f"   Fetched {i}/{len(story_ids)} stories...")
-                
-                story = self.get_story_details(story_id)
-                if story and story.get('type') == 'story':
-                    story_doc = {
-                        'story_id': f"hn_{story['id']}",
-                        'title': story.get('title', ''),
-                        'text': story.get('text', story.get('title', '')),
-                        'link': story.get('url', f"https://news.ycombinator.com/item?id={story['id']}"),
-                        'published': datetime.fromtimestamp(story['time']) if 'time' in story else datetime.now(),
-                        'created_at': datetime.fromtimestamp(story['time']) if 'time' in story else datetime.now(),
-                        'author': story.get('by', 'Unknown'),
-                        'source': 'Hacker News',
-                        'topic': 'top_stories',
-                        'hashtags': ['hackernews', 'top'],
-                        'platform': 'hackernews',
-                        'collected_at': datetime.now(),
-                        'score': story.get('score', 0),
-                        'likes': story.get('score', 0),
-                        'num_comments': story.get('descendants', 0)
-                    }
-                    stories_data.append(story_doc)
-                
-                # Be nice to API
-                time.sleep(0.1)
+            top_ids = response.json()[:max_results]
+            # Chỉ kiểm tra: save_to_mongodb đánh dấu sau khi lưu, story lỗi vẫn được thử lại
+            story_ids = [sid for sid in top_ids if not self.seen.contains(self.source, f"hn_{sid}")]
+            # Mỗi id đã thấy là một lần fetch item không cần gửi
+            self.seen.record_round_trips(len(top_ids) - len(story_ids))
+            stories_data = self.enrich([
+                self.normalize(self._story_to_doc(story), 'top_stories')
+                for story in self.fetch_items(story_ids)
+                if story and story.get('type') == 'story'
+            ])
             
             print(f"✅ Found {len(stories_data)} top stories")
             return stories_data
             
         except Exception as e:
             print(f"❌ Error fetching top stories: {e}")
-            return []
+            raise
     
-    def save_to_mongodb(self, stories_data):
-        """Lưu vào MongoDB"""
-        if not stories_data:
-            print("ℹ️  No stories to save")
-            return
-        
-        new_stories = []
-        for story in stories_data:
-            existing = self.posts_collection.find_one({'story_id': story['story_id']})
-            if not existing:
-                new_stories.append(story)
-        
-        if new_stories:
-            self.posts_collection.insert_many(new_stories)
-            print(f"💾 Saved {len(new_stories)} new Hacker News stories")
-        else:
-            print("ℹ️  No new stories to save")
-    
-    def collect_topics(self, queries, max_results_per_query=50):
-        """Thu thập dữ liệu cho nhiều từ khóa"""
-        total_collected = 0
-        
-        for query in queries:
-            print(f"\n{'='*60}")
-            print(f"🚀 Collecting Hacker News: {query}")
-            print(f"{'='*60}")
-            
-            stories = self.search_by_keyword(query, max_results=max_results_per_query)
-            self.save_to_mongodb(stories)
-            total_collected += len(stories)
-        
-        print(f"\n{'='*60}")
-        print(f"✅ Total Hacker News stories: {total_collected}")
-        print(f"{'='*60}\n")
\ No newline at end of file
+    def _story_to_doc(self, story):
+        """Chuyển item từ Firebase API thành document"""
+        return {
+            'story_id': f"hn_{story['id']}",
+            'title': story.get('title', ''),
+            'text': html_to_text(story.get('text')),
+            'link': story.get('url', f"https://news.ycombinator.com/item?id={story['id']}"),
+            'created_at': to_datetime(story.get('time')),
+            'author': story.get('by', 'Unknown'),
+            'hashtags': ['hackernews', 'top'],
+            'score': story.get('score', 0),
+            'likes': story.get('score', 0),
+            'num_comments': story.get('descendants', 0)
+        }
@@ -0,0 +1,75 @@
+"""MongoDB-backed cache for Hacker News items with per-field freshness"""
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+
+# Chỉ các bộ đếm này thay đổi sau khi item được đăng
+VOLATILE_FIELDS = ('score', 'descendants')
+
+
+class HNItemCache:
+    def __init__(self, db, counter_ttl_minutes=60, freeze_after_days=14):
+        self.collection = db['hn_items']
+        self.counter_ttl = timedelta(minutes=counter_ttl_minutes)
+        self.freeze_after = timedelta(days=freeze_after_days)
+
+    def _counters_fresh(self, doc, now):
+        """Bộ đếm còn mới nếu vừa refresh, hoặc item đã quá cũ để còn thay đổi"""
+        refreshed_at = doc.get('counters_refreshed_at')
+        if refreshed_at is None:
+            return False
+        if now - refreshed_at < self.counter_ttl:
+            return True
+        posted_at = datetime.fromtimestamp(doc['item'].get('time', 0))
+        return refreshed_at >= posted_at + self.freeze_after
+
+    def lookup(self, item_ids):
+        """
+        Tra cache cho danh sách id.
+        Trả về (items, stale_ids, missing_ids):
+          items       - {id: item} cho các item có trong cache (bộ đếm có thể cũ)
+          stale_ids   - id có trong cache nhưng cần refresh score/descendants
+          missing_ids - id chưa từng được fetch
+        """
+        now = datetime.now()
+        items, stale_ids = {}, []
+
+        for doc in self.collection.find({'_id': {'$in': list(item_ids)}}):
+            item = dict(doc['item'], **{f: doc.get(f, 0) for f in VOLATILE_FIELDS})
+            items[doc['_id']] = item
+            if not self._counters_fresh(doc, now):
+                stale_ids.append(doc['_id'])
+
+        missing_ids = [item_id for item_id in item_ids if item_id not in items]
+        return items, stale_ids, missing_ids
+
+    def store(self, items):
+        """Lưu item đầy đủ vừa fetch (trường bất biến + bộ đếm)"""
+        now = datetime.now()
+        operations = []
+        for item in items:
+            if not item or 'id' not in item:
+                continue
+            # 'kids' cũng thay đổi theo thời gian và không được dùng nên bỏ qua
+            immutable = {k: v for k, v in item.items() if k not in VOLATILE_FIELDS and k != 'kids'}
+            operations.append(UpdateOne(
+                {'_id': item['id']},
+                {'$set': dict(
+                    {f: item.get(f, 0) for f in VOLATILE_FIELDS},
+                    item=immutable,
+                    fetched_at=now,
+                    counters_refreshed_at=now
+                )},
+                upsert=True
+            ))
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+
+    def update_counters(self, counters):
+        """Cập nhật bộ đếm {id: {'score': .., 'descendants': ..}} cho item đã có"""
+        now = datetime.now()
+        operations = [
+            UpdateOne({'_id': item_id}, {'$set': dict(values, counters_refreshed_at=now)})
+            for item_id, values in counters.items()
+        ]
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
@@ -0,0 +1,179 @@
+"""Shared pooled HTTP client for all crawlers"""
+import threading
+from collections import defaultdict
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from data_collection.rate_limiter import RateLimiter, DEFAULT_HOST_LIMITS, parse_retry_after, \
+    parse_ratelimit_reset
+
+try:
+    import brotli  # noqa: F401  (urllib3 tự giải nén 'br' khi có brotli)
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+DEFAULT_USER_AGENT = 'social-media-analysis/2.0 (+https://github.com/TrumBeoo/social_media_analysis)'
+
+
+class InstrumentedSession(requests.Session):
+    """
+    requests.Session có timeout mặc định, rate limit theo host và đếm
+    request/bytes/latency theo host. Mọi request (kể cả của PRAW) đi qua send().
+    """
+
+    def __init__(self, default_timeout, rate_limiter, max_throttle_retries=3, stats=None, stats_lock=None):
+        super().__init__()
+        self.default_timeout = default_timeout
+        self.rate_limiter = rate_limiter
+        self.max_throttle_retries = max_throttle_retries
+        # Session con (create_session) ghi chung thống kê với session gốc
+        self.stats = stats if stats is not None else \
+            defaultdict(lambda: {'requests': 0, 'errors': 0, 'bytes': 0, 'latency': 0.0})
+        self._stats_lock = stats_lock or threading.Lock()
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.default_timeout
+        host = urlparse(request.url).netloc
+
+        for attempt in range(self.max_throttle_retries + 1):
+            self.rate_limiter.acquire(host)
+            try:
+                response = super().send(request, **kwargs)
+            except requests.RequestException:
+                with self._stats_lock:
+                    self.stats[host]['errors'] += 1
+                raise
+
+            if response.status_code != 429:
+                self._observe_limits(host, response)
+                break
+            # Bị throttle: giảm tốc độ host, chờ theo Retry-After rồi gửi lại
+            self.rate_limiter.penalize(host, parse_retry_after(response.headers.get('Retry-After')))
+            if attempt < self.max_throttle_retries:
+                response.close()
+
+        # Với stream=True body chưa được đọc, người gọi tự cộng bytes qua record_bytes()
+        received = 0
+        if not kwargs.get('stream'):
+            received = response.raw.tell() if hasattr(response.raw, 'tell') else len(response.content)
+
+        with self._stats_lock:
+            stats = self.stats[host]
+            stats['requests'] += 1
+            stats['bytes'] += received
+            stats['latency'] += response.elapsed.total_seconds()
+            if response.status_code >= 400:
+                stats['errors'] += 1
+        return response
+
+    def _observe_limits(self, host, response):
+        """Điều chỉnh rate limiter theo response thành công hoặc header quota"""
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if response.status_code == 503 and retry_after is not None:
+            self.rate_limiter.pause(host, retry_after)
+            return
+
+        # Reddit (và nhiều API khác) báo quota còn lại qua X-Ratelimit-*
+        remaining = response.headers.get('X-Ratelimit-Remaining')
+        reset = parse_ratelimit_reset(response.headers.get('X-Ratelimit-Reset'))
+        if remaining is not None and reset is not None:
+            try:
+                if float(remaining) < 1:
+                    self.rate_limiter.pause(host, reset)
+            except ValueError:
+                pass
+        self.rate_limiter.reward(host)
+
+    def record_bytes(self, url, received):
+        with self._stats_lock:
+            self.stats[urlparse(url).netloc]['bytes'] += received
+
+
+class HttpClient:
+    def __init__(self, pool_connections=20, pool_maxsize=32, timeout=(5, 15),
+                 retries=3, backoff_factor=0.5, user_agent=DEFAULT_USER_AGENT,
+                 requests_per_second=10, host_limits=None):
+        self.rate_limiter = RateLimiter(
+            requests_per_second=requests_per_second,
+            host_limits=dict(DEFAULT_HOST_LIMITS, **(host_limits or {}))
+        )
+        self.timeout = timeout
+        self.session = InstrumentedSession(default_timeout=timeout, rate_limiter=self.rate_limiter)
+        self.session.headers.update({
+            'User-Agent': user_agent,
+            'Accept-Encoding': ACCEPT_ENCODING
+        })
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            # 429 / Retry-After do InstrumentedSession xử lý qua rate limiter dùng chung
+            respect_retry_after_header=False,
+            raise_on_status=False
+        )
+        # urllib3 giữ một connection pool riêng cho mỗi host
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+
+    def create_session(self):
+        """
+        Session riêng cho thư viện tự sửa header của session (PRAW ghi đè User-Agent),
+        vẫn dùng chung connection pool, rate limiter và thống kê với session chính
+        """
+        session = InstrumentedSession(
+            default_timeout=self.timeout, rate_limiter=self.rate_limiter,
+            stats=self.session.stats, stats_lock=self.session._stats_lock
+        )
+        session.headers.update(self.session.headers)
+        session.mount('https://', self.adapter)
+        session.mount('http://', self.adapter)
+        return session
+
+    def get(self, url, **kwargs):
+        return self.session.get(url, **kwargs)
+
+    def get_stats(self):
+        """Thống kê theo host: requests, errors, bytes, avg_latency_ms, throttled, waited"""
+        limiter_stats = dict(self.rate_limiter.stats)
+        with self.session._stats_lock:
+            return {
+                host: dict(
+                    stats,
+                    avg_latency_ms=round(stats['latency'] / stats['requests'] * 1000, 1) if stats['requests'] else 0.0,
+                    throttled=limiter_stats.get(host, {}).get('throttled', 0),
+                    waited=limiter_stats.get(host, {}).get('waited', 0.0)
+                )
+                for host, stats in self.session.stats.items()
+            }
+
+    def print_stats(self):
+        """In bảng thống kê HTTP theo host"""
+        stats = self.get_stats()
+        if not stats:
+            return
+        print("\n🌐 HTTP usage by host:")
+        print(f"  {'host':35s} {'requests':>9s} {'errors':>7s} {'KB':>10s} {'avg ms':>8s} "
+              f"{'429s':>5s} {'wait s':>7s}")
+        for host, s in sorted(stats.items(), key=lambda item: -item[1]['requests']):
+            print(f"  {host[:35]:35s} {s['requests']:>9,} {s['errors']:>7,} "
+                  f"{s['bytes'] / 1024:>10,.1f} {s['avg_latency_ms']:>8.1f} "
+                  f"{s['throttled']:>5,} {s['waited']:>7.1f}")
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client():
+    """HttpClient dùng chung cho toàn bộ process"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient()
+        return _shared_client
@@ -1,130 +1,68 @@
 # src/data_collection/medium_crawler.py
 """Medium RSS Crawler"""
-import feedparser
-from datetime import datetime
-import re
-from bs4 import BeautifulSoup
+from utils.html_text import html_to_text
+from data_collection.base_crawler import BaseCrawler, to_datetime
+from data_collection.feed_fetcher import FeedFetcher
+from data_collection.registry import register_crawler
 
-class MediumCrawler:
-    def __init__(self, db):
-        self.db = db
-        self.posts_collection = db['posts']
+@register_crawler
+class MediumCrawler(BaseCrawler):
+    source = 'medium'
+    display_name = 'Medium'
+    icon = '📝'
+    source_name = 'Medium'
+    platform = 'medium'
+    key_field = 'article_id'
+    item_label = 'articles'
+    # Feed sắp mới nhất trước: gặp bài đã thấy thì phần còn lại đều cũ
+    newest_first = True
+    default_fields = {'likes': 0, 'num_comments': 0}
+    default_queries = ('artificial-intelligence', 'machine-learning')
+    default_max_results = 10
+
+    def __init__(self, db, http=None, feed_fetcher=None, seen=None):
+        super().__init__(db, http=http, seen=seen)
+        self.feed_fetcher = feed_fetcher or FeedFetcher(db, self.http)
     
-    def get_tag_feed(self, tag, max_results=50):
-        """Thu thập bài viết từ Medium tag"""
-        try:
-            rss_url = f"https://medium.com/feed/tag/{tag}"
-            print(f"🔍 Fetching Medium articles for tag: {tag}")
-            
-            feed = feedparser.parse(rss_url)
-            articles_data = []
-            
-            for entry in feed.entries[:max_results]:
-                # Clean HTML from content
-                soup = BeautifulSoup(entry.get('summary', ''), 'html.parser')
-                clean_text = soup.get_text(separator=' ', strip=True)
-                
-                # Extract hashtags
-                hashtags = re.findall(r'#\w+', clean_text)
-                hashtags = [tag[1:] for tag in hashtags]
-                
-                article_doc = {
-                    'article_id': entry.get('id', entry.link),
-                    'title': entry.title,
-                    'text': clean_text[:2000],  # Limit text length
-                    'link': entry.link,
-                    'published': datetime(*entry.published_parsed[:6]) if hasattr(entry, 'published_parsed') else datetime.now(),
-                    'created_at': datetime(*entry.published_parsed[:6]) if hasattr(entry, 'published_parsed') else datetime.now(),
-                    'author': entry.get('author', 'Unknown'),
-                    'source': 'Medium',
-                    'topic': tag,
-                    'hashtags': hashtags,
-                    'platform': 'medium',
-                    'collected_at': datetime.now(),
-                    'likes': 0,
-                    'num_comments': 0
-                }
-                articles_data.append(article_doc)
-            
-            print(f"✅ Found {len(articles_data)} Medium articles for '{tag}'")
-            return articles_data
-            
-        except Exception as e:
-            print(f"❌ Error fetching Medium articles: {e}")
-            return []
+    def fetch(self, query, max_results, watermark, publication=False):
+        """Entry của feed tag (hoặc publication); None nếu feed không đổi"""
+        if publication:
+            rss_url = f"https://medium.com/feed/{query}"
+            print(f"🔍 Fetching from Medium publication: {query}")
+        else:
+            rss_url = f"https://medium.com/feed/tag/{query}"
+            print(f"🔍 Fetching Medium articles for tag: {query}")
+        
+        return self.fetch_feed(query, rss_url, max_results, stop=self.watermarks.feed_stop(watermark))
     
-    def get_publication_feed(self, publication, max_results=50):
-        """Thu thập bài viết từ Medium publication"""
-        try:
-            rss_url = f"https://medium.com/feed/{publication}"
-            print(f"🔍 Fetching from Medium publication: {publication}")
-            
-            feed = feedparser.parse(rss_url)
-            articles_data = []
-            
-            for entry in feed.entries[:max_results]:
-                soup = BeautifulSoup(entry.get('summary', ''), 'html.parser')
-                clean_text = soup.get_text(separator=' ', strip=True)
-                
-                hashtags = re.findall(r'#\w+', clean_text)
-                hashtags = [tag[1:] for tag in hashtags]
-                
-                article_doc = {
-                    'article_id': entry.get('id', entry.link),
-                    'title': entry.title,
-                    'text': clean_text[:2000],
-                    'link': entry.link,
-                    'published': datetime(*entry.published_parsed[:6]) if hasattr(entry, 'published_parsed') else datetime.now(),
-                    'created_at': datetime(*entry.published_parsed[:6]) if hasattr(entry, 'published_parsed') else datetime.now(),
-                    'author': entry.get('author', 'Unknown'),
-                    'source': f'Medium - {publication}',
-                    'topic': publication,
-                    'hashtags': hashtags,
-                    'platform': 'medium',
-                    'collected_at': datetime.now(),
-                    'likes': 0,
-                    'num_comments': 0
-                }
-                articles_data.append(article_doc)
-            
-            print(f"✅ Found {len(articles_data)} articles from '{publication}'")
-            return articles_data
-            
-        except Exception as e:
-            print(f"❌ Error fetching publication feed: {e}")
-            return []
+    def item_id(self, entry):
+        return entry.get('id', entry.link)
     
-    def save_to_mongodb(self, articles_data):
-        """Lưu vào MongoDB"""
-        if not articles_data:
-            print("ℹ️  No articles to save")
-            return
-        
-        new_articles = []
-        for article in articles_data:
-            existing = self.posts_collection.find_one({'article_id': article['article_id']})
-            if not existing:
-                new_articles.append(article)
-        
-        if new_articles:
-            self.posts_collection.insert_many(new_articles)
-            print(f"💾 Saved {len(new_articles)} new Medium articles")
-        else:
-            print("ℹ️  No new articles to save")
+    def item_time(self, entry):
+        return to_datetime(entry.get('published_parsed'))
     
-    def collect_topics(self, tags, max_results_per_tag=50):
-        """Thu thập dữ liệu cho nhiều tags"""
-        total_collected = 0
-        
-        for tag in tags:
-            print(f"\n{'='*60}")
-            print(f"📝 Collecting Medium: {tag}")
-            print(f"{'='*60}")
-            
-            articles = self.get_tag_feed(tag, max_results=max_results_per_tag)
-            self.save_to_mongodb(articles)
-            total_collected += len(articles)
-        
-        print(f"\n{'='*60}")
-        print(f"✅ Total Medium articles: {total_collected}")
-        print(f"{'='*60}\n")
\ No newline at end of file
+    def item_url(self, entry):
+        return entry.link
+    
+    def doc_url(self, doc):
+        return doc['link']
+    
+    def parse(self, entry, query, publication=False):
+        return {
+            'article_id': self.item_id(entry),
+            'title': entry.title,
+            # Clean HTML from content (không dựng cây, dừng khi đủ 2000 ký tự)
+            'text': html_to_text(entry.get('summary', ''), limit=2000),
+            'link': entry.link,
+            'created_at': self.item_time(entry),
+            'author': entry.get('author', 'Unknown'),
+            'source': f'Medium - {query}' if publication else 'Medium'
+        }
+    
+    def get_tag_feed(self, tag, max_results=50, incremental=True):
+        """Thu thập bài viết từ Medium tag"""
+        return self.collect(tag, max_results, incremental)
+    
+    def get_publication_feed(self, publication, max_results=50, incremental=True):
+        """Thu thập bài viết từ Medium publication"""
+        return self.collect(publication, max_results, incremental, publication=True)
@@ -0,0 +1,141 @@
+"""Run crawler queries from several sources concurrently"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from data_collection.rate_limiter import RateLimiter
+
+# Số query chạy song song cho mỗi nguồn (PRAW không thread-safe nên Reddit = 1)
+DEFAULT_CONCURRENCY = {
+    'google_news': 3,
+    'medium': 3,
+    'stackoverflow': 2,
+    'hackernews': 4,
+    'reddit': 1
+}
+
+# Số query được bắt đầu mỗi giây cho từng nguồn
+DEFAULT_QUERIES_PER_SECOND = {
+    'google_news': 2,
+    'medium': 2,
+    'stackoverflow': 1,
+    'hackernews': 5,
+    'reddit': 1
+}
+
+
+class CollectionOrchestrator:
+    def __init__(self, concurrency=None, queries_per_second=None):
+        self.concurrency = dict(DEFAULT_CONCURRENCY, **(concurrency or {}))
+        self.rate_limiter = RateLimiter(
+            requests_per_second=2,
+            host_limits=dict(DEFAULT_QUERIES_PER_SECOND, **(queries_per_second or {}))
+        )
+        self.jobs = []
+        self.results = {}
+        self.timings = []
+        self.wall_time = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, source, label, fetch, save, *args, **kwargs):
+        """Đăng ký một query: docs = fetch(*args, **kwargs), sau đó save(docs)"""
+        self.jobs.append({
+            'source': source, 'label': label,
+            'fetch': fetch, 'save': save, 'args': args, 'kwargs': kwargs
+        })
+
+    def add_crawler(self, crawler, query, **kwargs):
+        """Đăng ký một query của crawler (BaseCrawler): crawler.collect rồi crawler.save_to_mongodb"""
+        self.add(crawler.source, query, crawler.collect, crawler.save_to_mongodb, query, **kwargs)
+
+    def _run_job(self, job, started_at):
+        self.rate_limiter.acquire(job['source'])
+        start = time.perf_counter()
+        fetched = saved = 0
+        error = None
+        try:
+            docs = job['fetch'](*job['args'], **job['kwargs'])
+            fetched = len(docs)
+            saved = job['save'](docs) or 0
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        end = time.perf_counter()
+
+        with self._lock:
+            stats = self.results[job['source']]
+            stats['jobs'] += 1
+            stats['fetched'] += fetched
+            stats['saved'] += saved
+            if error:
+                stats['failed'] += 1
+                stats['errors'].append(f"{job['label']}: {error}")
+            self.timings.append({
+                'source': job['source'],
+                'label': job['label'],
+                'worker': threading.current_thread().name,
+                'start': start - started_at,
+                'end': end - started_at
+            })
+
+    def run(self):
+        """Chạy mọi query đã đăng ký; trả về thống kê theo nguồn"""
+        self.results = {
+            job['source']: {'jobs': 0, 'failed': 0, 'fetched': 0, 'saved': 0, 'errors': []}
+            for job in self.jobs
+        }
+        self.timings = []
+
+        # Mỗi nguồn một thread pool riêng để giới hạn song song theo nguồn
+        executors = {
+            source: ThreadPoolExecutor(
+                max_workers=self.concurrency.get(source, 1),
+                thread_name_prefix=source
+            )
+            for source in self.results
+        }
+        started_at = time.perf_counter()
+        try:
+            futures = [
+                executors[job['source']].submit(self._run_job, job, started_at)
+                for job in self.jobs
+            ]
+            wait(futures)
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True)
+        self.wall_time = time.perf_counter() - started_at
+        return self.results
+
+    def critical_path(self):
+        """Chuỗi job trên worker kết thúc muộn nhất, chính là thứ quyết định tổng thời gian"""
+        if not self.timings:
+            return []
+        last = max(self.timings, key=lambda t: t['end'])
+        return sorted(
+            (t for t in self.timings if t['worker'] == last['worker']),
+            key=lambda t: t['start']
+        )
+
+    def print_report(self):
+        """In kết quả, lỗi và thời gian theo nguồn kèm critical path"""
+        if not self.results:
+            return
+        print(f"\n⏱️  Collection finished in {self.wall_time:.1f}s")
+        print(f"  {'source':15s} {'jobs':>5s} {'failed':>7s} {'fetched':>8s} {'saved':>6s} "
+              f"{'wall s':>7s} {'busy s':>7s}")
+        for source, stats in self.results.items():
+            source_timings = [t for t in self.timings if t['source'] == source]
+            wall = max((t['end'] for t in source_timings), default=0.0) - \
+                min((t['start'] for t in source_timings), default=0.0)
+            busy = sum(t['end'] - t['start'] for t in source_timings)
+            print(f"  {source:15s} {stats['jobs']:>5} {stats['failed']:>7} {stats['fetched']:>8,} "
+                  f"{stats['saved']:>6,} {wall:>7.1f} {busy:>7.1f}")
+
+        for source, stats in self.results.items():
+            for error in stats['errors']:
+                print(f"  ❌ {source} - {error}")
+
+        path = self.critical_path()
+        if path:
+            print(f"\n  Critical path ({path[0]['source']}, ends at {path[-1]['end']:.1f}s):")
+            for t in path:
+                print(f"    {t['start']:>6.1f}s → {t['end']:>6.1f}s  {t['label']}")
@@ -0,0 +1,241 @@
+"""Single-pass HTML parsing for URLCrawler: one tree, one meta scan per page"""
+import re
+from datetime import datetime
+from functools import lru_cache
+import soupsieve
+from bs4 import BeautifulSoup, Tag
+from data_collection.content_extractor import extract_main_content
+from utils.html_text import extract_hashtags
+
+try:
+    import lxml  # noqa: F401
+    DEFAULT_PARSER = 'lxml'
+except ImportError:
+    DEFAULT_PARSER = 'html.parser'
+
+TWEET_SELECTORS = (
+    '[data-testid="tweetText"]',
+    '.tweet-text',
+    '.js-tweet-text',
+    '.TweetTextSize'
+)
+REDDIT_SELECTORS = (
+    '[data-testid="post-content"]',
+    '.usertext-body',
+    '.md',
+    '.Post',
+    '[data-click-id="text"]'
+)
+FACEBOOK_SELECTORS = (
+    '[data-testid="post_message"]',
+    '.userContent',
+    '.text_exposed_root'
+)
+
+
+# tag, #id, .class hoặc [attr] / [attr="value"]: đủ cho mọi selector của crawler
+SIMPLE_SELECTOR = re.compile(r'^(?P<tag>[\w-]+)?(?:#(?P<id>[\w-]+))?(?:\.(?P<cls>[\w-]+))?'
+                             r'(?:\[(?P<attr>[\w-]+)(?:="(?P<value>[^"]*)")?\])?$')
+
+
+@lru_cache(maxsize=None)
+def _compile_selectors(selectors):
+    """Mỗi selector thành hàm match(tag); selector phức tạp dùng soupsieve"""
+    matchers = []
+    for selector in selectors:
+        parts = SIMPLE_SELECTOR.match(selector)
+        if not parts or not any(parts.groupdict().values()):
+            matchers.append(soupsieve.compile(selector).match)
+            continue
+        tag, id_, cls, attr, value = parts.group('tag', 'id', 'cls', 'attr', 'value')
+
+        def match(el, tag=tag, id_=id_, cls=cls, attr=attr, value=value):
+            if tag and el.name != tag:
+                return False
+            if id_ and el.get('id') != id_:
+                return False
+            if cls and cls not in el.get('class', ()):
+                return False
+            if attr:
+                actual = el.get(attr)
+                if actual is None or (value is not None and actual != value):
+                    return False
+            return True
+        matchers.append(match)
+    return matchers
+
+
+def select_first(soup, selectors):
+    """
+    Phần tử khớp selector có độ ưu tiên cao nhất (thứ tự trong selectors),
+    giống select_one lần lượt từng selector nhưng chỉ duyệt cây một lần.
+    """
+    matchers = _compile_selectors(tuple(selectors))
+    best, best_rank = None, len(matchers)
+    for element in soup.descendants:
+        if not isinstance(element, Tag):
+            continue
+        for rank in range(best_rank):
+            if matchers[rank](element):
+                best, best_rank = element, rank
+                break
+        if best_rank == 0:
+            break
+    return best
+
+
+def collect_meta(soup):
+    """Tất cả thẻ meta trong một lần duyệt; 'property' được ưu tiên hơn 'name' khi trùng key"""
+    by_name, by_property = {}, {}
+    for tag in soup.find_all('meta'):
+        content = tag.get('content')
+        if content is None:
+            continue
+        if tag.get('property'):
+            by_property.setdefault(tag['property'], content.strip())
+        if tag.get('name'):
+            by_name.setdefault(tag['name'], content.strip())
+    by_name.update(by_property)
+    return by_name
+
+
+def _clean_text(text, limit=3000):
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text[:limit] + "..." if len(text) > limit else text
+
+
+def parse_twitter(soup, meta, url):
+    text = meta.get('og:description') or meta.get('twitter:description') or meta.get('description') or ''
+
+    # Try to get more content from page structure
+    if len(text) < 10:
+        tweet_element = select_first(soup, TWEET_SELECTORS)
+        if tweet_element:
+            text = tweet_element.get_text(strip=True)
+
+    return {
+        'text': text or 'No tweet content extracted',
+        'title': meta.get('og:title') or 'Twitter Post',
+        'created_at': datetime.now(),
+        'likes': 0,
+        'retweets': 0,
+        'replies': 0,
+        'hashtags': extract_hashtags(text),
+        'platform': 'twitter',
+        'url': url
+    }
+
+
+def parse_reddit(soup, meta, url):
+    title = meta.get('og:title') or ''
+    description = meta.get('og:description') or ''
+
+    content_element = select_first(soup, REDDIT_SELECTORS)
+    post_content = content_element.get_text(separator=' ', strip=True) if content_element else ''
+
+    full_text_parts = [part for part in (title, post_content or description) if part]
+
+    return {
+        'title': title or 'Reddit Post',
+        'text': '\n\n'.join(full_text_parts) if full_text_parts else 'No content extracted',
+        'created_at': datetime.now(),
+        'score': 0,
+        'num_comments': 0,
+        'platform': 'reddit',
+        'url': url
+    }
+
+
+def parse_facebook(soup, meta, url):
+    text = meta.get('og:description') or meta.get('twitter:description') or meta.get('description') or ''
+
+    if len(text) < 20:
+        content_element = select_first(soup, FACEBOOK_SELECTORS)
+        if content_element:
+            text = content_element.get_text(strip=True)
+
+    return {
+        'text': text or 'No content extracted',
+        'title': meta.get('og:title') or 'Facebook Post',
+        'created_at': datetime.now(),
+        'likes': 0,
+        'platform': 'facebook',
+        'url': url
+    }
+
+
+def parse_medium(soup, meta, url):
+    text = extract_main_content(soup)
+
+    # Fallback to meta description
+    if len(text) < 50:
+        text = meta.get('og:description') or ''
+
+    return {
+        'title': meta.get('og:title') or 'Medium Article',
+        'text': _clean_text(text) or 'No content extracted',
+        'created_at': datetime.now(),
+        'platform': 'medium',
+        'author': meta.get('author') or 'Unknown',
+        'url': url
+    }
+
+
+def parse_generic(soup, meta, url):
+    # Khối nội dung chính chấm điểm theo mật độ text/link, một lần duyệt cây
+    text = extract_main_content(soup)
+
+    # Final fallback: get all text
+    if len(text) < 20:
+        text = soup.get_text(separator=' ', strip=True)
+
+    h1 = soup.find('h1')
+    title = (meta.get('og:title') or
+             meta.get('twitter:title') or
+             (soup.title.string.strip() if soup.title and soup.title.string else '') or
+             (h1.get_text(strip=True) if h1 else ''))
+    title = re.sub(r'\s+', ' ', title).strip()[:200]
+
+    description = meta.get('og:description') or meta.get('twitter:description') or meta.get('description') or ''
+
+    text = _clean_text(text)
+    return {
+        'title': title or 'Untitled',
+        'text': text or description or 'No content extracted',
+        'description': description,
+        'created_at': datetime.now(),
+        'platform': 'web',
+        'url': url
+    }
+
+
+PLATFORM_PARSERS = {
+    'twitter.com': parse_twitter,
+    'x.com': parse_twitter,
+    'reddit.com': parse_reddit,
+    'facebook.com': parse_facebook,
+    'medium.com': parse_medium,
+    'generic': parse_generic
+}
+
+
+def identify_platform(domain):
+    """Xác định platform từ domain"""
+    for platform in PLATFORM_PARSERS:
+        if platform in domain:
+            return platform
+    return 'generic'
+
+
+def parse_page(html, url, platform, parser=DEFAULT_PARSER):
+    """Parse trang đúng một lần và trích xuất post theo platform"""
+    soup = BeautifulSoup(html, parser)
+    meta = collect_meta(soup)
+    post_data = PLATFORM_PARSERS.get(platform, parse_generic)(soup, meta, url)
+
+    if not post_data.get('text'):
+        # Fallback trên chính cây đã parse
+        fallback_text = soup.get_text(separator=' ', strip=True)[:500]
+        if fallback_text:
+            post_data['text'] = f"[Fallback extraction] {fallback_text}"
+    return post_data
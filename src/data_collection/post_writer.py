@@ -0,0 +1,29 @@
+"""Batch upsert of crawled posts relying on unique indexes for dedupe"""
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from utils.minhash import add_minhash
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+def upsert_new_posts(collection, posts, key_field):
+    """
+    Chèn các post chưa có (theo key_field) trong một round trip.
+    $setOnInsert không đụng tới document đã tồn tại; lỗi duplicate key do
+    nhiều crawler chạy song song cùng upsert một item được bỏ qua.
+    Trả về số post thực sự được thêm mới.
+    """
+    operations = [
+        UpdateOne({key_field: post[key_field]}, {'$setOnInsert': post}, upsert=True)
+        for post in add_minhash(posts)
+    ]
+    if not operations:
+        return 0
+
+    try:
+        result = collection.bulk_write(operations, ordered=False)
+        return result.upserted_count
+    except BulkWriteError as e:
+        if any(err['code'] != DUPLICATE_KEY_ERROR for err in e.details['writeErrors']):
+            raise
+        return e.details['nUpserted']
@@ -0,0 +1,141 @@
+"""Per-host token-bucket rate limiting shared by crawler threads"""
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Giới hạn công bố của các API (request/giây); host khác dùng mức mặc định
+DEFAULT_HOST_LIMITS = {
+    'hacker-news.firebaseio.com': 150,
+    'hn.algolia.com': 2.5,             # 10.000 request/giờ mỗi IP
+    'api.stackexchange.com': 25,       # tối đa 30 request/giây mỗi IP
+    'oauth.reddit.com': 1,             # 60 request/phút với OAuth
+    'www.reddit.com': 1,
+    'news.google.com': 5,
+    'medium.com': 5
+}
+
+
+# Header do server bất kỳ gửi về (kể cả trang crawl qua URLCrawler): không chờ quá 15 phút
+MAX_PAUSE_SECONDS = 900
+
+# Giá trị reset lớn hơn mốc này là epoch timestamp chứ không phải số giây
+EPOCH_THRESHOLD = 1e9
+
+
+def parse_retry_after(value):
+    """Retry-After dạng số giây hoặc HTTP-date -> số giây cần chờ (tối đa MAX_PAUSE_SECONDS)"""
+    if not value:
+        return None
+    try:
+        return min(MAX_PAUSE_SECONDS, max(0.0, float(value)))
+    except ValueError:
+        pass
+    try:
+        seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        return min(MAX_PAUSE_SECONDS, max(0.0, seconds))
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_ratelimit_reset(value):
+    """X-Ratelimit-Reset dạng số giây còn lại hoặc epoch timestamp -> số giây cần chờ"""
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        return None
+    if seconds > EPOCH_THRESHOLD:
+        seconds -= time.time()
+    return min(MAX_PAUSE_SECONDS, max(0.0, seconds))
+
+
+class RateLimiter:
+    """
+    Token bucket cho từng host, an toàn khi dùng đa luồng.
+    Tốc độ giảm một nửa khi bị throttle (429) và tăng dần lại khi request
+    thành công (AIMD), không vượt quá giới hạn cấu hình của host.
+    """
+
+    def __init__(self, requests_per_second=10, host_limits=None, min_rate=0.2, recovery_steps=20):
+        self.default_rate = requests_per_second
+        self.host_limits = host_limits or {}
+        self.min_rate = min_rate
+        self.recovery_steps = recovery_steps
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.stats = defaultdict(lambda: {'throttled': 0, 'waited': 0.0})
+
+    def _bucket(self, host, now):
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            max_rate = self.host_limits.get(host, self.default_rate)
+            bucket = self._buckets[host] = {
+                'max_rate': max_rate,
+                'rate': max_rate,
+                'capacity': max(1.0, max_rate),
+                'tokens': max(1.0, max_rate),
+                'updated': now,
+                'blocked_until': 0.0
+            }
+        else:
+            elapsed = now - bucket['updated']
+            bucket['tokens'] = min(bucket['capacity'], bucket['tokens'] + elapsed * bucket['rate'])
+            bucket['updated'] = now
+        return bucket
+
+    def set_rate(self, host, requests_per_second):
+        """Đặt giới hạn tối đa cho host"""
+        with self._lock:
+            self.host_limits[host] = requests_per_second
+            self._buckets.pop(host, None)
+
+    def acquire(self, host):
+        """Chờ tới khi host còn token (và không bị tạm dừng) rồi lấy một token"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                bucket = self._bucket(host, now)
+                delay = bucket['blocked_until'] - now
+                if delay <= 0:
+                    if bucket['tokens'] >= 1:
+                        bucket['tokens'] -= 1
+                        if waited:
+                            self.stats[host]['waited'] += waited
+                        return
+                    delay = (1 - bucket['tokens']) / bucket['rate']
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, host, seconds):
+        """Không gửi request tới host trong `seconds` giây (Retry-After, backoff)"""
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._bucket(host, now)
+            bucket['blocked_until'] = max(bucket['blocked_until'], now + seconds)
+            bucket['tokens'] = 0.0
+
+    def penalize(self, host, retry_after=None):
+        """Bị throttle: giảm một nửa tốc độ và chờ theo Retry-After nếu có"""
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._bucket(host, now)
+            bucket['rate'] = max(self.min_rate, bucket['rate'] / 2)
+            bucket['tokens'] = 0.0
+            wait = retry_after if retry_after is not None else 1.0 / bucket['rate']
+            bucket['blocked_until'] = max(bucket['blocked_until'], now + wait)
+            self.stats[host]['throttled'] += 1
+
+    def reward(self, host):
+        """Request thành công: tăng tuyến tính tốc độ về lại mức tối đa"""
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket and bucket['rate'] < bucket['max_rate']:
+                step = bucket['max_rate'] / self.recovery_steps
+                bucket['rate'] = min(bucket['max_rate'], bucket['rate'] + step)
+
+    def current_rate(self, host):
+        with self._lock:
+            bucket = self._buckets.get(host)
+            return bucket['rate'] if bucket else self.host_limits.get(host, self.default_rate)
@@ -1,57 +1,58 @@
 """Reddit data collection using PRAW"""
+import os
 import praw
-from datetime import datetime
+from data_collection.base_crawler import BaseCrawler, to_datetime
+from data_collection.registry import register_crawler
 
-class RedditCrawler:
-    def __init__(self, db, client_id, client_secret, user_agent):
-        self.db = db
-        self.posts_collection = db['posts']
+@register_crawler
+class RedditCrawler(BaseCrawler):
+    source = 'reddit'
+    display_name = 'Reddit'
+    icon = '🔴'
+    source_name = 'reddit'
+    platform = 'reddit'
+    key_field = 'post_id'
+    # sort='new': gặp post đã thấy thì dừng, PRAW không tải thêm trang
+    newest_first = True
+    default_queries = ('AI education', 'EdTech')
+    default_max_results = 15
+
+    def __init__(self, db, client_id=None, client_secret=None, user_agent=None,
+                 http=None, seen=None, feed_fetcher=None):
+        super().__init__(db, http=http, seen=seen)
+        # prawcore ghi đè User-Agent trên session được truyền vào: dùng session riêng,
+        # chung connection pool, rate limiter và thống kê với các crawler khác
         self.reddit = praw.Reddit(
-            client_id=client_id,
-            client_secret=client_secret,
-            user_agent=user_agent
+            client_id=client_id or os.getenv('REDDIT_CLIENT_ID', 'k6ozqL3mwwC0cGNUSmcdlQ'),
+            client_secret=client_secret or os.getenv('REDDIT_CLIENT_SECRET', 'JR6XLrrWpp2oNi5RNk0uV2GrrCaelw'),
+            user_agent=user_agent or os.getenv('REDDIT_USER_AGENT', 'windows:ai-trend-collector:v2.0'),
+            requestor_kwargs={'session': self.http.create_session()}
         )
-    
-    def search_posts(self, query, subreddit_name='all', limit=100):
+
+    def fetch(self, query, max_results, watermark, subreddit_name='all'):
+        """Generator PRAW: trang tiếp theo chỉ được tải khi pipeline đọc tới"""
+        return self.reddit.subreddit(subreddit_name).search(query, limit=max_results, sort='new')
+
+    def item_id(self, post):
+        return post.id
+
+    def item_time(self, post):
+        return to_datetime(post.created_utc)
+
+    def parse(self, post, query, **options):
+        return {
+            'post_id': post.id,
+            'title': post.title,
+            'text': post.selftext,
+            'created_at': self.item_time(post),
+            'score': post.score,
+            'num_comments': post.num_comments,
+            'upvote_ratio': post.upvote_ratio,
+            'subreddit': post.subreddit.display_name,
+            'author': str(post.author),
+            'url': post.url
+        }
+
+    def search_posts(self, query, subreddit_name='all', limit=100, incremental=True):
         """Thu thập posts từ Reddit"""
-        posts_data = []
-        
-        try:
-            subreddit = self.reddit.subreddit(subreddit_name)
-            
-            for post in subreddit.search(query, limit=limit, sort='new'):
-                post_doc = {
-                    'post_id': post.id,
-                    'title': post.title,
-                    'text': post.selftext,
-                    'created_at': datetime.fromtimestamp(post.created_utc),
-                    'score': post.score,
-                    'num_comments': post.num_comments,
-                    'upvote_ratio': post.upvote_ratio,
-                    'subreddit': post.subreddit.display_name,
-                    'author': str(post.author),
-                    'url': post.url,
-                    'topic': query,
-                    'source': 'reddit',
-                    'collected_at': datetime.now()
-                }
-                posts_data.append(post_doc)
-            
-            return posts_data
-        
-        except Exception as e:
-            print(f"Error collecting Reddit posts: {e}")
-            return []
-    
-    def save_to_mongodb(self, posts_data):
-        """Lưu vào MongoDB"""
-        if posts_data:
-            self.posts_collection.insert_many(posts_data)
-            print(f" Saved {len(posts_data)} Reddit posts to MongoDB")
-    
-    def collect_topics(self, topics, limit_per_topic=100):
-        """Thu thập dữ liệu cho nhiều chủ đề"""
-        for topic in topics:
-            print(f" Collecting Reddit posts about: {topic}")
-            posts = self.search_posts(topic, limit=limit_per_topic)
-            self.save_to_mongodb(posts)
\ No newline at end of file
+        return self.collect(query, limit, incremental, subreddit_name=subreddit_name)
@@ -0,0 +1,55 @@
+"""Crawler registry: each source registers its class, callers discover sources by name"""
+from importlib import import_module
+
+# Import các module này để crawler tự đăng ký (thứ tự = thứ tự hiển thị)
+CRAWLER_MODULES = (
+    'data_collection.google_news_crawler',
+    'data_collection.reddit_crawler',
+    'data_collection.medium_crawler',
+    'data_collection.stackoverflow_crawler',
+    'data_collection.hackernews_crawler'
+)
+
+_crawlers = {}
+_loaded = False
+
+
+def register_crawler(cls):
+    """Decorator: đăng ký crawler theo cls.source"""
+    _crawlers[cls.source] = cls
+    return cls
+
+
+def load_crawlers():
+    """{source: class} của mọi crawler import được (thiếu dependency thì bỏ qua nguồn đó)"""
+    global _loaded
+    if not _loaded:
+        for module in CRAWLER_MODULES:
+            try:
+                import_module(module)
+            except ImportError as e:
+                print(f"⚠️  Crawler {module} unavailable: {e}")
+        _loaded = True
+    return dict(_crawlers)
+
+
+def available_sources():
+    return list(load_crawlers())
+
+
+def create_crawler(source, db, **shared):
+    """Khởi tạo crawler của một nguồn; shared: http, seen, feed_fetcher dùng chung"""
+    crawlers = load_crawlers()
+    if source not in crawlers:
+        raise KeyError(f"Unknown source '{source}' (available: {', '.join(crawlers)})")
+    return crawlers[source](db, **shared)
+
+
+def create_crawlers(db, sources=None, **shared):
+    """{source: crawler} cho các nguồn được chọn (mặc định: tất cả)"""
+    crawlers = load_crawlers()
+    return {
+        source: crawlers[source](db, **shared)
+        for source in (sources or crawlers)
+        if source in crawlers
+    }
@@ -0,0 +1,76 @@
+"""Per-run Bloom filter of source items already seen by any crawler"""
+import hashlib
+import os
+import threading
+from utils.bloom_filter import BloomFilter
+
+# Đặt biến môi trường này để giữ filter giữa các lần chạy
+SEEN_FILTER_PATH = os.getenv('SEEN_FILTER_PATH')
+
+
+class SeenItems:
+    def __init__(self, capacity=200000, error_rate=0.001, path=SEEN_FILTER_PATH):
+        self.path = path
+        if path and os.path.exists(path):
+            self.bloom = BloomFilter.load(path)
+        else:
+            self.bloom = BloomFilter(capacity=capacity, error_rate=error_rate)
+        self.stats = {'checked': 0, 'skipped': 0, 'round_trips_saved': 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(source, item_id, url=None):
+        keys = [f"{source}:{item_id}"]
+        if url:
+            keys.append(f"{source}:url:{hashlib.sha1(url.encode('utf-8')).hexdigest()}")
+        return keys
+
+    def _count(self, seen):
+        with self._lock:
+            self.stats['checked'] += 1
+            self.stats['skipped'] += seen
+
+    def skip(self, source, item_id, url=None):
+        """
+        True nếu item đã gặp trong lần chạy này (theo id, hoặc URL nếu có),
+        để bỏ qua trước khi dựng document và ghi MongoDB. Item chưa gặp được đánh dấu ngay.
+        """
+        seen = False
+        for key in self._keys(source, item_id, url):
+            seen = self.bloom.add(key) or seen
+        self._count(seen)
+        return seen
+
+    def contains(self, source, item_id, url=None):
+        """Như skip() nhưng không đánh dấu: gọi mark() khi item đã thực sự được lấy về"""
+        seen = any(key in self.bloom for key in self._keys(source, item_id, url))
+        self._count(seen)
+        return seen
+
+    def mark(self, source, item_id, url=None):
+        for key in self._keys(source, item_id, url):
+            self.bloom.add(key)
+
+    def record_round_trips(self, count=1):
+        """Ghi nhận số request HTTP / lượt ghi MongoDB không cần gửi nhờ filter"""
+        with self._lock:
+            self.stats['round_trips_saved'] += count
+
+    def note_batch(self, kept, skipped):
+        """Cả batch bị lọc hết thì save_to_mongodb không cần bulk write nào"""
+        if skipped and not kept:
+            self.record_round_trips()
+
+    def save(self):
+        if self.path:
+            self.bloom.save(self.path)
+
+    def print_report(self):
+        """In số item bị lọc, round trip tiết kiệm và tỷ lệ dương tính giả"""
+        if not self.stats['checked']:
+            return
+        print(f"\n🧮 Seen-item filter: {self.stats['skipped']:,} of {self.stats['checked']:,} items "
+              f"skipped as already seen this run")
+        print(f"   Saved {self.stats['round_trips_saved']:,} round trips; "
+              f"{self.bloom.n_items:,} keys, est. false-positive rate "
+              f"{self.bloom.false_positive_rate():.4%}")
@@ -1,145 +1,260 @@
 # src/data_collection/stackoverflow_crawler.py
 """Stack Overflow RSS & API Crawler"""
+import os
 import requests
-import feedparser
 from datetime import datetime
 import html
+from urllib.parse import urlparse
+from pymongo import UpdateOne
+from utils.html_text import html_to_text
+from data_collection.base_crawler import BaseCrawler, to_datetime
+from data_collection.feed_fetcher import FeedFetcher
+from data_collection.registry import register_crawler
 
-class StackOverflowCrawler:
-    def __init__(self, db):
-        self.db = db
-        self.posts_collection = db['posts']
+# Chỉ lấy các trường thực sự được lưu (filter tạo qua /filters/create)
+QUESTION_FIELDS = (
+    '.backoff', '.error_id', '.error_message', '.error_name', '.has_more', '.items', '.quota_remaining',
+    'question.question_id', 'question.title', 'question.body', 'question.link', 'question.creation_date',
+    'question.owner', 'question.tags', 'question.score', 'question.answer_count', 'question.view_count',
+    'question.is_answered', 'shallow_user.display_name'
+)
+REFRESH_FIELDS = (
+    '.backoff', '.error_id', '.error_message', '.error_name', '.has_more', '.items', '.quota_remaining',
+    'question.question_id', 'question.score', 'question.answer_count', 'question.view_count',
+    'question.is_answered'
+)
+
+@register_crawler
+class StackOverflowCrawler(BaseCrawler):
+    source = 'stackoverflow'
+    display_name = 'Stack Overflow'
+    icon = '💻'
+    source_name = 'Stack Overflow'
+    platform = 'stackoverflow'
+    key_field = 'question_id'
+    item_label = 'questions'
+    # API sort=creation và RSS sort=newest: gặp câu hỏi đã thấy thì dừng
+    newest_first = True
+    default_fields = {'score': 0, 'num_comments': 0, 'likes': 0}
+    default_queries = ('machine-learning', 'artificial-intelligence')
+    default_max_results = 15
+
+    def __init__(self, db, http=None, feed_fetcher=None, seen=None):
+        super().__init__(db, http=http, seen=seen)
         self.api_base = "https://api.stackexchange.com/2.3"
         self.rss_base = "https://stackoverflow.com/feeds"
+        self.feed_fetcher = feed_fetcher or FeedFetcher(db, self.http)
+        self.filters_collection = db['stackexchange_filters']
+        # API key nâng quota từ 300 lên 10.000 request/ngày
+        self.api_key = os.getenv('STACKEXCHANGE_KEY')
+        self.quota_remaining = None
+        self.min_quota = 10
     
-    def search_questions_rss(self, tag, max_results=100):
-        """Thu thập câu hỏi từ Stack Overflow RSS theo tag"""
-        try:
-            rss_url = f"{self.rss_base}/tag?tagnames={tag}&sort=newest"
-            print(f"🔍 Fetching Stack Overflow questions for tag: {tag}")
-            
-            feed = feedparser.parse(rss_url)
-            questions_data = []
-            
-            for entry in feed.entries[:max_results]:
-                # Decode HTML entities
-                title = html.unescape(entry.title)
-                summary = html.unescape(entry.get('summary', ''))
-                
-                question_doc = {
-                    'question_id': entry.get('id', entry.link),
-                    'title': title,
-                    'text': f"{title}\n\n{summary}",
-                    'link': entry.link,
-                    'published': datetime(*entry.published_parsed[:6]) if hasattr(entry, 'published_parsed') else datetime.now(),
-                    'created_at': datetime(*entry.published_parsed[:6]) if hasattr(entry, 'published_parsed') else datetime.now(),
-                    'author': entry.get('author', 'Unknown'),
-                    'source': 'Stack Overflow',
-                    'topic': tag,
-                    'tags': [tag],
-                    'hashtags': [tag],
-                    'platform': 'stackoverflow',
-                    'collected_at': datetime.now(),
-                    'score': 0,
-                    'num_comments': 0,
-                    'likes': 0
-                }
-                questions_data.append(question_doc)
-            
-            print(f"✅ Found {len(questions_data)} Stack Overflow questions")
-            return questions_data
-            
-        except Exception as e:
-            print(f"❌ Error fetching Stack Overflow RSS: {e}")
-            return []
-    
-    def search_questions_api(self, tag, max_results=100):
-        """Thu thập câu hỏi qua Stack Exchange API (tốt hơn RSS)"""
+    def fetch(self, query, max_results, watermark, via='api'):
+        """Câu hỏi từ Stack Exchange API (tốt hơn RSS); lỗi API thì chuyển sang RSS"""
+        if via == 'rss':
+            return self._fetch_rss(query, max_results, watermark)
         try:
-            url = f"{self.api_base}/questions"
-            params = {
-                'order': 'desc',
-                'sort': 'creation',
-                'tagged': tag,
-                'site': 'stackoverflow',
-                'pagesize': min(max_results, 100),
-                'filter': 'withbody'
-            }
-            
-            print(f"🔍 Fetching Stack Overflow API for tag: {tag}")
-            
-            response = requests.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            
-            data = response.json()
-            questions_data = []
-            
-            for item in data.get('items', []):
-                question_doc = {
-                    'question_id': f"so_{item['question_id']}",
-                    'title': html.unescape(item['title']),
-                    'text': html.unescape(item.get('body', item['title']))[:2000],
-                    'link': item['link'],
-                    'published': datetime.fromtimestamp(item['creation_date']),
-                    'created_at': datetime.fromtimestamp(item['creation_date']),
-                    'author': item.get('owner', {}).get('display_name', 'Unknown'),
-                    'source': 'Stack Overflow',
-                    'topic': tag,
-                    'tags': item.get('tags', []),
-                    'hashtags': item.get('tags', []),
-                    'platform': 'stackoverflow',
-                    'collected_at': datetime.now(),
-                    'score': item.get('score', 0),
-                    'likes': item.get('score', 0),
-                    'num_comments': item.get('answer_count', 0),
-                    'view_count': item.get('view_count', 0),
-                    'is_answered': item.get('is_answered', False)
-                }
-                questions_data.append(question_doc)
-            
-            print(f"✅ Found {len(questions_data)} questions via API")
-            return questions_data
-            
+            return self._fetch_api(query, max_results, watermark)
         except requests.RequestException as e:
             print(f"❌ API Error: {e}")
             print("📝 Falling back to RSS feed...")
-            return self.search_questions_rss(tag, max_results)
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return []
+            return self._fetch_rss(query, max_results, watermark)
+    
+    def _fetch_rss(self, tag, max_results, watermark):
+        rss_url = f"{self.rss_base}/tag?tagnames={tag}&sort=newest"
+        print(f"🔍 Fetching Stack Overflow questions for tag: {tag}")
+        return self.fetch_feed(tag, rss_url, max_results, stop=self.watermarks.feed_stop(watermark))
     
-    def save_to_mongodb(self, questions_data):
-        """Lưu vào MongoDB"""
-        if not questions_data:
-            print("ℹ️  No questions to save")
-            return
+    def _fetch_api(self, tag, max_results, watermark):
+        url = f"{self.api_base}/questions"
+        params = {
+            'order': 'desc',
+            'sort': 'creation',
+            'tagged': tag,
+            'site': 'stackoverflow',
+            'pagesize': min(max_results, 100),
+            'filter': self._get_filter(QUESTION_FIELDS, fallback='withbody')
+        }
+        if watermark.get('created_at'):
+            # Chỉ lấy câu hỏi mới hơn lần crawl trước
+            params['fromdate'] = int(watermark['created_at'].timestamp()) + 1
         
-        new_questions = []
-        for question in questions_data:
-            existing = self.posts_collection.find_one({'question_id': question['question_id']})
-            if not existing:
-                new_questions.append(question)
+        print(f"🔍 Fetching Stack Overflow API for tag: {tag}")
         
-        if new_questions:
-            self.posts_collection.insert_many(new_questions)
-            print(f"💾 Saved {len(new_questions)} new Stack Overflow questions")
-        else:
-            print("ℹ️  No new questions to save")
+        # Phân trang theo has_more, dừng sớm khi đủ kết quả hoặc sắp hết quota
+        items = []
+        page = 1
+        while len(items) < max_results and not self._quota_exhausted():
+            data = self._api_get(url, dict(params, page=page))
+            items.extend(data.get('items', []))
+            if not data.get('has_more'):
+                break
+            page += 1
+        if self._quota_exhausted():
+            print(f"⚠️  Stack Exchange quota nearly exhausted ({self.quota_remaining} left)")
+        return items
     
-    def collect_topics(self, tags, max_results_per_tag=100):
-        """Thu thập dữ liệu cho nhiều tags"""
-        total_collected = 0
+    # Item từ API có 'question_id' (số), entry RSS thì không
+    def item_id(self, item):
+        if 'question_id' in item:
+            return f"so_{item['question_id']}"
+        return item.get('id', item.get('link'))
+    
+    def item_time(self, item):
+        if 'question_id' in item:
+            return to_datetime(item.get('creation_date'))
+        return to_datetime(item.get('published_parsed'))
+    
+    def parse(self, item, query, **options):
+        if 'question_id' not in item:
+            # Decode HTML entities
+            title = html.unescape(item.title)
+            return {
+                'question_id': self.item_id(item),
+                'title': title,
+                'text': f"{title}\n\n{html_to_text(item.get('summary', ''))}",
+                'link': item.link,
+                'created_at': self.item_time(item),
+                'author': item.get('author', 'Unknown'),
+                'tags': [query],
+                'hashtags': [query]
+            }
+        return {
+            'question_id': self.item_id(item),
+            'title': html.unescape(item['title']),
+            'text': html_to_text(item.get('body', item['title']), limit=2000),
+            'link': item['link'],
+            'created_at': self.item_time(item),
+            'author': item.get('owner', {}).get('display_name', 'Unknown'),
+            'tags': item.get('tags', []),
+            'hashtags': item.get('tags', []),
+            'score': item.get('score', 0),
+            'likes': item.get('score', 0),
+            'num_comments': item.get('answer_count', 0),
+            'view_count': item.get('view_count', 0),
+            'is_answered': item.get('is_answered', False)
+        }
+    
+    def search_questions_rss(self, tag, max_results=100, incremental=True):
+        """Thu thập câu hỏi từ Stack Overflow RSS theo tag"""
+        return self.collect(tag, max_results, incremental, via='rss')
+    
+    def search_questions_api(self, tag, max_results=100, incremental=True):
+        """Thu thập câu hỏi qua Stack Exchange API (tự chuyển sang RSS khi API lỗi)"""
+        return self.collect(tag, max_results, incremental)
+    
+    def _api_get(self, url, params):
+        """Gọi Stack Exchange API, tuân theo trường 'backoff' và lỗi throttle_violation"""
+        host = urlparse(url).netloc
+        if self.api_key:
+            params = dict(params, key=self.api_key)
+        response = self.http.get(url, params=params, timeout=15)
+        data = response.json()
         
-        for tag in tags:
-            print(f"\n{'='*60}")
-            print(f"💻 Collecting Stack Overflow: {tag}")
-            print(f"{'='*60}")
+        # API yêu cầu không gọi lại method này trong 'backoff' giây
+        if data.get('backoff'):
+            self.http.rate_limiter.pause(host, data['backoff'])
+        if data.get('error_name') == 'throttle_violation':
+            self.http.rate_limiter.penalize(host)
+        if 'quota_remaining' in data:
+            self.quota_remaining = data['quota_remaining']
+        response.raise_for_status()
+        return data
+    
+    def _quota_exhausted(self):
+        return self.quota_remaining is not None and self.quota_remaining <= self.min_quota
+    
+    def _get_filter(self, fields, fallback):
+        """Filter tối giản cho danh sách trường; filter là bất biến nên cache vĩnh viễn trong MongoDB"""
+        key = ';'.join(fields)
+        cached = self.filters_collection.find_one({'_id': key})
+        if cached:
+            return cached['filter']
+        
+        try:
+            data = self._api_get(f"{self.api_base}/filters/create", {
+                'include': key,
+                'base': 'none',
+                'unsafe': 'false'
+            })
+            name = data['items'][0]['filter']
+        except (requests.RequestException, KeyError, IndexError, ValueError) as e:
+            print(f"⚠️  Could not create Stack Exchange filter, using '{fallback}': {e}")
+            return fallback
+        
+        self.filters_collection.update_one(
+            {'_id': key},
+            {'$set': {'filter': name, 'created_at': datetime.now()}},
+            upsert=True
+        )
+        return name
+    
+    def refresh_scores(self, question_ids=None, limit=None, batch_size=100):
+        """
+        Cập nhật score/answer_count/view_count cho câu hỏi đã lưu.
+        Gom tối đa 100 id mỗi request (/questions/{id1;id2;...}), ưu tiên câu hỏi lâu chưa refresh.
+        Id API không trả về (câu hỏi đã xóa / chuyển site) được đánh dấu so_deleted và không refresh nữa.
+        """
+        if question_ids is None:
+            cursor = self.posts_collection.find(
+                {'platform': 'stackoverflow', 'question_id': {'$regex': '^so_'}, 'so_deleted': {'$ne': True}},
+                {'question_id': 1}
+            ).sort('score_refreshed_at', 1)
+            if limit:
+                cursor = cursor.limit(limit)
+            question_ids = [doc['question_id'] for doc in cursor]
+        
+        numeric_ids = [str(qid).replace('so_', '') for qid in question_ids]
+        if not numeric_ids:
+            return 0
+        
+        refresh_filter = self._get_filter(REFRESH_FIELDS, fallback='default')
+        print(f"🔄 Refreshing {len(numeric_ids)} Stack Overflow questions...")
+        
+        updated = deleted = requests_sent = 0
+        for i in range(0, len(numeric_ids), batch_size):
+            if self._quota_exhausted():
+                print(f"⚠️  Stopping refresh, quota nearly exhausted ({self.quota_remaining} left)")
+                break
+            
+            batch = numeric_ids[i:i + batch_size]
+            try:
+                data = self._api_get(f"{self.api_base}/questions/{';'.join(batch)}", {
+                    'site': 'stackoverflow',
+                    'pagesize': len(batch),
+                    'filter': refresh_filter
+                })
+            except (requests.RequestException, ValueError) as e:
+                print(f"❌ Error refreshing questions: {e}")
+                continue
+            requests_sent += 1
             
-            # Try API first, fallback to RSS if needed
-            questions = self.search_questions_api(tag, max_results=max_results_per_tag)
-            self.save_to_mongodb(questions)
-            total_collected += len(questions)
+            now = datetime.now()
+            operations = [
+                UpdateOne(
+                    {'question_id': f"so_{item['question_id']}"},
+                    {'$set': {
+                        'score': item.get('score', 0),
+                        'likes': item.get('score', 0),
+                        'num_comments': item.get('answer_count', 0),
+                        'view_count': item.get('view_count', 0),
+                        'is_answered': item.get('is_answered', False),
+                        'score_refreshed_at': now
+                    }}
+                )
+                for item in data.get('items', [])
+            ]
+            # Vẫn đóng dấu score_refreshed_at để id chết không dồn lên đầu hàng đợi refresh
+            missing = set(batch) - {str(item['question_id']) for item in data.get('items', [])}
+            if missing:
+                deleted += self.posts_collection.update_many(
+                    {'question_id': {'$in': [f"so_{qid}" for qid in missing]}},
+                    {'$set': {'so_deleted': True, 'score_refreshed_at': now}}
+                ).modified_count
+            if operations:
+                updated += self.posts_collection.bulk_write(operations, ordered=False).modified_count
         
-        print(f"\n{'='*60}")
-        print(f"✅ Total Stack Overflow questions: {total_collected}")
-        print(f"{'='*60}\n")
\ No newline at end of file
+        print(f"✅ Refreshed {updated} questions with {requests_sent} API requests"
+              + (f", {deleted} no longer available" if deleted else ""))
+        return updated
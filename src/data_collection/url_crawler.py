@@ -1,35 +1,256 @@
 """URL Content Crawler - Thu thập và phân tích nội dung từ URL"""
+import os
+import time
+import threading
 import requests
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from datetime import datetime
-import re
+from itertools import zip_longest
 from urllib.parse import urlparse
 import hashlib
+import re
+from charset_normalizer import from_bytes
+from pymongo.errors import DuplicateKeyError
+from utils.minhash import minhash_fields
+from utils.bloom_filter import BloomFilter
+from utils.url_utils import canonicalize_url, canonical_hash
+from data_collection.http_client import get_http_client
+from data_collection.crawl_policy import CrawlPolicyCache
+from data_collection.page_parser import parse_page, identify_platform
+
+# Không tải các loại nội dung không trích xuất được text
+SKIPPED_CONTENT_TYPES = ('application/pdf', 'image/', 'video/', 'audio/', 'application/zip',
+                         'application/octet-stream')
+SKIPPED_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.mp4', '.webm',
+                      '.mov', '.avi', '.mp3', '.zip')
+META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+# Batch ít URL hơn mức này được parse inline (không tạo process pool)
+PARSE_POOL_MIN_URLS = 20
+
+
+class SkippedContent(Exception):
+    """URL bị bỏ qua trước khi tải (loại nội dung không hỗ trợ, robots.txt, domain đang lỗi)"""
+
 
 class URLCrawler:
-    def __init__(self, db):
+    def __init__(self, db, http=None, max_bytes=2_000_000, chunk_size=65536, policy=None):
         self.db = db
+        self.http = http or get_http_client()
+        self.policy = policy or CrawlPolicyCache(db, self.http)
         self.posts_collection = db['posts']
         self.url_cache_collection = db.get_collection('url_cache')
+        # Text trích xuất chỉ giữ 3.000 ký tự nên không cần tải trang nhiều MB
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.fetch_stats = {'downloaded': 0, 'truncated': 0, 'aborted': 0, 'bytes': 0,
+                            'disallowed': 0, 'db_lookups_saved': 0}
+        self._stats_lock = threading.Lock()
+        # Bloom filter canonical_hash của url_cache, nạp lười ở lần tra đầu tiên
+        self._url_filter = None
+        self._filter_lock = threading.Lock()
+    
+    def _count(self, **increments):
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.fetch_stats[key] += value
+    
+    def _download(self, url):
+        """
+        Tải trang dạng stream, dừng ở max_bytes.
+        Trả về (html, status_code, truncated, final_url); raise SkippedContent với PDF/ảnh/video.
+        """
+        if urlparse(url).path.lower().endswith(SKIPPED_EXTENSIONS):
+            self._count(aborted=1)
+            raise SkippedContent(f"unsupported file type: {url}")
+        
+        allowed, reason = self.policy.check(url)
+        if not allowed:
+            self._count(disallowed=1)
+            raise SkippedContent(reason)
         
-        self.supported_platforms = {
-            'twitter.com': self._parse_twitter,
-            'x.com': self._parse_twitter,
-            'reddit.com': self._parse_reddit,
-            'facebook.com': self._parse_facebook,
-            'medium.com': self._parse_medium,
-            'generic': self._parse_generic
-        }
+        try:
+            # User-Agent của HTTP client chứa ROBOTS_AGENT: robots.txt được áp đúng cho agent đã gửi
+            response = self.http.get(url, timeout=15, stream=True)
+        except requests.exceptions.RequestException as e:
+            self.policy.record_failure(url, f"{type(e).__name__}: {e}")
+            raise
+        if response.status_code >= 500:
+            self.policy.record_failure(url, f"HTTP {response.status_code}")
+        else:
+            self.policy.record_success(url)
         
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        try:
+            response.raise_for_status()
+            
+            # Chỉ mới nhận header: bỏ qua trước khi tải body
+            content_type = response.headers.get('Content-Type', '').lower()
+            if content_type.startswith(SKIPPED_CONTENT_TYPES):
+                self._count(aborted=1)
+                raise SkippedContent(f"unsupported content type: {content_type.split(';')[0]}")
+            
+            chunks, received, truncated = [], 0, False
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                chunks.append(chunk)
+                received += len(chunk)
+                if received >= self.max_bytes:
+                    truncated = True
+                    break
+            body = b''.join(chunks)[:self.max_bytes]
+        finally:
+            response.close()
+        
+        self.http.session.record_bytes(url, received)
+        self._count(downloaded=1, truncated=int(truncated), bytes=received)
+        return self._decode(body, response), response.status_code, truncated, response.url or url
+    
+    def _decode(self, body, response):
+        """Charset từ header, thẻ meta hoặc dò trên phần đầu trang (không dò cả trang)"""
+        prefix = body[:16384]
+        encoding = requests.utils.get_encoding_from_headers(response.headers)
+        if encoding == 'ISO-8859-1' and 'charset' not in response.headers.get('Content-Type', '').lower():
+            encoding = None  # requests mặc định ISO-8859-1 cho text/* khi header không ghi charset
+        if not encoding:
+            match = META_CHARSET.search(prefix[:4096])
+            encoding = match.group(1).decode('ascii') if match else None
+        if not encoding:
+            best = from_bytes(prefix).best()
+            encoding = best.encoding if best else 'utf-8'
+        try:
+            return body.decode(encoding, errors='replace')
+        except LookupError:
+            return body.decode('utf-8', errors='replace')
+    
+    def _known_urls(self):
+        """
+        Bloom filter các canonical_hash trong url_cache (nạp một lần cho mỗi crawler).
+        Nạp filter phải quét cả url_cache nên chỉ đáng cho crawl_multiple_urls.
+        """
+        with self._filter_lock:
+            if self._url_filter is None:
+                self._url_filter = self._warm_url_filter()
+            return self._url_filter
+    
+    def _warm_url_filter(self):
+        """Nạp filter từ url_cache; bản ghi cũ chưa có canonical_hash được bổ sung luôn"""
+        total = self.url_cache_collection.estimated_document_count()
+        url_filter = BloomFilter(capacity=max(100000, total * 2), error_rate=0.001)
+        legacy = []
+        for doc in self.url_cache_collection.find({}, {'canonical_hash': 1, 'url': 1}):
+            key = doc.get('canonical_hash')
+            if key is None and doc.get('url'):
+                key = canonical_hash(doc['url'])
+                legacy.append((doc['_id'], key))
+            if key:
+                url_filter.add(key)
+        
+        for doc_id, key in legacy:
+            try:
+                self.url_cache_collection.update_one({'_id': doc_id}, {'$set': {'canonical_hash': key}})
+            except DuplicateKeyError:
+                pass  # Đã có bản ghi khác cho cùng URL chuẩn hóa
+        return url_filter
+    
+    def _lookup_cached(self, url, key, use_filter=False):
+        """
+        Bản ghi url_cache theo canonical_hash (một find_one có index).
+        use_filter: hỏi Bloom filter trước, URL chắc chắn mới không tốn round trip (batch).
+        Bản ghi cũ chỉ có url_hash được tìm theo url_hash và bổ sung canonical_hash.
+        """
+        if use_filter and key not in self._known_urls():
+            self._count(db_lookups_saved=1)
+            return None
+        cached = self.url_cache_collection.find_one({'canonical_hash': key})
+        if cached or use_filter:
+            # Nạp filter đã bổ sung canonical_hash cho mọi bản ghi cũ
+            return cached
+        
+        cached = self.url_cache_collection.find_one({
+            'url_hash': hashlib.md5(url.encode()).hexdigest(),
+            'canonical_hash': {'$exists': False}
+        })
+        if cached:
+            try:
+                self.url_cache_collection.update_one({'_id': cached['_id']}, {'$set': {'canonical_hash': key}})
+            except DuplicateKeyError:
+                pass  # Đã có bản ghi khác cho cùng URL chuẩn hóa
+        return cached
+    
+    def _cache_entry(self, url, key, post_id, platform, **extra):
+        """Ghi một bản ghi url_cache; bỏ qua nếu canonical_hash đã tồn tại"""
+        entry = {
+            'url': url,
+            'url_hash': hashlib.md5(url.encode()).hexdigest(),
+            'canonical_url': canonicalize_url(url),
+            'canonical_hash': key,
+            'post_id': post_id,
+            'crawled_at': datetime.now(),
+            'platform': platform
         }
+        entry.update(extra)
+        try:
+            self.url_cache_collection.insert_one(entry)
+        except DuplicateKeyError:
+            pass
+        # Chỉ cập nhật filter nếu đã được nạp (batch), không nạp chỉ để thêm một key
+        with self._filter_lock:
+            if self._url_filter is not None:
+                self._url_filter.add(key)
+    
+    def _resolve_redirect(self, url, key, final_url, platform, use_filter=False):
+        """
+        Nếu URL redirect tới trang đã crawl: ghi alias cho URL gốc và trả về post_id cũ.
+        """
+        final_key = canonical_hash(final_url)
+        if final_key == key:
+            return None
+        cached = self._lookup_cached(final_url, final_key, use_filter)
+        if not cached:
+            return None
+        self._cache_entry(url, key, cached['post_id'], platform, final_url=final_url, alias_of=final_key)
+        return cached['post_id']
+    
+    def print_fetch_stats(self):
+        """In số trang đã tải, bị cắt ở max_bytes và bị bỏ qua"""
+        stats = self.fetch_stats
+        print(f" 📥 Downloads: {stats['downloaded']} pages, {stats['bytes'] / 1024:,.1f} KB; "
+              f"{stats['truncated']} truncated at {self.max_bytes / 1024:,.0f} KB, "
+              f"{stats['aborted']} skipped by content type, {stats['disallowed']} by crawl policy; "
+              f"{stats['db_lookups_saved']} cache lookups answered by Bloom filter")
+    
+    def _save_post(self, url, key, final_url, topic, platform, post_data, response_status, content_length):
+        """Bổ sung metadata, lưu post và cache URL (cả URL sau redirect); trả về post_id"""
+        post_data.update({
+            'source': f'url_crawler_{platform}',
+            'source_url': url,
+            'topic': topic or 'url_imported',
+            'collected_at': datetime.now(),
+            'crawl_method': 'url_direct',
+            'response_status': response_status,
+            'content_length': content_length
+        })
+        
+        post_data.update(minhash_fields(post_data))
+        
+        # Lưu vào database
+        result = self.posts_collection.insert_one(post_data)
+        post_id = result.inserted_id
+        
+        # Lưu cache
+        self._cache_entry(url, key, post_id, platform,
+                          final_url=final_url,
+                          text_length=len(post_data.get('text', '')),
+                          title_length=len(post_data.get('title', '')))
+        final_key = canonical_hash(final_url)
+        if final_key != key:
+            # URL đích sau redirect cũng trỏ tới post này
+            self._cache_entry(final_url, final_key, post_id, platform, alias_of=key)
+        return post_id
     
     def crawl_url(self, url, topic=None):
         """Thu thập nội dung từ URL với logging cải tiến"""
-        # Kiểm tra URL đã được crawl chưa
-        url_hash = hashlib.md5(url.encode()).hexdigest()
-        cached = self.url_cache_collection.find_one({'url_hash': url_hash})
+        # Kiểm tra URL đã được crawl chưa (theo dạng chuẩn hóa)
+        key = canonical_hash(url)
+        cached = self._lookup_cached(url, key)
         
         if cached:
             print(f"  URL already crawled on {cached['crawled_at']}")
@@ -37,66 +258,40 @@ class URLCrawler:
         
         try:
             print(f" Crawling: {url}")
-            response = requests.get(url, headers=self.headers, timeout=15)
-            response.raise_for_status()
+            html, status_code, truncated, final_url = self._download(url)
             
-            print(f" Response status: {response.status_code}")
-            print(f" Content length: {len(response.text)} characters")
+            print(f" Response status: {status_code}")
+            if final_url != url:
+                print(f" Redirected to: {final_url}")
+            print(f" Content length: {len(html)} characters{' (truncated)' if truncated else ''}")
             
             # Xác định platform
             domain = urlparse(url).netloc.lower()
-            platform = self._identify_platform(domain)
+            platform = identify_platform(domain)
             print(f" Detected platform: {platform}")
             
-            # Parse content theo platform
-            parser = self.supported_platforms.get(platform, self.supported_platforms['generic'])
-            post_data = parser(response.text, url)
+            existing = self._resolve_redirect(url, key, final_url, platform)
+            if existing:
+                print(f"  Redirect target already crawled, Post ID: {existing}")
+                return existing
+            
+            # Parse một lần duy nhất (lxml), meta và selector dùng chung cây
+            post_data = parse_page(html, url, platform)
             
             # Debug: Kiểm tra nội dung đã extract
             text_length = len(post_data.get('text', ''))
             title_length = len(post_data.get('title', ''))
             print(f" Extracted - Title: {title_length} chars, Text: {text_length} chars")
             
-            if text_length == 0:
-                print(f" ⚠️ Warning: No text content extracted from {url}")
-                # Try fallback extraction
-                from bs4 import BeautifulSoup
-                soup = BeautifulSoup(response.text, 'html.parser')
-                fallback_text = soup.get_text(separator=' ', strip=True)[:500]
-                if fallback_text:
-                    post_data['text'] = f"[Fallback extraction] {fallback_text}"
-                    print(f" Applied fallback extraction: {len(fallback_text)} chars")
-            
-            # Bổ sung metadata
-            post_data.update({
-                'source': f'url_crawler_{platform}',
-                'source_url': url,
-                'topic': topic or 'url_imported',
-                'collected_at': datetime.now(),
-                'crawl_method': 'url_direct',
-                'response_status': response.status_code,
-                'content_length': len(response.text)
-            })
-            
-            # Lưu vào database
-            result = self.posts_collection.insert_one(post_data)
-            post_id = result.inserted_id
-            
-            # Lưu cache
-            self.url_cache_collection.insert_one({
-                'url': url,
-                'url_hash': url_hash,
-                'post_id': post_id,
-                'crawled_at': datetime.now(),
-                'platform': platform,
-                'text_length': text_length,
-                'title_length': title_length
-            })
+            post_id = self._save_post(url, key, final_url, topic, platform, post_data, status_code, len(html))
             
             print(f" ✅ Successfully crawled and saved! Post ID: {post_id}")
             print(f" Final content - Title: '{post_data.get('title', '')[:50]}...', Text: {len(post_data.get('text', ''))} chars")
             return post_id
             
+        except SkippedContent as e:
+            print(f" ⏭️  Skipped: {e}")
+            return None
         except requests.exceptions.RequestException as e:
             print(f" ❌ Network error: {e}")
             return None
@@ -106,267 +301,106 @@ class URLCrawler:
             print(f" Traceback: {traceback.format_exc()}")
             return None
     
-    def _identify_platform(self, domain):
-        """Xác định platform từ domain"""
-        for platform in self.supported_platforms.keys():
-            if platform in domain:
-                return platform
-        return 'generic'
-    
-    def _parse_twitter(self, html, url):
-        """Parse Twitter content with improved extraction"""
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Extract tweet content from multiple sources
-        text = (self._extract_meta_content(soup, 'og:description') or 
-               self._extract_meta_content(soup, 'twitter:description') or 
-               self._extract_meta_content(soup, 'description') or '')
+    def _crawl_in_batch(self, url, topic, parse_pool, domain_slot):
+        """crawl_url không log: fetch giới hạn theo domain, parse trong process pool"""
+        key = canonical_hash(url)
+        cached = self._lookup_cached(url, key, use_filter=True)
+        if cached:
+            return cached['post_id'], None
         
-        # Try to get more content from page structure
-        if not text or len(text) < 10:
-            tweet_selectors = [
-                '[data-testid="tweetText"]',
-                '.tweet-text',
-                '.js-tweet-text',
-                '.TweetTextSize'
-            ]
+        try:
+            with domain_slot:
+                html, status_code, _, final_url = self._download(url)
             
-            for selector in tweet_selectors:
-                tweet_element = soup.select_one(selector)
-                if tweet_element:
-                    text = tweet_element.get_text(strip=True)
-                    break
-        
-        # Extract hashtags
-        hashtags = re.findall(r'#(\w+)', text) if text else []
-        
-        title = self._extract_meta_content(soup, 'og:title') or 'Twitter Post'
-        
-        return {
-            'text': text or 'No tweet content extracted',
-            'title': title,
-            'created_at': datetime.now(),
-            'likes': 0,
-            'retweets': 0,
-            'replies': 0,
-            'hashtags': hashtags,
-            'platform': 'twitter',
-            'url': url
-        }
-    
-    def _parse_reddit(self, html, url):
-        """Parse Reddit content with improved extraction"""
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        title = self._extract_meta_content(soup, 'og:title') or ''
-        description = self._extract_meta_content(soup, 'og:description') or ''
-        
-        # Try to get post content from Reddit structure
-        content_selectors = [
-            '[data-testid="post-content"]',
-            '.usertext-body',
-            '.md',
-            '.Post',
-            '[data-click-id="text"]'
-        ]
-        
-        post_content = ""
-        for selector in content_selectors:
-            content_element = soup.select_one(selector)
-            if content_element:
-                post_content = content_element.get_text(separator=' ', strip=True)
-                break
-        
-        # Combine all content
-        full_text_parts = []
-        if title:
-            full_text_parts.append(title)
-        if post_content:
-            full_text_parts.append(post_content)
-        elif description:
-            full_text_parts.append(description)
-        
-        full_text = '\n\n'.join(full_text_parts) if full_text_parts else 'No content extracted'
-        
-        return {
-            'title': title or 'Reddit Post',
-            'text': full_text,
-            'created_at': datetime.now(),
-            'score': 0,
-            'num_comments': 0,
-            'platform': 'reddit',
-            'url': url
-        }
-    
-    def _parse_facebook(self, html, url):
-        """Parse Facebook content with improved extraction"""
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        text = (self._extract_meta_content(soup, 'og:description') or 
-               self._extract_meta_content(soup, 'twitter:description') or
-               self._extract_meta_content(soup, 'description') or '')
-        
-        title = self._extract_meta_content(soup, 'og:title') or 'Facebook Post'
-        
-        # Try to get more content if available
-        if not text or len(text) < 20:
-            content_selectors = [
-                '[data-testid="post_message"]',
-                '.userContent',
-                '.text_exposed_root'
-            ]
+            platform = identify_platform(urlparse(url).netloc.lower())
+            existing = self._resolve_redirect(url, key, final_url, platform, use_filter=True)
+            if existing:
+                return existing, None
+            if parse_pool:
+                post_data = parse_pool.submit(parse_page, html, url, platform).result()
+            else:
+                post_data = parse_page(html, url, platform)
             
-            for selector in content_selectors:
-                content_element = soup.select_one(selector)
-                if content_element:
-                    text = content_element.get_text(strip=True)
-                    break
-        
-        return {
-            'text': text or 'No content extracted',
-            'title': title,
-            'created_at': datetime.now(),
-            'likes': 0,
-            'platform': 'facebook',
-            'url': url
-        }
-    
-    def _parse_medium(self, html, url):
-        """Parse Medium article with improved extraction"""
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Medium specific selectors
-        content_selectors = [
-            'article',
-            '[data-testid="storyContent"]',
-            '.postArticle-content',
-            '.section-content',
-            '.story-content'
-        ]
-        
-        text = ""
-        for selector in content_selectors:
-            content = soup.select_one(selector)
-            if content:
-                # Remove unwanted elements
-                for unwanted in content.find_all(['script', 'style', 'nav', 'footer']):
-                    unwanted.decompose()
-                text = content.get_text(separator=' ', strip=True)
-                break
-        
-        # Fallback to meta description
-        if not text or len(text) < 50:
-            text = self._extract_meta_content(soup, 'og:description') or ''
-        
-        # Clean text
-        text = re.sub(r'\s+', ' ', text).strip()
-        if len(text) > 3000:
-            text = text[:3000] + "..."
-        
-        title = self._extract_meta_content(soup, 'og:title') or 'Medium Article'
-        author = self._extract_meta_content(soup, 'author') or 'Unknown'
-        
-        return {
-            'title': title,
-            'text': text or 'No content extracted',
-            'created_at': datetime.now(),
-            'platform': 'medium',
-            'author': author,
-            'url': url
-        }
+            post_id = self._save_post(url, key, final_url, topic, platform, post_data, status_code, len(html))
+            return post_id, None
+        except Exception as e:
+            return None, f"{type(e).__name__}: {e}"
     
-    def _parse_generic(self, html, url):
-        """Parse generic webpage with improved content extraction"""
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Remove unwanted elements
-        for element in soup(["script", "style", "nav", "footer", "header", "aside", "noscript"]):
-            element.decompose()
-        
-        # Try multiple strategies to find main content
-        content_selectors = [
-            'main',
-            'article', 
-            '[role="main"]',
-            '.content',
-            '.post-content',
-            '.entry-content',
-            '.article-content',
-            '.story-body',
-            '.post-body',
-            '#content',
-            '#main-content'
-        ]
-        
-        text = ""
-        title = ""
-        
-        # Try to find main content using selectors
-        for selector in content_selectors:
-            main_content = soup.select_one(selector)
-            if main_content:
-                text = main_content.get_text(separator=' ', strip=True)
-                break
-        
-        # Fallback: get all paragraph text
-        if not text or len(text) < 50:
-            paragraphs = soup.find_all('p')
-            text = ' '.join([p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)])
-        
-        # Final fallback: get all text
-        if not text or len(text) < 20:
-            text = soup.get_text(separator=' ', strip=True)
-        
-        # Clean and limit text
-        text = re.sub(r'\s+', ' ', text).strip()
-        if len(text) > 3000:
-            text = text[:3000] + "..."
+    def crawl_multiple_urls(self, urls, topic=None, max_workers=16, per_domain=2, parse_workers=None):
+        """
+        Crawl nhiều URLs song song.
+        max_workers: số luồng I/O; per_domain: số request đồng thời tối đa mỗi domain;
+        parse_workers: số process parse HTML (0 = parse ngay trong luồng I/O;
+        None = inline cho batch nhỏ hơn PARSE_POOL_MIN_URLS, ngược lại tối đa 4 process).
+        """
+        urls = [url.strip() for url in urls if url and url.strip()]
+        if not urls:
+            return []
+        # Gộp URL trùng sau chuẩn hóa (utm_*, fragment, thứ tự query...)
+        canonical = {url: canonicalize_url(url) for url in urls}
+        representative = {}
+        for url in urls:
+            representative.setdefault(canonical[url], url)
         
-        # Extract title with multiple fallbacks
-        title = (self._extract_meta_content(soup, 'og:title') or 
-                self._extract_meta_content(soup, 'twitter:title') or
-                (soup.title.string.strip() if soup.title and soup.title.string else '') or
-                soup.find('h1').get_text(strip=True) if soup.find('h1') else 'Untitled')
+        # Xếp xen kẽ theo domain để luồng không dồn vào chờ cùng một domain
+        by_domain = {}
+        for url in representative.values():
+            by_domain.setdefault(urlparse(url).netloc.lower(), []).append(url)
+        unique_urls = [url for group in zip_longest(*by_domain.values()) for url in group if url]
         
-        # Clean title
-        if title:
-            title = re.sub(r'\s+', ' ', title).strip()[:200]
+        if parse_workers is None:
+            # Batch nhỏ: fork process pool tốn hơn phần parse được chuyển đi
+            parse_workers = 0 if len(unique_urls) < PARSE_POOL_MIN_URLS else min(4, os.cpu_count() or 1)
         
-        # Extract description
-        description = (self._extract_meta_content(soup, 'og:description') or
-                      self._extract_meta_content(soup, 'twitter:description') or
-                      self._extract_meta_content(soup, 'description') or '')
+        domain_slots = {}
+        slots_lock = threading.Lock()
         
-        # If text is still empty, use description
-        if not text and description:
-            text = description
+        def slot_for(url):
+            domain = urlparse(url).netloc.lower()
+            with slots_lock:
+                if domain not in domain_slots:
+                    domain_slots[domain] = threading.BoundedSemaphore(per_domain)
+                return domain_slots[domain]
+        
+        print(f" 🚀 Crawling {len(unique_urls)} URLs with {max_workers} threads, "
+              f"{per_domain} per domain, {parse_workers or 'inline'} parse processes")
+        
+        outcomes = {}
+        done = succeeded = 0
+        started_at = time.perf_counter()
+        parse_pool = ProcessPoolExecutor(max_workers=parse_workers) if parse_workers else None
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(self._crawl_in_batch, url, topic, parse_pool, slot_for(url)): url
+                    for url in unique_urls
+                }
+                for future in as_completed(futures):
+                    url = futures[future]
+                    outcomes[url] = future.result()
+                    done += 1
+                    succeeded += outcomes[url][0] is not None
+                    rate = done / max(time.perf_counter() - started_at, 1e-6)
+                    print(f"\r   [{done}/{len(unique_urls)}] ✅ {succeeded}  ❌ {done - succeeded}  "
+                          f"{rate:.1f} URL/s", end='', flush=True)
+            print()
+        finally:
+            if parse_pool:
+                parse_pool.shutdown()
         
-        return {
-            'title': title or 'Untitled',
-            'text': text or 'No content extracted',
-            'description': description,
-            'created_at': datetime.now(),
-            'platform': 'web',
-            'url': url
-        }
-    
-    def _extract_meta_content(self, soup, property_name):
-        """Extract meta tag content"""
-        meta = soup.find('meta', property=property_name) or \
-               soup.find('meta', attrs={'name': property_name})
-        return meta.get('content', '').strip() if meta else None
-    
-    def crawl_multiple_urls(self, urls, topic=None):
-        """Crawl nhiều URLs"""
         results = []
         for url in urls:
-            url = url.strip()
-            if url:
-                post_id = self.crawl_url(url, topic)
-                results.append({'url': url, 'post_id': post_id, 'success': post_id is not None})
+            post_id, error = outcomes[representative[canonical[url]]]
+            result = {'url': url, 'post_id': post_id, 'success': post_id is not None}
+            if error:
+                result['error'] = error
+            results.append(result)
         
         success_count = sum(1 for r in results if r['success'])
-        print(f"\n ✅ Crawled {success_count}/{len(results)} URLs successfully")
+        print(f"\n ✅ Crawled {success_count}/{len(results)} URLs successfully "
+              f"in {time.perf_counter() - started_at:.1f}s")
+        self.print_fetch_stats()
+        self.policy.print_report()
         
         # Show detailed results
         for result in results:
@@ -374,14 +408,14 @@ class URLCrawler:
             print(f"   {status} {result['url'][:60]}...")
         return results
     
-    def crawl_from_file(self, filepath, topic=None):
+    def crawl_from_file(self, filepath, topic=None, **batch_options):
         """Crawl URLs từ file text"""
         try:
             with open(filepath, 'r', encoding='utf-8') as f:
                 urls = [line.strip() for line in f if line.strip()]
             
             print(f" 📄 Found {len(urls)} URLs in file: {filepath}")
-            return self.crawl_multiple_urls(urls, topic)
+            return self.crawl_multiple_urls(urls, topic, **batch_options)
         except FileNotFoundError:
             print(f" ❌ File not found: {filepath}")
             return []
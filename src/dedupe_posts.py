@@ -0,0 +1,55 @@
+"""Migration: remove duplicate posts so the unique indexes on post keys can be built"""
+import sys
+import os
+import argparse
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from config.database import DatabaseConfig, UNIQUE_POST_KEYS, create_unique_post_index
+
+
+def find_duplicates(posts_collection, field):
+    """Nhóm document cùng giá trị field: [(value, [_id, ...])] theo thứ tự _id (cũ nhất trước)"""
+    groups = posts_collection.aggregate([
+        {'$match': {field: {'$exists': True}}},
+        {'$group': {'_id': f'${field}', 'ids': {'$push': '$_id'}, 'count': {'$sum': 1}}},
+        {'$match': {'count': {'$gt': 1}}}
+    ], allowDiskUse=True)
+    return [(group['_id'], sorted(group['ids'])) for group in groups]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Remove duplicate posts (keeps the oldest document per key)')
+    parser.add_argument('--fields', nargs='+', default=list(UNIQUE_POST_KEYS), choices=UNIQUE_POST_KEYS,
+                        help='Post keys to dedupe')
+    parser.add_argument('--dry-run', action='store_true', help='Only report duplicates, delete nothing')
+
+    args = parser.parse_args()
+
+    # Connect to database
+    db_config = DatabaseConfig()
+    db = db_config.connect()
+
+    if db is None:
+        print("❌ Failed to connect to database")
+        return
+
+    posts_collection = db['posts']
+    for field in args.fields:
+        duplicates = find_duplicates(posts_collection, field)
+        extra = [post_id for _, ids in duplicates for post_id in ids[1:]]
+        print(f"🔍 {field}: {len(duplicates)} duplicated keys, {len(extra)} extra posts")
+        if args.dry_run or not extra:
+            continue
+
+        removed = 0
+        for start in range(0, len(extra), 1000):
+            removed += posts_collection.delete_many({'_id': {'$in': extra[start:start + 1000]}}).deleted_count
+        print(f"🗑️  Removed {removed} duplicate posts by {field}")
+
+        if create_unique_post_index(posts_collection, field):
+            print(f"✅ Unique index on posts.{field} created")
+        else:
+            print(f"❌ Unique index on posts.{field} still failed")
+
+if __name__ == "__main__":
+    main()
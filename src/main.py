@@ -8,14 +8,16 @@ load_dotenv()
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 from config.database import DatabaseConfig
-from data_collection.google_news_crawler import GoogleNewsCrawler
-from data_collection.reddit_crawler import RedditCrawler
-from data_collection.medium_crawler import MediumCrawler
-from data_collection.stackoverflow_crawler import StackOverflowCrawler
-from data_collection.hackernews_crawler import HackerNewsCrawler
+from data_collection.registry import create_crawlers
+from data_collection.http_client import get_http_client
+from data_collection.feed_fetcher import FeedFetcher
+from data_collection.seen_items import SeenItems
+from data_collection.orchestrator import CollectionOrchestrator
 from analysis.sentiment_analyzer import SentimentAnalyzer
 from analysis.trend_analyzer import TrendAnalyzer
 from analysis.advanced_analyzer import AdvancedAnalyzer
+from analysis.duplicate_detector import DuplicateDetector
+from analysis.similarity_index import SimilarityIndex
 from utils.report_exporter import ReportExporter
 from dashboard.dash_app import DashboardApp
 
@@ -78,35 +80,39 @@ def collect_data(db):
         "AI learning tools"
     ]
     
-    # Google News
-    print("\n📰 Collecting from Google News...")
-    google_crawler = GoogleNewsCrawler(db)
-    google_crawler.collect_topics(ai_education_topics[:2], max_results_per_query=30)
-    
-    # Medium
-    print("\n📝 Collecting from Medium...")
-    medium_crawler = MediumCrawler(db)
-    medium_crawler.collect_topics(['artificial-intelligence', 'machine-learning', 'education-technology'], max_results_per_tag=20)
-    
-    # Stack Overflow
-    print("\n💻 Collecting from Stack Overflow...")
-    stackoverflow_crawler = StackOverflowCrawler(db)
-    stackoverflow_crawler.collect_topics(['machine-learning', 'artificial-intelligence'], max_results_per_tag=30)
-    
-    # Hacker News
-    print("\n🚀 Collecting from Hacker News...")
-    hackernews_crawler = HackerNewsCrawler(db)
-    hackernews_crawler.collect_topics(['AI education', 'EdTech'], max_results_per_query=20)
-    
-    # Reddit
-    print("\n🔴 Collecting from Reddit...")
-    reddit_crawler = RedditCrawler(
-        db=db,
-        client_id=os.getenv('REDDIT_CLIENT_ID', 'k6ozqL3mwwC0cGNUSmcdlQ'),
-        client_secret=os.getenv('REDDIT_CLIENT_SECRET', 'JR6XLrrWpp2oNi5RNk0uV2GrrCaelw'),
-        user_agent=os.getenv('REDDIT_USER_AGENT', 'windows:ai-trend-collector:v2.0')
-    )
-    reddit_crawler.collect_topics(['AI education', 'EdTech'], limit_per_topic=30)
+    # Shared conditional-GET state for all RSS sources
+    feed_fetcher = FeedFetcher(db)
+    # Item đã gặp ở query trước được bỏ qua trước khi dựng document
+    seen = SeenItems()
+    
+    # Mọi nguồn đã đăng ký trong registry, dùng chung feed_fetcher và seen filter
+    crawlers = create_crawlers(db, feed_fetcher=feed_fetcher, seen=seen)
+    
+    # Các nguồn và query chạy song song, giới hạn theo từng nguồn
+    print("\n🌐 Collecting from all sources in parallel...")
+    orchestrator = CollectionOrchestrator()
+    collection_plan = {
+        'google_news': (ai_education_topics[:2], 30),
+        'medium': (['artificial-intelligence', 'machine-learning', 'education-technology'], 20),
+        'stackoverflow': (['machine-learning', 'artificial-intelligence'], 30),
+        'hackernews': (['AI education', 'EdTech'], 20),
+        'reddit': (['AI education', 'EdTech'], 30)
+    }
+    for source, crawler in crawlers.items():
+        queries, max_results = collection_plan.get(
+            source, (crawler.default_queries, crawler.default_max_results))
+        for query in queries:
+            orchestrator.add_crawler(crawler, query, max_results=max_results)
+    orchestrator.run()
+    
+    # Index new posts for similarity search
+    SimilarityIndex(db).update()
+    
+    orchestrator.print_report()
+    feed_fetcher.print_report()
+    seen.save()
+    seen.print_report()
+    get_http_client().print_stats()
     
     total_posts = db['posts'].count_documents({})
     print(f"\n✅ Collection completed! Total posts: {total_posts:,}")
@@ -122,6 +128,13 @@ def analyze_data(db):
     sentiment_analyzer = SentimentAnalyzer(db)
     sentiment_analyzer.analyze_all_posts()
     
+    # Near-duplicate clustering
+    print("\n🧬 Clustering near-duplicate posts...")
+    duplicate_detector = DuplicateDetector(db)
+    duplicate_detector.cluster_posts()
+    cluster_stats = duplicate_detector.get_cluster_stats()
+    print(f"   {cluster_stats['total_posts']:,} posts -> {cluster_stats['total_clusters']:,} unique stories")
+    
     # Trend Analysis
     print("\n📈 Running trend analysis...")
     trend_analyzer = TrendAnalyzer(db)
@@ -138,6 +151,13 @@ def analyze_data(db):
     advanced_analyzer = AdvancedAnalyzer(db)
     advanced_analyzer.generate_advanced_report()
     
+    # Per-post topic labels
+    advanced_analyzer.assign_topics(n_topics=5)
+    topic_stats = advanced_analyzer.topic_stats()
+    if not topic_stats.empty:
+        print("\n📚 Posts by Learned Topic:")
+        print(topic_stats.to_string())
+    
     # Export Results
     print("\n📤 Exporting results...")
     exporter = ReportExporter(db)
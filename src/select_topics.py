@@ -0,0 +1,47 @@
+"""Command line tool for choosing the number of LDA topics"""
+import sys
+import os
+import argparse
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from config.database import DatabaseConfig
+from analysis.topic_model_selection import TopicModelSelector
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate a grid of LDA configurations')
+    parser.add_argument('--topics', '-k', type=int, nargs='+', default=[3, 5, 8, 10, 15],
+                        help='Topic counts to evaluate')
+    parser.add_argument('--max-iter', '-i', type=int, nargs='+', default=[10, 20],
+                        help='max_iter values to evaluate')
+    parser.add_argument('--workers', '-w', type=int, default=None, help='Number of worker processes')
+    parser.add_argument('--refresh', action='store_true', help='Ignore cached fits and refit everything')
+
+    args = parser.parse_args()
+
+    # Connect to database
+    db_config = DatabaseConfig()
+    db = db_config.connect()
+
+    if db is None:
+        print("❌ Failed to connect to database")
+        return
+
+    selector = TopicModelSelector(db, max_workers=args.workers)
+    results = selector.evaluate(args.topics, args.max_iter, refresh=args.refresh)
+
+    if results.empty:
+        print("❌ No configuration could be evaluated")
+        return
+
+    print(f"\n{'='*60}")
+    print("LDA MODEL SELECTION (sorted by UMass coherence)")
+    print(f"{'='*60}")
+    print(results.to_string(index=False))
+
+    best = results.iloc[0]
+    print(f"\n💡 Recommended: n_topics={int(best['n_topics'])}, max_iter={int(best['max_iter'])}")
+    print(f"   Total fit time: {results.loc[~results['cached'], 'wall_time'].sum():.2f}s "
+          f"({int(results['cached'].sum())} configurations served from cache)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Thread-safe Bloom filter with optional on-disk persistence"""
+import hashlib
+import math
+import os
+import struct
+import threading
+
+_HEADER = struct.Struct('<QQQ')  # n_bits, n_hashes, n_items
+
+
+class BloomFilter:
+    def __init__(self, capacity=100000, error_rate=0.001):
+        # Kích thước tối ưu: m = -n ln p / (ln 2)^2, k = m/n ln 2
+        self.n_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.n_hashes = max(1, round(self.n_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.n_bits + 7) // 8)
+        self.n_items = 0
+        self._lock = threading.Lock()
+
+    def _positions(self, key):
+        # Double hashing (Kirsch–Mitzenmacher) từ một digest 128-bit
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = struct.unpack('<QQ', digest)
+        return [(h1 + i * h2) % self.n_bits for i in range(self.n_hashes)]
+
+    def __contains__(self, key):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def add(self, key):
+        """Thêm key; trả về True nếu key (có thể) đã có từ trước"""
+        positions = self._positions(key)
+        with self._lock:
+            present = True
+            for p in positions:
+                mask = 1 << (p & 7)
+                if not self.bits[p >> 3] & mask:
+                    present = False
+                    self.bits[p >> 3] |= mask
+            if not present:
+                self.n_items += 1
+            return present
+
+    def false_positive_rate(self):
+        """Tỷ lệ dương tính giả ước lượng với số phần tử hiện tại"""
+        return (1 - math.exp(-self.n_hashes * self.n_items / self.n_bits)) ** self.n_hashes
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with self._lock, open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(self.n_bits, self.n_hashes, self.n_items))
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            n_bits, n_hashes, n_items = _HEADER.unpack(f.read(_HEADER.size))
+            bits = bytearray(f.read())
+        bloom = cls.__new__(cls)
+        bloom.n_bits, bloom.n_hashes, bloom.n_items = n_bits, n_hashes, n_items
+        bloom.bits = bits
+        bloom._lock = threading.Lock()
+        return bloom
@@ -0,0 +1,79 @@
+"""HTML fragment to plain text without building a tree (feed summaries, API bodies)"""
+import re
+from html import unescape
+from html.parser import HTMLParser
+
+# Nội dung trong các tag này không phải text hiển thị
+SKIPPED_TAGS = frozenset({'script', 'style', 'noscript', 'template', 'head', 'svg'})
+# Ranh giới khối: chèn khoảng trắng để chữ hai đoạn không dính nhau ("<p>a</p><p>b</p>" -> "a b")
+BLOCK_TAGS = frozenset({
+    'p', 'br', 'div', 'li', 'ul', 'ol', 'tr', 'td', 'th', 'table', 'blockquote', 'pre',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'section', 'article', 'figure', 'figcaption'
+})
+WHITESPACE = re.compile(r'\s+')
+HASHTAG_PATTERN = re.compile(r'#(\w+)')
+
+
+class _LimitReached(Exception):
+    pass
+
+
+class _TextCollector(HTMLParser):
+    def __init__(self, limit):
+        # convert_charrefs=True: HTMLParser tự giải mã &amp; &#39; ... trong handle_data
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.parts = []
+        self.length = 0
+        self.next_check = limit
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        self.parts.append(data)
+        self.length += len(data)
+        if self.limit and self.length > self.next_check:
+            # Độ dài thô gồm cả khoảng trắng thừa: chỉ dừng khi text đã gộp khoảng trắng đủ limit
+            if len(WHITESPACE.sub(' ', ''.join(self.parts)).strip()) > self.limit:
+                raise _LimitReached
+            self.next_check = self.length + self.limit // 2
+
+
+def html_to_text(fragment, limit=None):
+    """
+    Text hiển thị của đoạn HTML: bỏ tag, script/style, giải mã entity, gộp khoảng trắng.
+    limit: cắt ở limit ký tự và dừng đọc phần HTML còn lại.
+    """
+    if not fragment:
+        return ''
+    if '<' not in fragment:
+        # Không có tag: chỉ cần giải mã entity
+        text = WHITESPACE.sub(' ', unescape(fragment) if '&' in fragment else fragment).strip()
+        return text[:limit] if limit else text
+
+    collector = _TextCollector(limit)
+    try:
+        collector.feed(fragment)
+        collector.close()
+    except _LimitReached:
+        pass
+    text = WHITESPACE.sub(' ', ''.join(collector.parts)).strip()
+    return text[:limit] if limit else text
+
+
+def extract_hashtags(text):
+    """Hashtag (không kèm '#') xuất hiện trong text"""
+    return HASHTAG_PATTERN.findall(text) if text else []
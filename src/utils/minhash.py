@@ -0,0 +1,88 @@
+"""MinHash signatures and LSH banding for near-duplicate detection"""
+import hashlib
+import re
+import numpy as np
+
+NUM_PERM = 128
+NUM_BANDS = 32
+ROWS_PER_BAND = NUM_PERM // NUM_BANDS
+SHINGLE_SIZE = 2
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Hệ số hoán vị cố định để chữ ký ổn định giữa các lần chạy
+_rng = np.random.RandomState(20251028)
+_PERM_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+
+def normalize_for_dedupe(post):
+    """Lấy phần text đại diện cho bài viết để so sánh trùng lặp"""
+    text = post.get('title') or post.get('text') or ''
+
+    # Google News thêm " - Tên báo" vào cuối tiêu đề
+    source = post.get('source')
+    if source and text.endswith(f" - {source}"):
+        text = text[:-len(source) - 3]
+
+    text = re.sub(r'[^\w\s]', ' ', text.lower())
+    return text.split()
+
+
+def shingles(words, size=SHINGLE_SIZE):
+    """Tạo tập shingle từ danh sách từ"""
+    if len(words) < size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def compute_signature(shingle_set):
+    """Tính MinHash signature (list int) cho một tập shingle"""
+    if not shingle_set:
+        return None
+
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little')
+         for s in shingle_set],
+        dtype=np.uint64
+    )
+    # (a * h + b) mod p, không tràn số vì a, b, h đều < 2^32
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0).astype(np.int64).tolist()
+
+
+def band_keys(signature):
+    """Chia signature thành các band và băm mỗi band thành một key LSH"""
+    keys = []
+    for band in range(NUM_BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(repr(rows).encode(), digest_size=8).hexdigest()
+        keys.append(f"{band}:{digest}")
+    return keys
+
+
+def estimate_similarity(sig_a, sig_b):
+    """Ước lượng Jaccard similarity từ hai signature"""
+    if not sig_a or not sig_b:
+        return 0.0
+    return float(np.mean(np.array(sig_a) == np.array(sig_b)))
+
+
+def minhash_fields(post):
+    """Trả về các field MinHash/LSH để ghi cùng document khi ingest"""
+    signature = compute_signature(shingles(normalize_for_dedupe(post)))
+    if signature is None:
+        return {}
+    return {
+        'minhash': signature,
+        'lsh_bands': band_keys(signature)
+    }
+
+
+def add_minhash(posts):
+    """Gắn MinHash signature vào danh sách document trước khi lưu (bỏ qua document đã có)"""
+    for post in posts:
+        if 'minhash' not in post:
+            post.update(minhash_fields(post))
+    return posts
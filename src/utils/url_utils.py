@@ -0,0 +1,47 @@
+"""URL canonicalization so equivalent links map to one url_cache entry"""
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Tham số chỉ dùng để tracking, không đổi nội dung trang
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'igshid', 'mc_cid', 'mc_eid',
+    'ref_src', 'ref_url', '_hsenc', '_hsmi', 'mkt_tok', 'yclid', 'si'
+}
+TRACKING_PREFIXES = ('utm_',)
+
+# Host phụ trỏ tới cùng nội dung với host chính
+HOST_PREFIXES = ('www.', 'm.', 'mobile.', 'amp.')
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonicalize_url(url):
+    """
+    Dạng chuẩn của URL: scheme/host viết thường, bỏ www./m./mobile., port mặc định,
+    fragment, tham số tracking (utm_*, fbclid...), sắp xếp query và bỏ '/' cuối path.
+    """
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or 'http').lower()
+
+    host = (parts.hostname or '').lower()
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix) and host.count('.') > 1:
+            host = host[len(prefix):]
+            break
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+def canonical_hash(url):
+    """MD5 của URL đã chuẩn hóa"""
+    return hashlib.md5(canonicalize_url(url).encode()).hexdigest()